@@ -1,44 +1,369 @@
-from flask import Flask, request, jsonify, render_template
-import tensorflow as tf
+import time
+_import_start = time.perf_counter()
+
+from flask import Flask, Response, g, request, jsonify, render_template, url_for
 import numpy as np
 import cv2
-from sklearn.pipeline import Pipeline
+import logging
 import os
-from modules.preprocess import Resize, GaussianBlur, CLAHE_Color, Normalize, MorphologicalOperations, show_images
-from modules.heatmap import saliency_map, visualize_saliency
+from modules.fused import FusedPreprocess, LesionCrop
+from modules.heatmap import SaliencyEngine, visualize_saliency
+from modules.montage import montage_jpeg
+from modules.batching import MicroBatcher
+from modules.decode import decode_image
+from modules.result_cache import ResultCache, result_key, file_version
+from modules.registry import ModelBundle, ModelRegistry, warmup_check
+from modules.serving import MALIGNANT_COLUMN, ServingModel, load_serving_model, strip_augmentation, variant_path
+from modules.tta import TTAPredictor
+from modules.workers import WorkerPool, PoolSaturated
+from modules.metrics import MetricsRegistry, record, span, start_profile, stop_profile, server_timing
 import base64
-from io import BytesIO
-from tensorflow import keras
+
+logger = logging.getLogger(__name__)
+
+# Tempos de inicialização do worker: importações, carga do modelo e aquecimento
+startup_report = {'import_s': time.perf_counter() - _import_start}
 
 
 app = Flask(__name__)
+# Limite de tamanho dos uploads; requisições maiores recebem 413
+app.config['MAX_CONTENT_LENGTH'] = int(float(os.environ.get('MAX_UPLOAD_MB', 16)) * 1024 * 1024)
+# Decodifica JPEGs grandes em resolução reduzida (1/2, 1/4, 1/8), já que o modelo usa 128x128
+REDUCED_DECODE = os.environ.get('REDUCED_DECODE', '0') == '1'
+
+MODEL_PATH = os.environ.get('MODEL_PATH', 'static/model/skin_cancer.keras')
+# Registro de versões (ex.: models/<versão>/skin_cancer.keras); sem ele, serve MODEL_PATH.
+# A cada MODEL_RELOAD_INTERVAL segundos o registro é verificado e uma versão nova (ou a
+# indicada no arquivo ACTIVE) é trocada a quente após o aquecimento
+MODEL_REGISTRY_DIR = os.environ.get('MODEL_REGISTRY_DIR')
+MODEL_RELOAD_INTERVAL = float(os.environ.get('MODEL_RELOAD_INTERVAL', 30))
+# Variante servida: float32 (o próprio .keras), tflite, dynamic, float16 ou int8 (gerados
+# por `python -m modules.quantization`); SERVING_ARTIFACT aponta para um artefato
+# qualquer (só sem registro)
+MODEL_VARIANT = os.environ.get('MODEL_VARIANT', 'float32')
+SERVING_ARTIFACT = os.environ.get('SERVING_ARTIFACT')
+# Serve a variante TFLite com os pesos lidos do arquivo mapeado em memória, compartilhados
+# entre os processos do servidor (com float32, usa a variante 'tflite'); o modelo Keras
+# só é carregado se a saliência for pedida
+SHARED_WEIGHTS = os.environ.get('SHARED_WEIGHTS', '0') == '1'
+# Recorta a região da lesão antes do Resize (LESION_CROP=1); desativado por padrão porque
+# o modelo atual foi treinado com a imagem inteira
+LESION_CROP = os.environ.get('LESION_CROP', '0') == '1'
+# Pipeline de serviço (Resize 128x128 -> GaussianBlur -> abertura e fechamento 3x3 ->
+# CLAHE_Color, como modules.preprocess) em uma única passada com buffers reutilizados; o
+# trace usa os nomes 'crop', 'resize', 'blur', 'morph_opening', 'morph_closing' e 'clahe'
+preprocess_engine = FusedPreprocess(size=(128, 128),
+                                    morphology=(('opening', (3, 3), 1), ('closing', (3, 3), 1)),
+                                    crop=LesionCrop() if LESION_CROP else None)
+# Títulos do painel de etapas, pelo nome de cada etapa do pipeline
+STEP_TITLES = {
+    'crop': 'Recorte',
+    'resize': 'Resize',
+    'blur': 'GaussianBlur',
+    'morph_opening': 'Opening',
+    'morph_closing': 'Closing',
+    'clahe': 'CLAHE',
+}
+
+# Saliência compilada em grafo; SALIENCY_MODE: vanilla, smoothgrad ou integrated_gradients
+SALIENCY_MODE = os.environ.get('SALIENCY_MODE', 'vanilla')
+SALIENCY_SAMPLES = int(os.environ.get('SALIENCY_SAMPLES', 16))
+# Test-time augmentation opcional (?tta=1 ou campo "tta" do formulário): as TTA_VIEWS
+# vistas espelhadas/rotacionadas da imagem pré-processada vão em um único forward pass
+TTA_VIEWS = int(os.environ.get('TTA_VIEWS', 4))
+# Agrupa as inferências de requisições concorrentes em um único forward pass
+BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', 32))
+BATCH_MAX_WAIT_MS = float(os.environ.get('BATCH_MAX_WAIT_MS', 5.0))
+# Tamanhos de lote fixos do TFLite: um interpretador alocado por tamanho, e cada lote é
+# dividido em pedaços desses tamanhos. Tamanhos intermediários (ex.: 1,4,8,16,32) evitam
+# dividir lotes médios, ao custo de uma arena de ativações a mais por tamanho
+TFLITE_BATCH_SIZES = tuple(sorted({1, TTA_VIEWS, BATCH_MAX_SIZE, *(
+    int(size) for size in os.environ.get('TFLITE_BATCH_SIZES', '').split(',') if size.strip())}))
+
+def load_keras_model(path):
+    # Keras/TensorFlow só são importados quando um modelo Keras é de fato carregado
+    from tensorflow import keras
+    return keras.models.load_model(path)
+
+def load_model_bundle(name, model_path):
+    """Carrega uma versão do modelo com seu batcher, TTA e saliência (load_fn do registro)."""
+    if MODEL_REGISTRY_DIR is None and SERVING_ARTIFACT:
+        artifact = SERVING_ARTIFACT
+    else:
+        artifact = variant_path(model_path, 'tflite' if SHARED_WEIGHTS and MODEL_VARIANT == 'float32' else MODEL_VARIANT)
+    version = name if MODEL_REGISTRY_DIR else file_version(model_path)
+    if artifact != model_path:
+        version += '-' + os.path.basename(os.path.normpath(artifact))
+
+    keras_model = None
+    if not SHARED_WEIGHTS:
+        keras_model = load_keras_model(model_path)
+    if artifact == model_path and keras_model is not None:
+        serving_model = ServingModel(keras_model)
+    else:
+        serving_model = load_serving_model(artifact, shared_weights=SHARED_WEIGHTS,
+                                           batch_sizes=TFLITE_BATCH_SIZES)
+
+    def saliency_factory():
+        model = keras_model if keras_model is not None else load_keras_model(model_path)
+        return SaliencyEngine(strip_augmentation(model), mode=SALIENCY_MODE, n_samples=SALIENCY_SAMPLES)
+
+    bundle = ModelBundle(version, serving_model,
+                         MicroBatcher(serving_model.predict, max_batch_size=BATCH_MAX_SIZE,
+                                      max_wait_ms=BATCH_MAX_WAIT_MS, concurrency=lambda: worker_pool.running()),
+                         TTAPredictor(serving_model.predict, n_views=TTA_VIEWS),
+                         saliency_factory)
+    return bundle
+
+def warmup_model_bundle(bundle):
+    """Aquece e verifica uma versão antes de ativá-la (check_fn do registro)."""
+    warmup_check(bundle.serving_model, TFLITE_BATCH_SIZES)
+    if not SHARED_WEIGHTS:
+        # Rastreia o grafo da saliência antes da primeira requisição
+        bundle.saliency_engine(np.zeros(preprocess_engine.size[::-1] + (3,), np.uint8))
+
+model_registry = ModelRegistry(load_model_bundle, root=MODEL_REGISTRY_DIR,
+                               model_path=None if MODEL_REGISTRY_DIR else MODEL_PATH,
+                               check_fn=warmup_model_bundle, poll_interval=MODEL_RELOAD_INTERVAL)
+model_registry.activate()
+model_registry.start()
+startup_report['model_load_s'] = model_registry.active.load_s
+startup_report['warmup_s'] = model_registry.active.warmup_s
+
+# Resultados já calculados, por conteúdo da imagem + versão do modelo
+result_cache = ResultCache(max_entries=int(os.environ.get('RESULT_CACHE_SIZE', 256)),
+                           ttl=float(os.environ.get('RESULT_CACHE_TTL', 3600)),
+                           disk_dir=os.environ.get('RESULT_CACHE_DIR'))
+
+# Pool de workers para o trabalho pesado (pré-processamento, inferência, saliência);
+# com WORKER_QUEUE_SIZE requisições aguardando, as seguintes recebem 503 + Retry-After.
+# Cada thread espera a própria inferência, então um lote do MicroBatcher tem no máximo
+# WORKER_THREADS requisições de uma imagem: para lotes cheios sob carga, use
+# WORKER_THREADS >= BATCH_MAX_SIZE (threads esperando o lote não ocupam CPU)
+worker_pool = WorkerPool(n_workers=int(os.environ.get('WORKER_THREADS', os.cpu_count() or 1)),
+                         max_queue=int(os.environ.get('WORKER_QUEUE_SIZE', 16)))
+
+# Métricas expostas em /metrics (formato do Prometheus)
+metrics = MetricsRegistry()
+STAGE_SECONDS = metrics.histogram('skin_cancer_stage_duration_seconds',
+                                  'Duração de cada etapa do processamento de uma imagem.', ('stage',))
+REQUEST_SECONDS = metrics.histogram('skin_cancer_request_duration_seconds',
+                                    'Duração das requisições por rota, status e versão do modelo.',
+                                    ('endpoint', 'status', 'model_version'))
+metrics.callback('skin_cancer_model_info', 'Versão do modelo ativa (valor 1).',
+                 lambda: {(model_registry.active.version,): 1}, labelnames=('version',))
+metrics.callback('skin_cancer_model_reloads_total', 'Trocas a quente de versão do modelo.',
+                 lambda: model_registry.stats()['reloads'], type='counter')
+metrics.callback('skin_cancer_model_reload_failures_total', 'Versões recusadas na carga ou no aquecimento.',
+                 lambda: model_registry.stats()['failures'], type='counter')
+metrics.callback('skin_cancer_worker_pool_in_flight', 'Tarefas executando ou na fila do worker_pool.',
+                 lambda: worker_pool.stats()['in_flight'])
+metrics.callback('skin_cancer_worker_pool_rejected_total', 'Requisições recusadas com 503 (fila cheia).',
+                 lambda: worker_pool.stats()['rejected'], type='counter')
+metrics.callback('skin_cancer_batcher_items_total', 'Imagens classificadas pelo MicroBatcher.',
+                 lambda: model_registry.active.batcher.stats()['total_items'], type='counter')
+metrics.callback('skin_cancer_batcher_batches_total', 'Forward passes executados pelo MicroBatcher.',
+                 lambda: model_registry.active.batcher.stats()['total_batches'], type='counter')
+metrics.callback('skin_cancer_result_cache_lookups_total', 'Consultas ao cache de resultados por desfecho.',
+                 lambda: {(outcome,): result_cache.stats()[outcome] for outcome in ('memory_hits', 'disk_hits', 'misses')},
+                 type='counter', labelnames=('outcome',))
+# Perfil por etapa na resposta (cabeçalho Server-Timing) quando a requisição envia X-Profile: 1
+PROFILING_HEADER = os.environ.get('PROFILING_HEADER', '1') == '1'
+
+logger.info("Inicialização: %s", ", ".join(f"{k} = {v:.2f}s" for k, v in startup_report.items()))
 
-model = keras.models.load_model('static/model/skin_cancer.keras')
-preprocess_pipeline = Pipeline([
-        ('resize', Resize((128, 128))),
-        ('blur', GaussianBlur()),
-        ('morph_opening', MorphologicalOperations(operation='opening', kernel_size=(3, 3))),
-        ('morph_closing', MorphologicalOperations(operation='closing', kernel_size=(3, 3))),
-        ('clahe', CLAHE_Color())
-    ])
+@app.before_request
+def _start_request_timing():
+    g.request_start = time.perf_counter()
+    if PROFILING_HEADER and request.headers.get('X-Profile') == '1':
+        g.profile_token = start_profile()
 
-def preprocess_and_load_image(image_path):
+@app.after_request
+def _finish_request_timing(response):
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'desconhecida'
+    model_version = g.get('model_version', '')
+    if model_version:
+        response.headers['X-Model-Version'] = model_version
+    REQUEST_SECONDS.observe(time.perf_counter() - g.request_start, endpoint, str(response.status_code),
+                            model_version)
+    token = g.pop('profile_token', None)
+    if token is not None:
+        profile = stop_profile(token)
+        profile.append(('total', time.perf_counter() - g.request_start))
+        response.headers['Server-Timing'] = server_timing(profile)
+    return response
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), content_type=MetricsRegistry.CONTENT_TYPE)
+
+def run_in_pool(fn, *args, **kwargs):
+    """Executa `fn` no worker_pool, registrando a espera na fila como a etapa 'queue'."""
+    submitted = time.perf_counter()
+
+    def task():
+        record(STAGE_SECONDS, 'queue', time.perf_counter() - submitted)
+        return fn(*args, **kwargs)
+
+    return worker_pool.run(task)
+
+def run_with_model(fn, *args, **kwargs):
+    """
+    Executa `fn(bundle, ...)` no worker_pool com a versão do modelo ativa no momento da
+    requisição; uma troca a quente no meio do caminho não afeta a requisição em andamento.
+    """
+    with model_registry.acquire() as bundle:
+        g.model_version = bundle.version
+        return run_in_pool(fn, bundle, *args, **kwargs)
+
+def load_image(data):
+    """Decodifica os bytes enviados; retorna None se a imagem for inválida."""
+    try:
+        with span(STAGE_SECONDS, 'decode'):
+            return decode_image(data, target_size=preprocess_engine.size if REDUCED_DECODE else None)
+    except Exception as e:
+        print(f"Erro ao carregar imagem: {e}")
+        return None
+
+def preprocess_image(img_rgb, trace=None):
+    """Pré-processa uma imagem já decodificada; retorna None em caso de erro."""
     try:
-        img = cv2.imread(image_path)
-        if img is None:
-            return None
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        processed_img = preprocess_pipeline.transform([img_rgb])[0]
-        return img_rgb, processed_img
+        with span(STAGE_SECONDS, 'preprocess'):
+            return preprocess_engine.transform([img_rgb], trace=trace)[0]
     except Exception as e:
-        print(f"Erro ao pré-processar/carregar imagem: {e}")
+        print(f"Erro ao pré-processar imagem: {e}")
+        return None
+
+def preprocess_and_load_image(data, trace=None):
+    img_rgb = load_image(data)
+    if img_rgb is None:
         return None, None
+    processed_img = preprocess_image(img_rgb, trace=trace)
+    if processed_img is None:
+        return None, None
+    return img_rgb, processed_img
 
 # Rota para exibir a página HTML
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def run_prediction(bundle, data, with_saliency=True, with_steps=True, with_tta=False):
+    """
+    Pré-processa e classifica uma imagem (executado no worker_pool). O mapa de saliência,
+    o painel de etapas e a predição com TTA só são gerados quando pedidos e ficam
+    guardados no result_cache junto com a probabilidade; a imagem só é pré-processada
+    se faltar alguma parte do resultado.
+
+    Returns:
+        tuple: (chave do resultado, dicionário do resultado) ou (None, None) se a
+            imagem não puder ser decodificada.
+    """
+    original_image = load_image(data)
+    if original_image is None:
+        return None, None
+
+    # A chave vem da imagem decodificada: num acerto completo não há pré-processamento
+    with span(STAGE_SECONDS, 'result_cache'):
+        key = result_key(original_image, bundle.version)
+        result = result_cache.get(key) or {}
+    need_tta = with_tta and result.get('tta', {}).get('views') != TTA_VIEWS
+    need_saliency = with_saliency and 'saliency_jpeg' not in result
+    need_steps = with_steps and 'steps_jpeg' not in result
+    if not (need_tta or need_saliency or need_steps or 'probability' not in result):
+        return key, result
+
+    # Saídas intermediárias de cada etapa, reaproveitadas no painel de visualização
+    steps = [] if need_steps else None
+    processed_image = preprocess_image(original_image, trace=steps)
+    if processed_image is None:
+        return None, None
+
+    updates = {}
+    if need_tta:
+        with span(STAGE_SECONDS, 'tta'):
+            updates['tta'] = bundle.tta_predictor(processed_image)
+        if 'probability' not in result:
+            # A primeira vista é a própria imagem: dispensa a inferência simples
+            updates['probability'] = updates['tta']['view_probabilities'][0]
+    if 'probability' not in result and 'probability' not in updates:
+        with span(STAGE_SECONDS, 'inference'):
+            updates['probability'] = float(bundle.batcher.predict(processed_image)[MALIGNANT_COLUMN])
+
+    if need_saliency:
+        # Gerar o mapa de saliência
+        with span(STAGE_SECONDS, 'saliency'):
+            saliency = bundle.saliency_engine(processed_image)
+
+        # Visualizar o mapa de saliência sobre a imagem original
+        with span(STAGE_SECONDS, 'saliency_overlay'):
+            saliency_overlayed = visualize_saliency(original_image, saliency)
+            _, img_encoded = cv2.imencode('.jpg', saliency_overlayed)
+        updates['saliency'] = saliency
+        updates['saliency_jpeg'] = img_encoded.tobytes()
+
+    if need_steps:
+        with span(STAGE_SECONDS, 'montage'):
+            updates['steps_jpeg'] = montage_jpeg(
+                [original_image] + [images[0] for _, images in steps],
+                titles=["Original"] + [STEP_TITLES.get(name, name) for name, _ in steps])
+
+    if updates:
+        with span(STAGE_SECONDS, 'result_cache'):
+            result = {**result, **updates}
+            result_cache.put(key, result)
+    return key, result
+
+def run_batch_prediction(bundle, uploads):
+    """Classifica uma lista de (nome, bytes) em lote (executado no worker_pool)."""
+    results = []
+    pending, images = [], []
+    for filename, data in uploads:
+        _, processed_image = preprocess_and_load_image(data)
+        if processed_image is None:
+            results.append({'filename': filename, 'error': 'Erro ao pré-processar a imagem'})
+            continue
+        results.append({'filename': filename})
+        pending.append(results[-1])
+        images.append(processed_image)
+
+    if images:
+        # Todas de uma vez: o batcher sabe que a thread só espera depois da última
+        with span(STAGE_SECONDS, 'inference'):
+            predictions = bundle.batcher.predict_many(images)
+        for result, prediction in zip(pending, predictions):
+            probability = float(prediction[MALIGNANT_COLUMN])
+            result['probability'] = probability
+            result['class'] = "maligno" if probability > 0.5 else "benigno"
+    return results
+
+def _query_flag(name):
+    return request.args.get(name, '').lower() in ('1', 'true', 'yes')
+
+def _form_flag(name):
+    """Opção pedida pela query string (?nome=1) ou pelo campo de mesmo nome do formulário."""
+    return _query_flag(name) or request.form.get(name, '').lower() in ('1', 'true', 'yes', 'on')
+
+def _tta_requested():
+    """TTA pedido pela query string (?tta=1) ou pelo campo "tta" do formulário."""
+    return _form_flag('tta')
+
+@app.context_processor
+def _template_options():
+    # Com pesos compartilhados, a saliência (que carrega o modelo Keras) é opcional no formulário
+    return {'saliency_optional': SHARED_WEIGHTS}
+
+def _prediction(result, with_tta):
+    """Probabilidade e classe de um resultado; com TTA, a média das vistas e a incerteza."""
+    if with_tta:
+        tta = result['tta']
+        prediction = {'probability': tta['probability'], 'uncertainty': tta['uncertainty'],
+                      'tta_views': tta['views']}
+    else:
+        prediction = {'probability': result['probability']}
+    prediction['class'] = "maligno" if prediction['probability'] > 0.5 else "benigno"
+    return prediction
+
 @app.route('/predict', methods=['POST'])
 def predict():
     if 'file' not in request.files:
@@ -48,44 +373,112 @@ def predict():
         return jsonify({'error': 'Nenhum arquivo selecionado'}), 400
     if file:
         try:
-            file_path = 'temp_img.jpg'
-            file.save(file_path)
-            original_image, processed_image = preprocess_and_load_image(file_path)
-            os.remove(file_path)
+            with_tta = _tta_requested()
+            with_saliency = not SHARED_WEIGHTS or _form_flag('saliency')
+            _, result = run_with_model(run_prediction, file.read(), with_saliency=with_saliency, with_tta=with_tta)
 
-            if processed_image is None:
+            if result is None:
                 return render_template('index.html', error='Erro ao pré-processar a imagem')
 
-            prediction = model.predict(np.expand_dims(processed_image, axis=0))
-            probability = prediction[0][0]
-            class_label = "maligno" if probability > 0.5 else "benigno"
+            with span(STAGE_SECONDS, 'render'):
+                return render_template('index.html',
+                    prediction=_prediction(result, with_tta),
+                    saliency_image=base64.b64encode(result['saliency_jpeg']).decode('utf-8') if with_saliency else None,
+                    preprocess_steps_image=base64.b64encode(result['steps_jpeg']).decode('utf-8'))
+
+        except PoolSaturated:
+            raise
+        except Exception as e:
+            return render_template('index.html', error=f'Erro ao processar a requisição: {e}')
 
-            # Gerar o mapa de saliência
-            saliency = saliency_map(model, processed_image)
+    return render_template('index.html', error='Erro desconhecido')
 
-            # Visualizar o mapa de saliência sobre a imagem original
-            saliency_overlayed = visualize_saliency(original_image, saliency)
-            
-            step1 = Resize((128, 128)).fit_transform([original_image])
-            step2 = GaussianBlur((3, 3)).fit_transform(step1)
-            step3 = CLAHE_Color().fit_transform(step2)
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    files = [f for f in request.files.getlist('files') if f.filename != '']
+    if not files:
+        return jsonify({'error': 'Nenhum arquivo enviado'}), 400
 
-            base64_preprocess_steps_image = show_images([original_image, step1[0], step2[0], step3[0]],
-            titles=["Original", "Resize", "GaussianBlur", "CLAHE"])
+    results = run_with_model(run_batch_prediction, [(f.filename, f.read()) for f in files])
+    return jsonify({'model_version': g.model_version, 'results': results})
 
-            # Codificar a imagem com o mapa de saliência para base64
-            _, img_encoded = cv2.imencode('.jpg', saliency_overlayed)
-            base64_image = base64.b64encode(img_encoded).decode('utf-8')
+# Artefatos de um resultado que podem ser buscados pela API: campo no result_cache e tipo
+API_ARTIFACTS = {
+    'saliency': ('saliency_jpeg', 'image/jpeg'),
+    'steps': ('steps_jpeg', 'image/jpeg'),
+}
 
-            return render_template('index.html',
-                prediction={'probability': float(probability), 'class': class_label},
-                saliency_image=base64_image,
-                preprocess_steps_image=base64_preprocess_steps_image)
-        
-        except Exception as e:
-            return render_template('index.html', error=f'Erro ao processar a requisição: {e}')
+@app.route('/api/v1/predict', methods=['POST'])
+def api_predict():
+    """
+    Predição em JSON para clientes de integração. Por padrão retorna só a probabilidade e
+    a classe; `?saliency=1` e `?steps=1` geram o mapa de saliência e o painel de etapas,
+    devolvidos como URLs em /api/v1/results/<id>/<artefato>. Com `?tta=1`, a
+    probabilidade é a média das vistas e a resposta traz a incerteza.
+    """
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        return jsonify({'error': 'Nenhum arquivo enviado'}), 400
+    artifacts = [name for name in API_ARTIFACTS if _query_flag(name)]
+    with_tta = _tta_requested()
+    try:
+        key, result = run_with_model(run_prediction, file.read(), with_saliency='saliency' in artifacts,
+                                     with_steps='steps' in artifacts, with_tta=with_tta)
+    except PoolSaturated:
+        raise
+    except Exception as e:
+        return jsonify({'error': f'Erro ao processar a requisição: {e}'}), 500
+    if result is None:
+        return jsonify({'error': 'Erro ao pré-processar a imagem'}), 422
 
-    return render_template('index.html', error='Erro desconhecido')
+    response = {
+        'id': key,
+        'model_version': g.model_version,
+        **_prediction(result, with_tta),
+    }
+    if with_tta:
+        response['view_probabilities'] = result['tta']['view_probabilities']
+    for name in artifacts:
+        response[f'{name}_url'] = url_for('api_result_artifact', key=key, name=name)
+    return jsonify(response)
+
+@app.route('/api/v1/results/<key>/<name>')
+def api_result_artifact(key, name):
+    """Artefato de um resultado, disponível enquanto ele estiver no result_cache."""
+    if name not in API_ARTIFACTS:
+        return jsonify({'error': f'Artefato desconhecido: {name}'}), 404
+    field, mimetype = API_ARTIFACTS[name]
+    result = result_cache.get(key)
+    if result is None or field not in result:
+        return jsonify({'error': 'Resultado não encontrado ou expirado'}), 404
+    # A chave inclui o conteúdo da imagem e a versão do modelo: o artefato não muda
+    max_age = int(result_cache.ttl) if result_cache.ttl is not None else 3600
+    return Response(result[field], mimetype=mimetype, headers={'Cache-Control': f'private, max-age={max_age}'})
+
+@app.errorhandler(413)
+def upload_too_large(e):
+    limit_mb = app.config['MAX_CONTENT_LENGTH'] / (1024 * 1024)
+    message = f'Arquivo excede o limite de {limit_mb:.0f} MB'
+    if request.path == '/predict':
+        return render_template('index.html', error=message), 413
+    return jsonify({'error': message}), 413
+
+@app.errorhandler(PoolSaturated)
+def pool_saturated(e):
+    headers = {'Retry-After': str(e.retry_after)}
+    message = 'Servidor ocupado, tente novamente em instantes'
+    if request.path == '/predict':
+        return render_template('index.html', error=message), 503, headers
+    return jsonify({'error': message, 'retry_after': e.retry_after}), 503, headers
+
+@app.route('/predict/stats')
+def predict_stats():
+    return jsonify({'model_version': model_registry.active.version,
+                    'model_registry': model_registry.stats(),
+                    'startup': startup_report,
+                    'batcher': model_registry.active.batcher.stats(),
+                    'worker_pool': worker_pool.stats(),
+                    'result_cache': result_cache.stats()})
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0')
\ No newline at end of file
@@ -0,0 +1,32 @@
+"""
+Modo de produção: a aplicação Flask servida por um front end ASGI (uvicorn).
+
+O loop assíncrono recebe os uploads sem bloquear; cada requisição roda em uma thread
+do adaptador WSGI e o trabalho pesado vai para o `worker_pool` do app, que responde
+503 + Retry-After quando a fila enche. Cada processo do uvicorn carrega o modelo uma
+única vez e o compartilha entre as suas threads.
+
+Uso:
+    cd skin-cancer-detection/app
+    uvicorn asgi:application --host 0.0.0.0 --port 8000 --workers 2
+ou
+    SERVER_WORKERS=2 python asgi.py
+"""
+import os
+
+from a2wsgi import WSGIMiddleware
+
+from app import app, worker_pool
+
+# Threads do adaptador: suficientes para todas as requisições aceitas pelo worker_pool
+# (executando + na fila) e as rotas leves; acima disso a rejeição é feita pelo pool
+application = WSGIMiddleware(app, workers=worker_pool.n_workers + worker_pool.max_queue + 4)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run('asgi:application',
+                host=os.environ.get('HOST', '0.0.0.0'),
+                port=int(os.environ.get('PORT', 8000)),
+                workers=int(os.environ.get('SERVER_WORKERS', 1)))
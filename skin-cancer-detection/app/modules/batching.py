@@ -0,0 +1,163 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Agrupa requisições de inferência concorrentes em lotes (micro-batching dinâmico).
+
+    Cada requisição enfileira um tensor pré-processado e recebe um Future. Uma thread
+    de fundo junta os tensores pendentes e chama o modelo uma única vez quando o lote
+    enche ou quando o prazo de espera do primeiro item expira, devolvendo a linha de
+    probabilidades correspondente para cada requisição.
+
+    Quem chama `predict` fica bloqueado até a resposta, então um lote nunca tem mais
+    itens do que threads enviando. Com `concurrency`, o lote também é enviado assim que
+    todas essas threads estão bloqueadas esperando por ele: ninguém mais pode entrar no
+    lote, e esperar o prazo só atrasaria a resposta (ex.: uma requisição sozinha).
+
+    Args:
+        predict_fn (callable): Função que recebe um lote (N, H, W, C) e retorna as
+            predições (N, ...). Ex.: `model.predict_on_batch`.
+        max_batch_size (int, optional): Tamanho máximo do lote. Defaults to 32.
+        max_wait_ms (float, optional): Tempo máximo (ms) que o primeiro item do lote
+            espera por companheiros antes do envio ao modelo. Defaults to 5.0.
+        stats_window (int, optional): Quantidade de lotes recentes usados nas
+            estatísticas de espera. Defaults to 1024.
+        concurrency (int ou callable, optional): Número de threads que podem enviar itens
+            agora (ex.: `WorkerPool.running`). Defaults to None (só tamanho e prazo).
+    """
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=5.0, stats_window=1024, concurrency=None):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.concurrency = concurrency
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._batch_sizes = deque(maxlen=stats_window)
+        self._queue_waits = deque(maxlen=stats_window)
+        self._total_batches = 0
+        self._total_items = 0
+        # Threads bloqueadas em predict/predict_many cujo item ainda não foi respondido
+        self._waiting = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, image):
+        """Enfileira um tensor (H, W, C) e retorna um Future com sua linha de predição."""
+        return self._enqueue(image, blocking=False)
+
+    def _enqueue(self, image, blocking):
+        if self._thread is None:
+            self.start()
+        future = Future()
+        if blocking:
+            # Contado antes de entrar na fila, para o coletor já ver a thread esperando
+            with self._lock:
+                self._waiting += 1
+        self._queue.put((np.asarray(image), future, time.perf_counter(), blocking))
+        return future
+
+    def predict(self, image, timeout=None):
+        return self._enqueue(image, blocking=True).result(timeout)
+
+    def predict_many(self, images, timeout=None):
+        images = list(images)
+        # Só o último item marca a thread como bloqueada: antes dele ela ainda vai enviar
+        futures = [self._enqueue(img, blocking=i == len(images) - 1) for i, img in enumerate(images)]
+        return np.stack([f.result(timeout) for f in futures])
+
+    def stats(self):
+        """Retorna estatísticas de tamanho de lote e tempo de espera em fila (ms)."""
+        with self._lock:
+            sizes = np.array(self._batch_sizes, dtype=np.float64)
+            waits = np.array(self._queue_waits, dtype=np.float64)
+            total_batches = self._total_batches
+            total_items = self._total_items
+
+        stats = {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_ms,
+            'total_batches': total_batches,
+            'total_items': total_items,
+            'pending': self._queue.qsize(),
+            'waiting': self._waiting,
+        }
+        if sizes.size:
+            stats['batch_size'] = {
+                'mean': float(sizes.mean()),
+                'max': int(sizes.max()),
+            }
+        if waits.size:
+            stats['queue_wait_ms'] = {
+                'mean': float(waits.mean()),
+                'p50': float(np.percentile(waits, 50)),
+                'p99': float(np.percentile(waits, 99)),
+                'max': float(waits.max()),
+            }
+        return stats
+
+    def _all_waiting(self):
+        """Não há itens na fila e todas as threads que podem enviar já esperam pelo lote."""
+        if self.concurrency is None or not self._queue.empty():
+            return False
+        concurrency = self.concurrency() if callable(self.concurrency) else self.concurrency
+        with self._lock:
+            return self._waiting >= concurrency
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = first[2] + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size and not self._all_waiting():
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Repassa o sinal de parada para depois do lote atual
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            images, futures, enqueued, blocking = zip(*batch)
+            started = time.perf_counter()
+            try:
+                predictions = np.asarray(self.predict_fn(np.stack(images)))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+            else:
+                for future, row in zip(futures, predictions):
+                    future.set_result(row)
+
+            with self._lock:
+                self._waiting -= sum(blocking)
+                self._total_batches += 1
+                self._total_items += len(batch)
+                self._batch_sizes.append(len(batch))
+                self._queue_waits.extend((started - t) * 1000.0 for t in enqueued)
@@ -0,0 +1,288 @@
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+# Parâmetros que não alteram o resultado de uma etapa e ficam fora da assinatura
+_IGNORED_PARAMS = {'n_jobs', 'backend'}
+
+
+def _batch_dependent(step):
+    """Etapas cujo resultado depende do lote inteiro (não podem ser cacheadas por imagem)."""
+    # Importado aqui: o app usa `array_key` (via result_cache) e não deve carregar o sklearn
+    from .preprocess import Normalize
+
+    return isinstance(step, Normalize)
+
+
+def _stable_repr(value):
+    if callable(value) and hasattr(value, '__qualname__'):
+        return f"{getattr(value, '__module__', '')}.{value.__qualname__}"
+    if isinstance(value, np.ndarray):
+        return hashlib.blake2b(np.ascontiguousarray(value).tobytes(), digest_size=16).hexdigest()
+    if isinstance(value, (list, tuple)):
+        return '(' + ','.join(_stable_repr(v) for v in value) + ')'
+    if isinstance(value, dict):
+        return '{' + ','.join(f'{k}:{_stable_repr(value[k])}' for k in sorted(value)) + '}'
+    return repr(value)
+
+
+def step_signature(steps):
+    """
+    Gera uma assinatura estável para uma sequência de etapas (classe + parâmetros).
+
+    Args:
+        steps (list): Etapas (estimadores) ou pares (nome, estimador) de um Pipeline.
+    Returns:
+        str: Hash hexadecimal que muda quando qualquer parâmetro relevante muda.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for step in steps:
+        if isinstance(step, tuple):
+            step = step[1]
+        params = {k: v for k, v in step.get_params(deep=False).items() if k not in _IGNORED_PARAMS}
+        h.update(f'{type(step).__module__}.{type(step).__qualname__}'.encode())
+        h.update(_stable_repr(params).encode())
+    return h.hexdigest()
+
+
+def array_key(img):
+    """Hash do conteúdo de uma imagem já decodificada (pixels, formato e dtype)."""
+    img = np.ascontiguousarray(img)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f'{img.shape}{img.dtype}'.encode())
+    h.update(img.data)
+    return h.hexdigest()
+
+
+def file_key(path):
+    """Hash do conteúdo de um arquivo, dispensando a decodificação do JPEG."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_rgb(path):
+    img = cv2.imread(path)
+    if img is None:
+        raise ValueError(f"Erro ao carregar a imagem: {path}")
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+
+class PreprocessCache:
+    """
+    Cache em disco, endereçado por conteúdo, de imagens pré-processadas.
+
+    Cada entrada é um arquivo .npy identificado por (hash da imagem, assinatura das
+    etapas aplicadas) e lido com memory-map. Os resultados de cada prefixo do
+    pipeline são guardados por imagem, de modo que alterar os parâmetros de uma
+    etapa só recalcula essa etapa e as seguintes, e imagens novas não invalidam as
+    antigas. O lote final também é gravado como um único shard, devolvido sem cópia
+    quando o mesmo pipeline roda de novo sobre o mesmo conjunto de imagens.
+
+    Args:
+        cache_dir (str): Diretório das entradas.
+        max_bytes (int, optional): Tamanho máximo em disco; as entradas menos usadas
+            recentemente são removidas quando o limite é excedido. Defaults to 10 GiB.
+        store_intermediate (bool, optional): Guarda também os prefixos intermediários
+            do pipeline, não apenas o resultado final. Defaults to True.
+    """
+    def __init__(self, cache_dir, max_bytes=10 * 1024 ** 3, store_intermediate=True):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.store_intermediate = store_intermediate
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._counters = {'shard_hits': 0, 'hits': 0, 'partial_hits': 0, 'misses': 0, 'evictions': 0}
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    # ----- armazenamento -----
+    def _load_index(self):
+        found = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.npy'):
+                    st = os.stat(os.path.join(root, name))
+                    found.append((st.st_mtime, name[:-4], st.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._remove(self._evict())
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.npy')
+
+    def get(self, key):
+        """Retorna a entrada como memmap somente leitura, ou None se ausente."""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        path = self._path(key)
+        try:
+            os.utime(path)
+            return np.load(path, mmap_mode='r')
+        except (FileNotFoundError, ValueError):
+            with self._lock:
+                self._total_bytes -= self._entries.pop(key, 0)
+            return None
+
+    def put(self, key, array):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(tmp_path, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            self._total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            evicted = self._evict()
+        self._remove(evicted)
+
+    def _evict(self):
+        evicted = []
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            old_key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self._counters['evictions'] += 1
+            evicted.append(old_key)
+        return evicted
+
+    def _remove(self, keys):
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            keys = list(self._entries)
+            self._entries.clear()
+            self._total_bytes = 0
+        self._remove(keys)
+
+    def report(self):
+        """
+        Retorna contadores de acertos/faltas, ocupação e remoções do cache. Os contadores
+        são por imagem; `hit_rate` inclui as imagens servidas por um shard.
+        """
+        with self._lock:
+            report = dict(self._counters)
+            report['entries'] = len(self._entries)
+            report['bytes'] = self._total_bytes
+            report['max_bytes'] = self.max_bytes
+        hits = report['shard_hits'] + report['hits']
+        lookups = hits + report['partial_hits'] + report['misses']
+        report['hit_rate'] = hits / lookups if lookups else 0.0
+        return report
+
+    # ----- pipeline -----
+    def transform(self, pipeline, X):
+        """
+        Equivalente a `pipeline.transform(X)`, reaproveitando o que já está em cache.
+
+        Args:
+            pipeline (sklearn.pipeline.Pipeline): Pipeline de transformadores.
+            X (sequence): Imagens de entrada.
+        Returns:
+            numpy.ndarray ou list: Imagens pré-processadas (memmap quando vem inteiro do
+                cache), ou uma lista se as etapas cacheadas produzirem imagens de
+                tamanhos diferentes (ex.: um prefixo que termina em LesionCrop).
+        """
+        keys = [array_key(img) for img in X]
+        return self._transform(pipeline, keys, lambda i: X[i])
+
+    def fit_transform(self, pipeline, X):
+        """
+        Equivalente a `pipeline.fit_transform(X)`. As etapas cacheadas não têm estado
+        (`fit` não faz nada) e vêm do cache como em `transform`; as etapas seguintes
+        (a partir da primeira que depende do lote, ex.: `Normalize('meanstd')`) são
+        ajustadas sobre X com `fit_transform`, como o pipeline faria.
+        """
+        keys = [array_key(img) for img in X]
+        return self._transform(pipeline, keys, lambda i: X[i], fit=True)
+
+    def transform_files(self, pipeline, paths, loader=load_rgb):
+        """
+        Como `transform`, mas a partir de caminhos de arquivo. A chave vem dos bytes do
+        arquivo, então imagens em cache não são decodificadas de novo (as chaves não
+        coincidem com as de `transform`, que usa os pixels decodificados).
+        """
+        keys = [file_key(path) for path in paths]
+        return self._transform(pipeline, keys, lambda i: loader(paths[i]))
+
+    def fit_transform_files(self, pipeline, paths, loader=load_rgb):
+        """Como `fit_transform`, mas a partir de caminhos de arquivo (ver `transform_files`)."""
+        keys = [file_key(path) for path in paths]
+        return self._transform(pipeline, keys, lambda i: loader(paths[i]), fit=True)
+
+    def _transform(self, pipeline, keys, load, fit=False):
+        steps = [step for _, step in pipeline.steps]
+        n_cacheable = 0
+        while n_cacheable < len(steps) and not _batch_dependent(steps[n_cacheable]):
+            n_cacheable += 1
+
+        if n_cacheable == 0:
+            return self._finish(steps, [load(i) for i in range(len(keys))], fit)
+
+        signatures = [step_signature(steps[:k]) for k in range(n_cacheable + 1)]
+        shard_key = hashlib.blake2b(('|'.join(keys) + signatures[-1]).encode(), digest_size=16).hexdigest()
+        shard = self.get('shard-' + shard_key)
+        if shard is not None:
+            with self._lock:
+                self._counters['shard_hits'] += len(keys)
+            return self._finish(steps[n_cacheable:], shard, fit)
+
+        # Para cada imagem, procura o maior prefixo do pipeline já calculado
+        groups = {}
+        results = [None] * len(keys)
+        for i, key in enumerate(keys):
+            depth = 0
+            for k in range(n_cacheable, 0, -1):
+                cached = self.get(f'{key}-{signatures[k]}')
+                if cached is not None:
+                    results[i], depth = cached, k
+                    break
+            groups.setdefault(depth, []).append(i)
+
+        with self._lock:
+            self._counters['hits'] += len(groups.get(n_cacheable, []))
+            self._counters['misses'] += len(groups.get(0, []))
+            self._counters['partial_hits'] += sum(len(idx) for d, idx in groups.items() if 0 < d < n_cacheable)
+
+        for depth, indices in groups.items():
+            if depth == n_cacheable:
+                continue
+            batch = [results[i] if depth else load(i) for i in indices]
+            for k in range(depth, n_cacheable):
+                batch = steps[k].transform(batch)
+                if self.store_intermediate or k == n_cacheable - 1:
+                    for i, out in zip(indices, batch):
+                        self.put(f'{keys[i]}-{signatures[k + 1]}', out)
+            for i, out in zip(indices, batch):
+                results[i] = out
+
+        # Imagens de tamanhos diferentes ficam em lista, como no pipeline sem cache, e só
+        # têm as entradas por imagem (um shard .npy exige um array retangular)
+        if len({(np.shape(out), np.asarray(out).dtype) for out in results}) > 1:
+            return self._finish(steps[n_cacheable:], results, fit)
+        output = np.stack(results)
+        self.put('shard-' + shard_key, output)
+        return self._finish(steps[n_cacheable:], output, fit)
+
+    @staticmethod
+    def _finish(steps, X, fit=False):
+        for step in steps:
+            X = step.fit_transform(X) if fit else step.transform(X)
+        return X
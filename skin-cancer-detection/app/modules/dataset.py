@@ -0,0 +1,206 @@
+import os
+import queue
+import threading
+
+import cv2
+import numpy as np
+import pandas as pd
+
+from .parallel import parallel_transform
+
+
+def load_image(path, target_size=None):
+    """
+    Carrega uma imagem em RGB, opcionalmente redimensionada.
+
+    Args:
+        path (str): Caminho do arquivo.
+        target_size (tuple, optional): Tamanho (largura, altura). Defaults to None.
+    Returns:
+        numpy.ndarray ou None: A imagem, ou None se não puder ser lida.
+    """
+    img = cv2.imread(path)
+    if img is None:
+        print(f"Erro ao carregar a imagem: {path}")
+        return None
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    if target_size is not None:
+        img = cv2.resize(img, target_size)
+    return img
+
+
+def balanced_sample(df, label_column='malignant', random_state=42):
+    """
+    Subamostra a classe majoritária para o tamanho da minoritária, como nos notebooks
+    (`df_class_0.sample(n=len(df_class_1))`).
+    """
+    df_class_1 = df[df[label_column] == 1]
+    df_class_0 = df[df[label_column] == 0]
+    df_class_0_sample = df_class_0.sample(n=len(df_class_1), random_state=random_state)
+    return pd.concat([df_class_1, df_class_0_sample]).reset_index(drop=True)
+
+
+class StreamingDataset:
+    """
+    Carrega o dataset ISIC em lotes, sob demanda, sem materializar todas as imagens.
+
+    Apenas a tabela de rótulos fica em memória; as imagens são lidas, pré-processadas
+    e entregues lote a lote por uma thread de fundo que mantém no máximo `prefetch`
+    lotes prontos, de modo que o consumo de memória não cresce com o tamanho do dataset.
+
+    Args:
+        df (pandas.DataFrame): Tabela com as colunas de id e rótulo.
+        image_folder (str): Diretório das imagens.
+        pipeline (sklearn.pipeline.Pipeline, optional): Transformadores aplicados a cada
+            lote (`pipeline.transform`). Defaults to None.
+        batch_size (int, optional): Imagens por lote. Defaults to 32.
+        target_size (tuple, optional): Redimensionamento feito na leitura, como o
+            `load_image` dos notebooks. Defaults to (128, 128).
+        shuffle (bool, optional): Embaralha a ordem a cada época. Defaults to True.
+        one_hot (bool, optional): Retorna rótulos em one-hot (como `to_categorical`).
+            Defaults to True.
+        num_classes (int, optional): Número de classes do one-hot. Defaults to 2.
+        prefetch (int, optional): Lotes preparados com antecedência. Defaults to 2.
+        n_jobs (int, optional): Threads usadas para decodificar cada lote. Defaults to None.
+        random_state (int, optional): Semente do embaralhamento. Defaults to 42.
+        id_column (str, optional): Coluna com o nome do arquivo. Defaults to 'isic_id'.
+        label_column (str, optional): Coluna com o rótulo. Defaults to 'malignant'.
+        image_ext (str, optional): Extensão dos arquivos. Defaults to '.jpg'.
+    """
+    def __init__(self, df, image_folder, pipeline=None, batch_size=32, target_size=(128, 128),
+                 shuffle=True, one_hot=True, num_classes=2, prefetch=2, n_jobs=None,
+                 random_state=42, id_column='isic_id', label_column='malignant', image_ext='.jpg'):
+        self.df = df.reset_index(drop=True)
+        self.image_folder = image_folder
+        self.pipeline = pipeline
+        self.batch_size = batch_size
+        self.target_size = target_size
+        self.shuffle = shuffle
+        self.one_hot = one_hot
+        self.num_classes = num_classes
+        self.prefetch = prefetch
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.id_column = id_column
+        self.label_column = label_column
+        self.image_ext = image_ext
+        self._epoch = 0
+
+    @classmethod
+    def from_csv(cls, csv_path, image_folder, balance=True, **kwargs):
+        """
+        Lê o CSV de ground truth (apenas as colunas de id e rótulo) e, se `balance`,
+        aplica a mesma amostragem balanceada dos notebooks.
+        """
+        id_column = kwargs.get('id_column', 'isic_id')
+        label_column = kwargs.get('label_column', 'malignant')
+        df = pd.read_csv(csv_path, usecols=[id_column, label_column])
+        df = df[df[label_column].isin([0, 1])]
+        if balance:
+            df = balanced_sample(df, label_column, kwargs.get('random_state', 42))
+        return cls(df, image_folder, **kwargs)
+
+    def split(self, test_size=0.2, stratify=True):
+        """
+        Divide a tabela (não as imagens) em treino e teste, como o `train_test_split`
+        dos notebooks, retornando dois StreamingDataset com a mesma configuração.
+        """
+        from sklearn.model_selection import train_test_split
+
+        labels = self.df[self.label_column]
+        df_train, df_test = train_test_split(self.df, test_size=test_size, random_state=self.random_state,
+                                             stratify=labels if stratify else None)
+        return self._with_df(df_train), self._with_df(df_test, shuffle=False)
+
+    def _with_df(self, df, **overrides):
+        params = {name: getattr(self, name) for name in (
+            'pipeline', 'batch_size', 'target_size', 'shuffle', 'one_hot', 'num_classes', 'prefetch',
+            'n_jobs', 'random_state', 'id_column', 'label_column', 'image_ext')}
+        params.update(overrides)
+        return type(self)(df, self.image_folder, **params)
+
+    def __len__(self):
+        return int(np.ceil(len(self.df) / self.batch_size))
+
+    @property
+    def labels(self):
+        return self.df[self.label_column].to_numpy()
+
+    def _load(self, filenames):
+        return [load_image(os.path.join(self.image_folder, name + self.image_ext), self.target_size)
+                for name in filenames]
+
+    def _make_batch(self, rows):
+        images = parallel_transform(self._load, list(rows[self.id_column]), self.n_jobs)
+        keep = [i for i, img in enumerate(images) if img is not None]
+        if not keep:
+            return None
+        X = [images[i] for i in keep]
+        X = self.pipeline.transform(X) if self.pipeline is not None else np.array(X)
+        y = rows[self.label_column].to_numpy()[keep].astype(np.int64)
+        if self.one_hot:
+            y = np.eye(self.num_classes, dtype=np.float32)[y]
+        return X, y
+
+    def _batches(self):
+        order = np.arange(len(self.df))
+        if self.shuffle:
+            np.random.default_rng(self.random_state + self._epoch).shuffle(order)
+        self._epoch += 1
+        for start in range(0, len(order), self.batch_size):
+            yield self.df.iloc[order[start:start + self.batch_size]]
+
+    def __iter__(self):
+        """Itera sobre (X, y) por lote; a leitura do próximo lote ocorre em paralelo."""
+        buffer = queue.Queue(maxsize=max(1, self.prefetch))
+        stop = threading.Event()
+        done = object()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    buffer.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for rows in self._batches():
+                    batch = self._make_batch(rows)
+                    if batch is not None and not put(batch):
+                        return
+            except Exception as e:
+                put(e)
+            put(done)
+
+        producer = threading.Thread(target=produce, name='dataset-prefetch', daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = buffer.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            producer.join()
+
+    def as_tf_dataset(self):
+        """
+        Retorna um `tf.data.Dataset` de lotes (X, y) para usar diretamente em `model.fit`.
+        O formato é obtido do primeiro lote.
+        """
+        import tensorflow as tf
+
+        epoch = self._epoch
+        batches = iter(self)
+        X, y = next(batches)
+        batches.close()
+        self._epoch = epoch
+        signature = (tf.TensorSpec(shape=(None,) + X.shape[1:], dtype=tf.as_dtype(X.dtype)),
+                     tf.TensorSpec(shape=(None,) + y.shape[1:], dtype=tf.as_dtype(y.dtype)))
+        return tf.data.Dataset.from_generator(lambda: iter(self), output_signature=signature)
@@ -0,0 +1,81 @@
+import struct
+
+import cv2
+import numpy as np
+
+_REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+# Marcadores SOF (início de quadro) que carregam as dimensões da imagem
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def jpeg_size(data):
+    """
+    Lê (largura, altura) do cabeçalho de um JPEG sem decodificá-lo.
+
+    Args:
+        data (bytes): Conteúdo do arquivo.
+    Returns:
+        tuple ou None: (largura, altura), ou None se não for um JPEG válido.
+    """
+    if data[:2] != b'\xff\xd8':
+        return None
+    offset = 2
+    while offset + 4 <= len(data):
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker == 0xFF:
+            offset += 1
+            continue
+        if marker == 0xD8 or 0xD0 <= marker <= 0xD7:
+            offset += 2
+            continue
+        length = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+        if marker in _SOF_MARKERS:
+            if offset + 9 > len(data):
+                return None
+            height, width = struct.unpack('>HH', data[offset + 5:offset + 9])
+            return width, height
+        offset += 2 + length
+    return None
+
+
+def reduced_decode_flag(data, target_size):
+    """
+    Escolhe a maior redução de decodificação (1/2, 1/4 ou 1/8) que ainda mantém a
+    imagem maior ou igual a `target_size` em ambos os eixos.
+    """
+    size = jpeg_size(data)
+    if size is None:
+        return cv2.IMREAD_COLOR
+    width, height = size
+    for factor, flag in _REDUCED_FLAGS:
+        if width // factor >= target_size[0] and height // factor >= target_size[1]:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def decode_image(data, target_size=None):
+    """
+    Decodifica uma imagem em memória (bytes de um upload) para RGB.
+
+    Args:
+        data (bytes): Conteúdo do arquivo.
+        target_size (tuple, optional): Se informado, JPEGs grandes são decodificados
+            em resolução reduzida pelo próprio libjpeg, desde que continuem maiores que
+            esse tamanho (largura, altura). Defaults to None (resolução completa).
+    Returns:
+        numpy.ndarray ou None: Imagem RGB uint8, ou None se não puder ser decodificada.
+    """
+    if not data:
+        return None
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    flag = cv2.IMREAD_COLOR if target_size is None else reduced_decode_flag(data, target_size)
+    img = cv2.imdecode(buffer, flag)
+    if img is None:
+        return None
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
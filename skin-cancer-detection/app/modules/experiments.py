@@ -0,0 +1,323 @@
+"""
+Comparação de pipelines de pré-processamento, como no notebook
+preprocess_pipeline_skin_lesion.ipynb, sem recalcular prefixos repetidos.
+
+Os pipelines são organizados em uma árvore de prefixos: etapas iguais (mesma classe e
+parâmetros) no início de vários pipelines são calculadas uma única vez, e cada
+pipeline completo é gravado em disco assim que fica pronto. O treino e a avaliação de
+cada CNN rodam em processos separados, dentro de um orçamento de núcleos, enquanto os
+próximos pipelines ainda estão sendo pré-processados. O resultado é uma tabela com
+acurácia, precisão, recall, F1, AUC e os tempos de pré-processamento e de treino.
+
+Uso (a partir de skin-cancer-detection/app):
+    python -m modules.experiments --csv ISIC_GroundTruth.csv --images /dados/isic --output resultados.csv
+    python -m modules.experiments --csv ISIC_GroundTruth.csv --images /dados/isic --n-jobs 8 --threads-per-trial 2
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer
+
+from .cache import step_signature
+from .dataset import balanced_sample, load_image
+from .parallel import effective_n_jobs, parallel_transform
+from .preprocess import Resize, GaussianBlur, CLAHE_Color
+
+
+def notebook_pipelines():
+    """Os oito pipelines comparados no notebook (a normalização fica a cargo do modelo)."""
+    return {
+        'Pipeline 1: Normalize': Pipeline([('noop', FunctionTransformer())]),
+        'Pipeline 2: GaussianBlur -> Normalize': Pipeline([
+            ('blur', GaussianBlur())
+        ]),
+        'Pipeline 3: GaussianBlur -> CLAHE (Color) -> Normalize': Pipeline([
+            ('blur', GaussianBlur()),
+            ('clahe', CLAHE_Color())
+        ]),
+        'Pipeline 4: CLAHE (Color) -> Normalize': Pipeline([
+            ('clahe', CLAHE_Color())
+        ]),
+        'Pipeline 5: Resize -> Normalize': Pipeline([
+            ('resize', Resize((64, 64))),
+        ]),
+        'Pipeline 6: Resize -> GaussianBlur -> Normalize': Pipeline([
+            ('resize', Resize((64, 64))),
+            ('blur', GaussianBlur())
+        ]),
+        'Pipeline 7: Resize -> GaussianBlur -> CLAHE (Color) -> Normalize': Pipeline([
+            ('resize', Resize((64, 64))),
+            ('blur', GaussianBlur()),
+            ('clahe', CLAHE_Color())
+        ]),
+        'Pipeline 8: Resize -> CLAHE (Color) -> Normalize': Pipeline([
+            ('resize', Resize((64, 64))),
+            ('clahe', CLAHE_Color())
+        ]),
+    }
+
+
+def _is_identity(step):
+    if step is None or step == 'passthrough':
+        return True
+    return isinstance(step, FunctionTransformer) and step.func is None
+
+
+class PrefixTree:
+    """
+    Árvore de prefixos de um conjunto de pipelines.
+
+    Cada nó é uma etapa identificada pela assinatura (classe + parâmetros, como no
+    PreprocessCache) e pelo caminho desde a raiz; pipelines que começam pelas mesmas
+    etapas compartilham os nós. Etapas identidade (None, 'passthrough',
+    FunctionTransformer sem função) são ignoradas.
+
+    Args:
+        pipelines (dict): {nome: Pipeline ou lista de pares (nome, estimador)}.
+    """
+    def __init__(self, pipelines):
+        self.root = {'name': None, 'step': None, 'children': {}, 'pipelines': []}
+        self.n_steps = 0
+        self.n_nodes = 0
+        for name, pipeline in pipelines.items():
+            steps = pipeline.steps if isinstance(pipeline, Pipeline) else pipeline
+            node = self.root
+            for step_name, step in steps:
+                if _is_identity(step):
+                    continue
+                self.n_steps += 1
+                key = step_signature([step])
+                child = node['children'].get(key)
+                if child is None:
+                    child = node['children'][key] = {'name': step_name, 'step': clone(step), 'children': {},
+                                                     'pipelines': []}
+                    self.n_nodes += 1
+                node = child
+            node['pipelines'].append(name)
+
+    def run(self, X_train, X_test):
+        """
+        Percorre a árvore em profundidade, ajustando cada etapa no treino e aplicando-a
+        no teste uma única vez. Só os resultados do caminho atual ficam em memória.
+
+        Yields:
+            tuple: (nome do pipeline, X_train processado, X_test processado, segundos de
+                pré-processamento somados ao longo do caminho).
+        """
+        stack = [(self.root, X_train, X_test, 0.0)]
+        while stack:
+            node, Xtr, Xte, elapsed = stack.pop()
+            if node['step'] is not None:
+                start = time.perf_counter()
+                Xtr = node['step'].fit_transform(Xtr)
+                Xte = node['step'].transform(Xte)
+                elapsed += time.perf_counter() - start
+            for name in node['pipelines']:
+                yield name, Xtr, Xte, elapsed
+            for child in reversed(list(node['children'].values())):
+                stack.append((child, Xtr, Xte, elapsed))
+
+
+def create_cnn_model(input_shape, num_classes=2):
+    """Mesma CNN do notebook (aumento de dados, Rescaling e duas camadas convolucionais)."""
+    from tensorflow import keras
+    from tensorflow.keras import layers
+
+    data_augmentation = keras.Sequential([
+        layers.RandomFlip("horizontal_and_vertical"),
+        layers.RandomRotation(0.1),
+        layers.RandomZoom(0.1),
+        layers.RandomBrightness(0.1),
+    ])
+
+    model = keras.Sequential([
+        keras.Input(shape=input_shape),
+        data_augmentation,
+        layers.Rescaling(1./255),
+        layers.Conv2D(32, (3, 3), activation='relu'),
+        layers.MaxPooling2D((2, 2)),
+        layers.Conv2D(64, (3, 3), activation='relu'),
+        layers.MaxPooling2D((2, 2)),
+        layers.Flatten(),
+        layers.Dense(128, activation='relu'),
+        layers.Dropout(0.5),
+        layers.Dense(num_classes, activation='sigmoid')
+    ])
+
+    model.compile(optimizer='adam',
+                  loss='binary_crossentropy',
+                  metrics=['accuracy', 'Precision', 'Recall'])
+    return model
+
+
+def _init_trial_worker(threads):
+    """Limita o TensorFlow de cada processo de treino à sua parte do orçamento de núcleos."""
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def run_trial(train_path, test_path, y_train, y_test, epochs=20, batch_size=32, seed=42):
+    """
+    Treina e avalia a CNN em um pipeline já pré-processado (arquivos .npy).
+
+    Returns:
+        dict: accuracy, precision, recall, f1, auc (classe maligna, coluna MALIGNANT_COLUMN)
+            e train_s.
+    """
+    from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
+    from tensorflow import keras
+
+    from .serving import MALIGNANT_COLUMN
+
+    X_train, X_test = np.load(train_path), np.load(test_path)
+    if X_train.ndim == 3:  # pipelines que terminam em escala de cinza
+        X_train, X_test = X_train[..., None], X_test[..., None]
+    Y_train, Y_test = np.eye(2, dtype=np.float32)[y_train], np.eye(2, dtype=np.float32)[y_test]
+
+    # O mesmo processo treina vários pipelines em sequência
+    keras.backend.clear_session()
+    keras.utils.set_random_seed(seed)
+    start = time.perf_counter()
+    model = create_cnn_model(X_train.shape[1:])
+    model.fit(X_train, Y_train, validation_data=(X_test, Y_test), epochs=epochs, batch_size=batch_size,
+              verbose=0)
+    y_prob = model.predict(X_test, batch_size=batch_size, verbose=0)[:, MALIGNANT_COLUMN]
+    train_s = time.perf_counter() - start
+
+    y_pred = (y_prob > 0.5).astype(int)
+    return {
+        'accuracy': accuracy_score(y_test, y_pred),
+        'precision': precision_score(y_test, y_pred, zero_division=0),
+        'recall': recall_score(y_test, y_pred, zero_division=0),
+        'f1': f1_score(y_test, y_pred, zero_division=0),
+        'auc': roc_auc_score(y_test, y_prob) if len(np.unique(y_test)) > 1 else float('nan'),
+        'train_s': train_s,
+    }
+
+
+def run_experiments(pipelines, X_train, y_train, X_test, y_test, work_dir, epochs=20, batch_size=32,
+                    n_jobs=-1, threads_per_trial=None, seed=42):
+    """
+    Pré-processa todos os pipelines pela árvore de prefixos e treina uma CNN por
+    pipeline em processos paralelos.
+
+    Args:
+        pipelines (dict): {nome: Pipeline}.
+        X_train, X_test (numpy.ndarray): Imagens RGB uint8.
+        y_train, y_test (numpy.ndarray): Rótulos 0/1.
+        work_dir (str): Diretório dos .npy pré-processados entregues aos processos de treino.
+        epochs (int, optional): Defaults to 20.
+        batch_size (int, optional): Defaults to 32.
+        n_jobs (int, optional): Orçamento de núcleos para os treinos. Defaults to -1 (todos).
+        threads_per_trial (int, optional): Threads do TensorFlow por treino. Defaults to None
+            (o orçamento dividido entre os pipelines, no mínimo 1).
+        seed (int, optional): Semente do Keras em cada treino. Defaults to 42.
+    Returns:
+        tuple: (pandas.DataFrame com uma linha por pipeline, dict com o resumo da execução).
+    """
+    start = time.perf_counter()
+    cores = effective_n_jobs(n_jobs)
+    if threads_per_trial is None:
+        threads_per_trial = max(1, cores // max(1, len(pipelines)))
+    n_workers = max(1, min(len(pipelines), cores // threads_per_trial))
+    tree = PrefixTree(pipelines)
+    y_train, y_test = np.asarray(y_train, dtype=int), np.asarray(y_test, dtype=int)
+    os.makedirs(work_dir, exist_ok=True)
+
+    rows, futures = {}, {}
+    # 'spawn' porque o TensorFlow não é seguro após fork
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_trial_worker, initargs=(threads_per_trial,)) as executor:
+        for i, (name, Xtr, Xte, preprocess_s) in enumerate(tree.run(X_train, X_test)):
+            train_path, test_path = (os.path.join(work_dir, f'{i}-{split}.npy') for split in ('train', 'test'))
+            np.save(train_path, np.asarray(Xtr))
+            np.save(test_path, np.asarray(Xte))
+            rows[name] = {'pipeline': name, 'preprocess_s': preprocess_s}
+            futures[name] = executor.submit(run_trial, train_path, test_path, y_train, y_test, epochs,
+                                            batch_size, seed)
+        preprocess_wall_s = time.perf_counter() - start
+
+        for name, future in futures.items():
+            try:
+                rows[name].update(future.result())
+            except Exception as e:
+                rows[name]['error'] = f'{type(e).__name__}: {e}'
+
+    columns = ['pipeline', 'accuracy', 'precision', 'recall', 'f1', 'auc', 'preprocess_s', 'train_s', 'error']
+    results = pd.DataFrame([rows[name] for name in pipelines], columns=columns)
+    summary = {
+        'n_steps': tree.n_steps,
+        'n_computed_steps': tree.n_nodes,
+        'preprocess_wall_s': preprocess_wall_s,
+        'wall_s': time.perf_counter() - start,
+        # Execução em série de cada pipeline do zero, como no notebook
+        'serial_estimate_s': float(results['preprocess_s'].sum() + results['train_s'].fillna(0).sum()),
+        'n_workers': n_workers,
+        'threads_per_trial': threads_per_trial,
+    }
+    return results, summary
+
+
+def load_split(csv_path, image_folder, target_size=(128, 128), test_size=0.2, random_state=42, n_jobs=-1):
+    """Amostra balanceada, carregamento e divisão treino/teste estratificada do notebook."""
+    from sklearn.model_selection import train_test_split
+
+    df = balanced_sample(pd.read_csv(csv_path), random_state=random_state)
+    paths = [os.path.join(image_folder, f'{isic_id}.jpg') for isic_id in df['isic_id']]
+    images = parallel_transform(lambda chunk: [load_image(path, target_size) for path in chunk], paths, n_jobs)
+    found = [i for i, img in enumerate(images) if img is not None]
+    X = np.stack([images[i] for i in found])
+    y = df['malignant'].to_numpy()[found]
+    return train_test_split(X, y, test_size=test_size, random_state=random_state, stratify=y)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--csv', required=True, help="CSV de ground truth do ISIC.")
+    parser.add_argument('--images', required=True, help="Diretório das imagens.")
+    parser.add_argument('--output', default='resultados_pipelines.csv', help="Tabela de resultados (.csv).")
+    parser.add_argument('--epochs', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--test-size', type=float, default=0.2)
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Orçamento de núcleos para os treinos.")
+    parser.add_argument('--threads-per-trial', type=int, help="Threads do TensorFlow por treino.")
+    parser.add_argument('--work-dir', help="Diretório dos pipelines pré-processados. Defaults to temporário.")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    X_train, X_test, y_train, y_test = load_split(args.csv, args.images, test_size=args.test_size,
+                                                  random_state=args.seed)
+    print(f"{len(X_train)} imagens de treino, {len(X_test)} de teste")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results, summary = run_experiments(notebook_pipelines(), X_train, y_train, X_test, y_test,
+                                           args.work_dir or tmp_dir, epochs=args.epochs,
+                                           batch_size=args.batch_size, n_jobs=args.n_jobs,
+                                           threads_per_trial=args.threads_per_trial, seed=args.seed)
+
+    results.to_csv(args.output, index=False)
+    print("\n--- Resultados da Validação ---")
+    print(results.drop(columns='error' if results['error'].isna().all() else []).to_string(
+        index=False, float_format='{:.4f}'.format))
+    print(f"\n{summary['n_computed_steps']} de {summary['n_steps']} etapas calculadas (prefixos compartilhados); "
+          f"{summary['n_workers']} treinos em paralelo com {summary['threads_per_trial']} thread(s) cada")
+    print(f"Tempo total: {summary['wall_s']:.1f} s (pré-processamento {summary['preprocess_wall_s']:.1f} s); "
+          f"execução em série estimada: {summary['serial_estimate_s']:.1f} s")
+    best = results.loc[results['recall'].idxmax(), 'pipeline'] if results['recall'].notna().any() else None
+    if best is not None:
+        print(f"\n--- O melhor pipeline é o: ({best}) ---")
+    print(f"Resultados salvos em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
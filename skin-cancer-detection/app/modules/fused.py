@@ -0,0 +1,307 @@
+"""
+Pré-processamento do caminho de serviço sem o scikit-learn.
+
+`FusedPreprocess`, `LesionCrop` e os buffers e objetos CLAHE por thread que eles usam
+dependem só de OpenCV e NumPy: o `modules.preprocess` importa o sklearn, que traz o
+SciPy e o pandas para cada processo do app sem que o serviço os use. Lá estão as
+versões das duas classes compatíveis com o sklearn (`clone`, `get_params`), para uso
+em Pipelines.
+"""
+import threading
+
+import cv2
+import numpy as np
+
+from .parallel import parallel_transform, effective_n_jobs, get_executor, chunk_bounds, as_sequence
+
+_thread_local = threading.local()
+
+def _get_clahe(clip_limit, tile_grid_size):
+    """
+    Retorna um objeto cv2.CLAHE reutilizável para os parâmetros informados.
+
+    O objeto mantém buffers internos e não é seguro entre threads, por isso é
+    armazenado por thread em vez de ser criado a cada imagem.
+    """
+    cache = _thread_local.__dict__.setdefault('clahe', {})
+    key = (float(clip_limit), tuple(tile_grid_size))
+    if key not in cache:
+        cache[key] = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
+    return cache[key]
+
+def _get_buffer(name, shape, dtype=np.uint8):
+    """Retorna um buffer de rascunho por thread, realocado apenas se o formato mudar."""
+    buffers = _thread_local.__dict__.setdefault('buffers', {})
+    buf = buffers.get(name)
+    if buf is None or buf.shape != shape or buf.dtype != dtype:
+        buf = np.empty(shape, dtype)
+        buffers[name] = buf
+    return buf
+
+
+class LesionCrop:
+    """
+    Recorta a região da lesão antes do Resize, para que ela ocupe a imagem final em vez
+    de algumas dezenas de pixels.
+
+    A segmentação (Otsu + abertura + maior componente conexa) roda em uma cópia reduzida
+    com lado maior `proxy_size`, então o custo praticamente não depende da resolução de
+    entrada. A caixa encontrada é mapeada de volta e o recorte é feito na imagem
+    original, sem cópia. Componentes que tocam a borda (ex.: cantos escuros da
+    dermatoscopia) só são usados se não houver outro candidato; sem nenhum candidato,
+    a imagem é devolvida inteira.
+
+    Args:
+        proxy_size (int, optional): Lado maior da cópia usada na segmentação. Defaults to 128.
+        margin (float, optional): Margem em cada lado da caixa, relativa ao seu tamanho.
+            Defaults to 0.25.
+        min_area (float, optional): Área mínima da lesão, relativa à cópia reduzida.
+            Defaults to 0.005.
+        square (bool, optional): Expande a caixa para um quadrado, já que o Resize do
+            pipeline é quadrado. Defaults to True.
+        n_jobs (int, optional): Número de threads usadas no transform. Defaults to None (serial).
+    """
+    _KERNEL = np.ones((3, 3), np.uint8)
+
+    def __init__(self, proxy_size=128, margin=0.25, min_area=0.005, square=True, n_jobs=None):
+        self.proxy_size = proxy_size
+        self.margin = margin
+        self.min_area = min_area
+        self.square = square
+        self.n_jobs = n_jobs
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X):
+        return parallel_transform(self._transform_chunk, X, self.n_jobs)
+
+    def _transform_chunk(self, X):
+        return [self.crop_image(img) for img in X]
+
+    def crop_image(self, img):
+        """Retorna o recorte (uma view) da imagem na caixa da lesão."""
+        x0, y0, x1, y1 = self.bounding_box(img)
+        return img[y0:y1, x0:x1]
+
+    def bounding_box(self, img):
+        """
+        Caixa da lesão na imagem original.
+
+        Returns:
+            tuple: (x0, y0, x1, y1), com x1/y1 exclusivos; a imagem inteira se nenhuma
+                região for encontrada.
+        """
+        h, w = img.shape[:2]
+        scale = min(1.0, self.proxy_size / max(h, w))
+        proxy = img
+        if scale < 1.0:
+            size = (max(1, round(w * scale)), max(1, round(h * scale)))
+            if scale < 0.25:
+                # Amostragem direta até 4x o tamanho final: o INTER_AREA sobre a imagem
+                # inteira custaria proporcionalmente à resolução de entrada
+                proxy = cv2.resize(img, (size[0] * 4, size[1] * 4), interpolation=cv2.INTER_NEAREST)
+            proxy = cv2.resize(proxy, size, interpolation=cv2.INTER_AREA)
+        ph, pw = proxy.shape[:2]
+        gray = cv2.cvtColor(proxy, cv2.COLOR_RGB2GRAY) if proxy.ndim == 3 else proxy
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+        # A lesão é mais escura que a pele ao redor
+        _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, self._KERNEL, iterations=2)
+        n_labels, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        if n_labels <= 1:
+            return 0, 0, w, h
+
+        left, top, box_w, box_h, areas = stats[1:].T
+        large = areas >= self.min_area * pw * ph
+        inside = (left > 0) & (top > 0) & (left + box_w < pw) & (top + box_h < ph)
+        candidates = np.flatnonzero(large & inside)
+        if candidates.size == 0:
+            candidates = np.flatnonzero(large)
+        if candidates.size == 0:
+            return 0, 0, w, h
+        best = candidates[np.argmax(areas[candidates])]
+
+        half_w = box_w[best] * (0.5 + self.margin) / scale
+        half_h = box_h[best] * (0.5 + self.margin) / scale
+        if self.square:
+            half_w = half_h = max(half_w, half_h)
+        x0, x1 = self._fit_interval((left[best] + box_w[best] / 2) / scale, half_w, w)
+        y0, y1 = self._fit_interval((top[best] + box_h[best] / 2) / scale, half_h, h)
+        return x0, y0, x1, y1
+
+    @staticmethod
+    def _fit_interval(center, half, limit):
+        """Intervalo de tamanho 2*half centrado em `center`, deslocado para caber em [0, limit)."""
+        size = int(min(limit, max(1, round(2 * half))))
+        start = int(min(max(round(center - size / 2), 0), limit - size))
+        return start, start + size
+
+
+# Versão fundida do pipeline de serviço (Resize -> GaussianBlur -> Morfologia -> CLAHE_Color)
+class FusedPreprocess:
+    """
+    Executa Resize, GaussianBlur, operações morfológicas e CLAHE_Color (opcionalmente
+    precedidos por LesionCrop) em uma única passada por imagem, escrevendo em buffers
+    pré-alocados.
+
+    Produz saída idêntica (bit a bit) ao Pipeline equivalente montado com os
+    transformadores de `modules.preprocess`, mas sem criar listas e cópias intermediárias a
+    cada etapa e reutilizando um único objeto cv2.CLAHE.
+
+    Args:
+        size (tuple, optional): Tamanho final (largura, altura). Defaults to (128, 128).
+        ksize (tuple, optional): Kernel do filtro gaussiano. Defaults to (5, 5).
+        sigma (float, optional): Desvio padrão do filtro gaussiano. Defaults to 0.
+        morphology (tuple, optional): Sequência de operações morfológicas no formato
+            (operação, kernel_size, iterations). Defaults to abertura e fechamento 3x3.
+        clip_limit (float, optional): Limite de recorte para CLAHE. Defaults to 2.0.
+        tile_grid_size (tuple, optional): Tamanho da grade para CLAHE. Defaults to (8, 8).
+        n_jobs (int, optional): Número de threads; cada uma escreve em sua fatia de `out`
+            com seus próprios buffers de rascunho. Defaults to None (serial).
+        crop (LesionCrop, optional): Recorte da lesão aplicado antes do Resize.
+            Defaults to None (imagem inteira).
+        step_names (tuple, optional): Nome de cada etapa no trace, na ordem em que são
+            executadas. Defaults to None ('crop', 'resize', 'blur', 'morph_<operação>'
+            (ou 'morph_<índice>_<operação>' se a operação se repetir) e 'clahe').
+    """
+    _MORPH_OPS = {
+        'erosion': cv2.MORPH_ERODE,
+        'dilation': cv2.MORPH_DILATE,
+        'opening': cv2.MORPH_OPEN,
+        'closing': cv2.MORPH_CLOSE,
+    }
+
+    def __init__(self, size=(128, 128), ksize=(5, 5), sigma=0,
+                 morphology=(('opening', (3, 3), 1), ('closing', (3, 3), 1)),
+                 clip_limit=2.0, tile_grid_size=(8, 8), n_jobs=None, crop=None, step_names=None):
+        self.size = size
+        self.ksize = ksize
+        self.sigma = sigma
+        self.morphology = morphology
+        self.clip_limit = clip_limit
+        self.tile_grid_size = tile_grid_size
+        self.n_jobs = n_jobs
+        self.crop = crop
+        self.step_names = step_names
+
+    @classmethod
+    def from_pipeline(cls, pipeline, n_jobs=None):
+        """
+        Cria o transformador fundido a partir de um Pipeline composto por Resize,
+        GaussianBlur, MorphologicalOperations e CLAHE_Color, nessa ordem, opcionalmente
+        precedidos por LesionCrop. O trace usa os nomes das etapas do pipeline.
+        """
+        # Os transformadores do pipeline vêm do sklearn, importado só aqui
+        from .preprocess import Resize, GaussianBlur, MorphologicalOperations, CLAHE_Color
+
+        steps = [step for _, step in pipeline.steps]
+        crop = steps.pop(0) if steps and isinstance(steps[0], LesionCrop) else None
+        if (len(steps) < 3 or not isinstance(steps[0], Resize) or not isinstance(steps[1], GaussianBlur)
+                or not isinstance(steps[-1], CLAHE_Color)
+                or not all(isinstance(step, MorphologicalOperations) for step in steps[2:-1])):
+            raise ValueError("Pipeline não suportado: esperado [LesionCrop ->] Resize -> GaussianBlur -> "
+                             "MorphologicalOperations* -> CLAHE_Color.")
+        return cls(size=steps[0].size, ksize=steps[1].ksize, sigma=steps[1].sigma,
+                   morphology=tuple((m.operation, m.kernel_size, m.iterations) for m in steps[2:-1]),
+                   clip_limit=steps[-1].clip_limit, tile_grid_size=steps[-1].tile_grid_size,
+                   n_jobs=n_jobs, crop=crop, step_names=tuple(name for name, _ in pipeline.steps))
+
+    def _step_names(self):
+        if self.step_names is not None:
+            return list(self.step_names)
+        ops = [op for op, _, _ in self.morphology]
+        morph = [f'morph_{op}' if ops.count(op) == 1 else f'morph_{i}_{op}' for i, op in enumerate(ops)]
+        return (['crop'] if self.crop is not None else []) + ['resize', 'blur'] + morph + ['clahe']
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X, out=None, trace=None):
+        """
+        Args:
+            X (iterable): Imagens RGB (H, W, 3) uint8, de tamanhos arbitrários.
+            out (numpy.ndarray, optional): Buffer (N, altura, largura, 3) uint8 onde a
+                saída será escrita. Se omitido, um novo array é alocado.
+            trace (list, optional): Se informado, recebe pares (nome da etapa, saídas da
+                etapa), uma entrada por etapa, com os nomes de `step_names`. Nesse modo a
+                execução é serial.
+        Returns:
+            numpy.ndarray: O array `out` preenchido.
+        """
+        X = as_sequence(X)
+        n = len(X)
+        width, height = self.size
+        shape = (n, height, width, 3)
+        if out is None:
+            out = np.empty(shape, np.uint8)
+        elif out.shape[0] < n or out.shape[1:] != shape[1:] or out.dtype != np.uint8:
+            raise ValueError(f"Buffer de saída incompatível: esperado {shape} uint8.")
+
+        n_workers = effective_n_jobs(self.n_jobs)
+        if trace is not None:
+            names = self._step_names()
+            expected = len(self.morphology) + 3 + (self.crop is not None)
+            if len(names) != expected:
+                raise ValueError(f"step_names tem {len(names)} nomes; o pipeline tem {expected} etapas.")
+            # Uma lista de saídas por etapa, indexada pela posição (nomes podem se repetir)
+            taps = [[] for _ in names]
+            self._transform_range(X, out, 0, n, taps)
+            # Os recortes têm tamanhos diferentes e ficam como lista
+            first = 1 if self.crop is not None else 0
+            trace.extend((name, images if i < first else np.stack(images))
+                         for i, (name, images) in enumerate(zip(names, taps)))
+        elif n_workers == 1 or n < 2:
+            self._transform_range(X, out, 0, n)
+        else:
+            executor = get_executor(n_workers, 'thread')
+            futures = [executor.submit(self._transform_range, X, out, start, end)
+                       for start, end in chunk_bounds(n, n_workers)]
+            for future in futures:
+                future.result()
+        return out[:n]
+
+    def _transform_range(self, X, out, start, end, taps=None):
+        width, height = self.size
+        shape = (height, width, 3)
+        morphology = [(self._MORPH_OPS[op], np.ones(kernel_size, np.uint8), iterations)
+                      for op, kernel_size, iterations in self.morphology]
+        clahe = _get_clahe(self.clip_limit, self.tile_grid_size)
+        resized = _get_buffer('resized', shape)
+        blurred = _get_buffer('blurred', shape)
+        gray = _get_buffer('gray', shape[:2])
+        gray_tmp = _get_buffer('gray_tmp', shape[:2])
+        lab = _get_buffer('lab', shape)
+        lightness = _get_buffer('lightness', shape[:2])
+        equalized = _get_buffer('equalized', shape[:2])
+
+        for i in range(start, end):
+            img = X[i]
+            if img.ndim != 3 or img.shape[2] != 3 or img.dtype != np.uint8:
+                raise ValueError("FusedPreprocess espera imagens RGB uint8 com 3 canais.")
+            tap = 0
+            if self.crop is not None:
+                img = self.crop.crop_image(img)
+                if taps is not None:
+                    taps[0].append(img.copy())
+                tap = 1
+            cv2.resize(img, self.size, dst=resized)
+            cv2.GaussianBlur(resized, self.ksize, self.sigma, dst=blurred)
+            if taps is not None:
+                taps[tap].append(resized.copy())
+                taps[tap + 1].append(blurred.copy())
+            if morphology:
+                cv2.cvtColor(blurred, cv2.COLOR_RGB2GRAY, dst=gray)
+                for j, (op, kernel, iterations) in enumerate(morphology):
+                    cv2.morphologyEx(gray, op, kernel, dst=gray_tmp, iterations=iterations)
+                    gray, gray_tmp = gray_tmp, gray
+                    if taps is not None:
+                        taps[tap + 2 + j].append(cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB))
+                cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB, dst=blurred)
+            cv2.cvtColor(blurred, cv2.COLOR_BGR2LAB, dst=lab)
+            cv2.extractChannel(lab, 0, dst=lightness)
+            clahe.apply(lightness, dst=equalized)
+            cv2.insertChannel(equalized, lab, 0)
+            cv2.cvtColor(lab, cv2.COLOR_LAB2BGR, dst=out[i])
+            if taps is not None:
+                taps[-1].append(out[i].copy())
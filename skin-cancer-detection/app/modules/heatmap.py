@@ -1,15 +1,20 @@
-import tensorflow as tf
+import time
+
 import cv2
 import numpy as np
 
-def saliency_map(model, image):
+from .serving import MALIGNANT_COLUMN
+
+def saliency_map(model, image, class_index=MALIGNANT_COLUMN):
+    import tensorflow as tf
+
     image = tf.convert_to_tensor(image[None, ...])  
     image = tf.cast(image, tf.float32)
     
     with tf.GradientTape() as tape:
         tape.watch(image)
         predictions = model(image)
-        loss = predictions[0][0]  # valor da saída (classe)
+        loss = predictions[0][class_index]  # valor da saída (classe maligna, por padrão)
 
     grads = tape.gradient(loss, image)[0]  # gradiente em relação à imagem
     saliency = tf.reduce_max(tf.abs(grads), axis=-1)  # maior influência entre canais (1 canal no caso)
@@ -25,4 +30,117 @@ def visualize_saliency(img, saliency, alpha=0.5, cmap='jet'):
     saliency_colored = cv2.applyColorMap(np.uint8(255 * saliency_normalized), cv2.COLORMAP_JET)
     saliency_colored = saliency_colored.astype(np.float32) / 255.0
     cam = cv2.addWeighted(img.astype(np.float32) / 255.0, 1 - alpha, saliency_colored, alpha, 0)
-    return (cam * 255).astype(np.uint8)
\ No newline at end of file
+    return (cam * 255).astype(np.uint8)
+
+class SaliencyEngine:
+    """
+    Calcula mapas de saliência para um lote de imagens em uma única chamada de grafo
+    (`tf.function`), com três modos:
+
+        'vanilla': gradiente da saída em relação à imagem (como `saliency_map`).
+        'smoothgrad': média dos gradientes de `n_samples` cópias com ruído gaussiano.
+        'integrated_gradients': gradientes integrados ao longo de `n_samples` pontos
+            entre uma imagem de referência (preta) e a imagem.
+
+    Nos modos com amostras, as N x n_samples variações são avaliadas como um único
+    lote no forward/backward pass, em vez de um laço em Python.
+
+    Args:
+        model (keras.Model): Modelo treinado.
+        mode (str, optional): Modo de saliência. Defaults to 'vanilla'.
+        n_samples (int, optional): Amostras por imagem (smoothgrad/integrated_gradients).
+            Defaults to 16.
+        noise_level (float, optional): Desvio do ruído do SmoothGrad, relativo à
+            amplitude de cada imagem. Defaults to 0.15.
+        class_index (int, optional): Saída do modelo usada como alvo. Defaults to
+            MALIGNANT_COLUMN.
+    """
+    MODES = ('vanilla', 'smoothgrad', 'integrated_gradients')
+
+    def __init__(self, model, mode='vanilla', n_samples=16, noise_level=0.15, class_index=MALIGNANT_COLUMN):
+        if mode not in self.MODES:
+            raise ValueError(f"Modo de saliência '{mode}' não suportado.")
+        self.model = model
+        self.mode = mode
+        self.n_samples = n_samples
+        self.noise_level = noise_level
+        self.class_index = class_index
+        self._functions = {}
+
+    def _gradients(self, x):
+        import tensorflow as tf
+
+        with tf.GradientTape() as tape:
+            tape.watch(x)
+            predictions = self.model(x, training=False)
+            loss = predictions[:, self.class_index]
+        return tape.gradient(loss, x)
+
+    def _vanilla(self, x):
+        return self._gradients(x)
+
+    def _smoothgrad(self, x):
+        import tensorflow as tf
+
+        n, s = tf.shape(x)[0], self.n_samples
+        span = tf.reduce_max(x, axis=[1, 2, 3], keepdims=True) - tf.reduce_min(x, axis=[1, 2, 3], keepdims=True)
+        samples = tf.repeat(x, s, axis=0)
+        samples += tf.random.normal(tf.shape(samples)) * tf.repeat(span, s, axis=0) * self.noise_level
+        grads = self._gradients(samples)
+        return tf.reduce_mean(tf.reshape(grads, tf.concat([[n, s], tf.shape(x)[1:]], 0)), axis=1)
+
+    def _integrated_gradients(self, x):
+        import tensorflow as tf
+
+        n, s = tf.shape(x)[0], self.n_samples
+        alphas = tf.reshape(tf.linspace(1.0 / s, 1.0, s), [1, s, 1, 1, 1])
+        samples = tf.reshape(alphas * x[:, None], tf.concat([[n * s], tf.shape(x)[1:]], 0))
+        grads = self._gradients(samples)
+        avg_grads = tf.reduce_mean(tf.reshape(grads, tf.concat([[n, s], tf.shape(x)[1:]], 0)), axis=1)
+        return avg_grads * x
+
+    def _function(self, mode):
+        import tensorflow as tf
+
+        if mode not in self._functions:
+            def saliency(x):
+                attributions = getattr(self, '_' + mode)(x)
+                saliency = tf.reduce_max(tf.abs(attributions), axis=-1)
+                low = tf.reduce_min(saliency, axis=[1, 2], keepdims=True)
+                high = tf.reduce_max(saliency, axis=[1, 2], keepdims=True)
+                return (saliency - low) / (high - low + 1e-10)
+            self._functions[mode] = tf.function(saliency, reduce_retracing=True)
+        return self._functions[mode]
+
+    def __call__(self, images, mode=None):
+        """
+        Args:
+            images (numpy.ndarray): Lote (N, H, W, C) ou imagem única (H, W, C).
+            mode (str, optional): Sobrescreve o modo configurado. Defaults to None.
+        Returns:
+            numpy.ndarray: Mapas normalizados em [0, 1], (N, H, W) ou (H, W).
+        """
+        images = np.asarray(images, dtype=np.float32)
+        single = images.ndim == 3
+        x = images[None] if single else images
+        saliency = self._function(mode or self.mode)(x).numpy()
+        return saliency[0] if single else saliency
+
+    def benchmark(self, images, modes=MODES, repeat=5):
+        """
+        Mede o custo por imagem de cada modo (após o aquecimento do grafo).
+
+        Returns:
+            dict: Tempo médio por imagem, em ms, para cada modo.
+        """
+        images = np.asarray(images)
+        if images.ndim == 3:
+            images = images[None]
+        report = {}
+        for mode in modes:
+            self(images, mode)
+            start = time.perf_counter()
+            for _ in range(repeat):
+                self(images, mode)
+            report[mode] = (time.perf_counter() - start) * 1000.0 / (repeat * len(images))
+        return report
@@ -0,0 +1,157 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Limites (segundos) dos histogramas: do decode de uma imagem pequena (~1 ms) ao
+# /predict completo sob carga
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Perfil da requisição atual: lista de (etapa, segundos), ou None quando desativado
+_profile = contextvars.ContextVar('profile', default=None)
+
+
+def _format_labels(labelnames, labelvalues, extra=()):
+    pairs = list(zip(labelnames, labelvalues)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class Histogram:
+    """
+    Histograma no formato do Prometheus (contagens cumulativas por limite, soma e total),
+    com uma série por combinação de rótulos.
+
+    Args:
+        name (str): Nome da métrica.
+        documentation (str): Texto do `# HELP`.
+        labelnames (tuple, optional): Nomes dos rótulos. Defaults to ().
+        buckets (tuple, optional): Limites superiores, em ordem crescente. Defaults to DEFAULT_BUCKETS.
+    """
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def collect(self):
+        with self._lock:
+            snapshot = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        lines = []
+        for labelvalues, (counts, total, count) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                labels = _format_labels(self.labelnames, labelvalues, [('le', _format_value(bound))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class CallbackMetric:
+    """
+    Métrica lida no momento da coleta (ex.: contadores já mantidos pelo WorkerPool ou
+    pelo ResultCache). `fn` retorna um número ou um dicionário {valores dos rótulos: número}.
+    """
+    def __init__(self, name, documentation, fn, type='gauge', labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.fn = fn
+        self.type = type
+        self.labelnames = tuple(labelnames)
+
+    def collect(self):
+        values = self.fn()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+                for labels, value in sorted(values.items())]
+
+
+class MetricsRegistry:
+    """Conjunto de métricas exportadas no formato texto do Prometheus (`/metrics`)."""
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self._metrics = []
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def callback(self, name, documentation, fn, type='gauge', labelnames=()):
+        metric = CallbackMetric(name, documentation, fn, type, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+def record(histogram, stage, seconds):
+    """Registra a duração de uma etapa no histograma e no perfil da requisição, se ativo."""
+    histogram.observe(seconds, stage)
+    profile = _profile.get()
+    if profile is not None:
+        profile.append((stage, seconds))
+
+
+@contextmanager
+def span(histogram, stage):
+    """Mede o bloco como uma etapa (`with span(STAGE_SECONDS, 'decode'): ...`)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(histogram, stage, time.perf_counter() - start)
+
+
+def start_profile():
+    """Ativa o perfil por etapa no contexto atual; retorna o token para `stop_profile`."""
+    return _profile.set([])
+
+
+def stop_profile(token):
+    """Desativa o perfil e retorna a lista de (etapa, segundos) coletada."""
+    profile = _profile.get()
+    _profile.reset(token)
+    return profile or []
+
+
+def server_timing(profile):
+    """Formata o perfil como cabeçalho `Server-Timing` (durações em ms, etapas repetidas somadas)."""
+    totals = {}
+    for stage, seconds in profile:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return ', '.join(f'{stage};dur={seconds * 1000.0:.2f}' for stage, seconds in totals.items())
@@ -0,0 +1,66 @@
+import base64
+
+import cv2
+import numpy as np
+
+_FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+def _to_bgr(img):
+    """Converte uma imagem RGB, em tons de cinza ou float [0, 1] para BGR uint8."""
+    img = np.asarray(img)
+    if img.ndim == 2:
+        # Como o imshow(cmap='viridis'): escala para o intervalo dos dados e aplica o mapa
+        gray = cv2.normalize(img.astype(np.float32), None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+        return cv2.applyColorMap(gray, cv2.COLORMAP_VIRIDIS)
+    if img.dtype != np.uint8:
+        img = (np.clip(img, 0.0, 1.0) * 255).astype(np.uint8) if np.issubdtype(img.dtype, np.floating) \
+            else np.clip(img, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+
+
+def montage_jpeg(img_list, titles=None, tile_size=(360, 360), caption_height=40, padding=10, quality=90):
+    """
+    Monta as imagens lado a lado, com legendas, em um único canvas uint8 e o codifica
+    em JPEG, como a sobreposição da saliência (em PNG, o painel de fotos passa de 500 KB,
+    embutido em base64 no HTML). Substitui `show_images` (matplotlib) no caminho da
+    requisição: não usa o estado global do pyplot e é seguro entre threads.
+
+    Args:
+        img_list (list): Lista de imagens (RGB, tons de cinza ou float em [0, 1]).
+        titles (list, optional): Legenda de cada imagem. Defaults to None.
+        tile_size (tuple, optional): Área (largura, altura) de cada imagem; a proporção
+            é mantida. Defaults to (360, 360).
+        caption_height (int, optional): Altura da faixa de legenda. Defaults to 40.
+        padding (int, optional): Espaçamento entre as imagens. Defaults to 10.
+        quality (int, optional): Qualidade do JPEG (0 a 100). Defaults to 90.
+    Returns:
+        bytes: O JPEG codificado.
+    """
+    tile_w, tile_h = tile_size
+    n = len(img_list)
+    canvas = np.full((caption_height + tile_h + padding, n * (tile_w + padding) + padding, 3), 255, np.uint8)
+
+    for i, img in enumerate(img_list):
+        x0 = padding + i * (tile_w + padding)
+        bgr = _to_bgr(img)
+        h, w = bgr.shape[:2]
+        scale = min(tile_w / w, tile_h / h)
+        new_w, new_h = max(1, round(w * scale)), max(1, round(h * scale))
+        top = caption_height + (tile_h - new_h) // 2
+        left = x0 + (tile_w - new_w) // 2
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+        canvas[top:top + new_h, left:left + new_w] = cv2.resize(bgr, (new_w, new_h), interpolation=interpolation)
+
+        if titles:
+            (text_w, text_h), _ = cv2.getTextSize(titles[i], _FONT, 0.7, 1)
+            origin = (x0 + (tile_w - text_w) // 2, (caption_height + text_h) // 2)
+            cv2.putText(canvas, titles[i], origin, _FONT, 0.7, (0, 0, 0), 1, cv2.LINE_AA)
+
+    _, encoded = cv2.imencode('.jpg', canvas, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return encoded.tobytes()
+
+
+def render_montage(img_list, titles=None, **kwargs):
+    """Como `montage_jpeg`, mas retorna o JPEG codificado em base64 (para embutir no HTML)."""
+    return base64.b64encode(montage_jpeg(img_list, titles, **kwargs)).decode('utf-8')
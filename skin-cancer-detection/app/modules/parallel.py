@@ -0,0 +1,97 @@
+import atexit
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import numpy as np
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def effective_n_jobs(n_jobs):
+    """
+    Converte o parâmetro `n_jobs` (convenção do scikit-learn) no número de workers.
+
+    None ou 1 significam execução serial; valores negativos contam a partir do número
+    de núcleos (-1 usa todos, -2 todos menos um, ...).
+    """
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    if n_jobs == 0:
+        raise ValueError("n_jobs == 0 não é válido.")
+    return n_jobs
+
+
+def get_executor(n_workers, backend='thread'):
+    """Retorna um pool compartilhado (criado sob demanda) para o backend e tamanho informados."""
+    if backend not in ('thread', 'process'):
+        raise ValueError(f"Backend '{backend}' não suportado.")
+    key = (backend, n_workers)
+    with _executors_lock:
+        executor = _executors.get(key)
+        if executor is None:
+            if backend == 'thread':
+                executor = ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix='preprocess')
+            else:
+                executor = ProcessPoolExecutor(max_workers=n_workers)
+            _executors[key] = executor
+    return executor
+
+
+@atexit.register
+def shutdown_executors():
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        _executors.clear()
+
+
+def chunk_bounds(n_items, n_workers, chunk_size=None):
+    """Divide `n_items` em intervalos [início, fim) contíguos, ~4 por worker por padrão."""
+    if chunk_size is None:
+        chunk_size = max(1, math.ceil(n_items / (n_workers * 4)))
+    return [(start, min(start + chunk_size, n_items)) for start in range(0, n_items, chunk_size)]
+
+
+def as_sequence(X):
+    """Retorna X se ele tiver tamanho e índice (lista, numpy.ndarray); senão, `list(X)` (ex.: geradores)."""
+    return X if hasattr(X, '__len__') and hasattr(X, '__getitem__') else list(X)
+
+
+def parallel_transform(transform_chunk, X, n_jobs=None, backend='thread', chunk_size=None):
+    """
+    Aplica `transform_chunk` a blocos de X em paralelo, preservando a ordem de entrada.
+
+    O backend 'thread' é o padrão porque as funções do OpenCV liberam o GIL; use
+    'process' para etapas dominadas por código Python/NumPy (ex.: Watershed).
+
+    Args:
+        transform_chunk (callable): Função que recebe um bloco de imagens e retorna
+            um numpy.ndarray ou uma lista com uma saída por imagem.
+        X (iterable): Imagens de entrada (lista, numpy.ndarray ou qualquer iterável,
+            como um gerador).
+        n_jobs (int, optional): Número de workers. Defaults to None (serial).
+        backend (str, optional): 'thread' ou 'process'. Defaults to 'thread'.
+        chunk_size (int, optional): Imagens por bloco. Defaults to None (automático).
+    Returns:
+        numpy.ndarray ou list: Mesmo tipo retornado por `transform_chunk`, com as
+            saídas na ordem de X.
+    """
+    n_workers = effective_n_jobs(n_jobs)
+    if n_workers == 1:
+        return transform_chunk(X)
+    X = as_sequence(X)
+    n_items = len(X)
+    if n_items <= 1:
+        return transform_chunk(X)
+
+    chunks = [X[start:end] for start, end in chunk_bounds(n_items, n_workers, chunk_size)]
+    results = list(get_executor(n_workers, backend).map(transform_chunk, chunks))
+
+    if all(isinstance(result, np.ndarray) for result in results):
+        return np.concatenate(results)
+    return [item for result in results for item in result]
@@ -1,16 +1,12 @@
 import cv2
-import pandas as pd
-import os
 import numpy as np
-import matplotlib.pyplot as plt
 import io
 import base64
-from io import BytesIO
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.pipeline import Pipeline
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
-from sklearn.preprocessing import FunctionTransformer
+
+from .parallel import parallel_transform, as_sequence
+from .fused import _get_buffer, _get_clahe, FusedPreprocess as _FusedPreprocess, LesionCrop as _LesionCrop
 
 # Visualização
 def show_images(img_list, titles=None):
@@ -23,6 +19,9 @@ def show_images(img_list, titles=None):
     Returns:
         bytes: Bytes da imagem combinada em formato PNG.
     """
+    # Importado sob demanda: o matplotlib só é usado nos notebooks, não no caminho de inferência
+    import matplotlib.pyplot as plt
+
     num_images = len(img_list)
     plt.figure(figsize=(15, 5))
     for i, img in enumerate(img_list):
@@ -50,22 +49,34 @@ class Resize(BaseEstimator, TransformerMixin):
     Args:
         size (tuple, optional): O tamanho para o qual as imagens serão redimensionadas.
             Defaults to (128, 128).
+        n_jobs (int, optional): Número de threads usadas no transform. Defaults to None (serial).
     """
-    def __init__(self, size=(128, 128)):
+    def __init__(self, size=(128, 128), n_jobs=None):
         self.size = size
+        self.n_jobs = n_jobs
         
     def fit(self, X, y=None):
         return self
 
     def transform(self, X):
+        return parallel_transform(self._transform_chunk, X, self.n_jobs)
+
+    def _transform_chunk(self, X):
         return np.array([cv2.resize(img, self.size) for img in X])
 
+# Tamanho aproximado (bytes de float64) de cada bloco usado por Normalize.fit
+_FIT_CHUNK_BYTES = 64 * 1024 ** 2
+
 # Etapa 1.2: Normalização
 class Normalize(BaseEstimator, TransformerMixin):
     def __init__(self, scaling='minmax'):
         """
         Normaliza as imagens.
 
+        As estatísticas podem ser calculadas de forma incremental (`partial_fit`), sem
+        carregar o conjunto inteiro: `fit` percorre arrays (inclusive memmap) em blocos
+        e aceita geradores de lotes.
+
         Args:
             scaling (str, optional): O tipo de escalonamento a ser aplicado.
                 'minmax': Escala os valores para o intervalo [0, 1].
@@ -75,26 +86,96 @@ class Normalize(BaseEstimator, TransformerMixin):
         self.scaling = scaling
         self.mean = None
         self.std = None
+        self.min_val = None
+        self.max_val = None
+        self.n_samples_seen = 0
+        self._m2 = None
 
-    def fit(self, X):
-        if self.scaling == 'meanstd':
-            # Calcula a média e o desvio padrão por canal para o conjunto de treinamento
-            X = np.array(X)
-            if X.ndim == 4: 
-                self.mean = np.mean(X, axis=(0, 1, 2), keepdims=True)
-                self.std = np.std(X, axis=(0, 1, 2), keepdims=True)
-            elif X.ndim == 3: 
-                self.mean = np.mean(X, axis=(0, 1), keepdims=True)
-                self.std = np.std(X, axis=(0, 1), keepdims=True)
-            else:
+    def _reset(self):
+        self.mean = self.std = self.min_val = self.max_val = self._m2 = None
+        self.n_samples_seen = 0
+
+    def fit(self, X, y=None):
+        """
+        Calcula as estatísticas do zero.
+
+        Args:
+            X: numpy.ndarray (ou memmap) ou lista de imagens, percorridos em blocos ao
+                longo do primeiro eixo; ou um iterável de lotes (ex.: gerador ou
+                StreamingDataset, cujos itens (X, y) são aceitos).
+        """
+        self._reset()
+        if isinstance(X, (np.ndarray, list, tuple)):
+            batches = self._chunks(X)
+        else:
+            batches = (batch[0] if isinstance(batch, tuple) else batch for batch in X)
+        for batch in batches:
+            self.partial_fit(batch)
+        return self
+
+    @staticmethod
+    def _chunks(X):
+        if len(X) == 0:
+            return
+        first = np.asarray(X[0])
+        rows = max(1, _FIT_CHUNK_BYTES // max(1, first.size * 8))
+        for start in range(0, len(X), rows):
+            yield np.asarray(X[start:start + rows])
+
+    def partial_fit(self, X, y=None):
+        """
+        Atualiza as estatísticas com um lote.
+
+        No 'meanstd', média e variância por canal (último eixo) são combinadas com as
+        anteriores pela fórmula de Chan et al., estável numericamente; no 'minmax', o
+        mínimo e o máximo globais são acumulados.
+        """
+        X = np.asarray(X)
+        if self.scaling == 'minmax':
+            # Mesmo arredondamento do transform, que converte para float32 antes do min/max
+            batch_min, batch_max = np.float32(X.min()), np.float32(X.max())
+            self.min_val = batch_min if self.min_val is None else min(self.min_val, batch_min)
+            self.max_val = batch_max if self.max_val is None else max(self.max_val, batch_max)
+        elif self.scaling == 'meanstd':
+            if X.ndim not in (3, 4):
                 raise ValueError("Formato de entrada não suportado para 'meanstd' scaling.")
+            values = X.reshape(-1, X.shape[-1]).astype(np.float64)
+            n_b = values.shape[0]
+            mean_b = values.mean(axis=0)
+            values -= mean_b
+            m2_b = np.einsum('ij,ij->j', values, values)
+            if self.n_samples_seen == 0:
+                mean, m2 = mean_b, m2_b
+            else:
+                n_a = self.n_samples_seen
+                delta = mean_b - self.mean.ravel()
+                mean = self.mean.ravel() + delta * (n_b / (n_a + n_b))
+                m2 = self._m2 + m2_b + delta ** 2 * (n_a * n_b / (n_a + n_b))
+            self.n_samples_seen += n_b
+            self._m2 = m2
+            # Mesmo formato (keepdims) do cálculo sobre o conjunto inteiro
+            shape = (1,) * (X.ndim - 1) + (X.shape[-1],)
+            self.mean = mean.reshape(shape)
+            self.std = np.sqrt(m2 / self.n_samples_seen).reshape(shape)
+        else:
+            raise ValueError(f"Tipo de escalonamento '{self.scaling}' não suportado.")
         return self
 
-    def transform(self, X):
+    def transform(self, X, out=None):
+        """
+        Args:
+            X: Imagens (array, memmap ou lista).
+            out (numpy.ndarray, optional): Buffer float32 com o formato de X. O resultado
+                é escrito nele, em float32, sem alocar outro array. Defaults to None.
+        Returns:
+            numpy.ndarray: Imagens normalizadas (`out`, se informado).
+        """
+        if out is not None:
+            return self._transform_into(X, out)
         X = np.array(X, dtype=np.float32)
         if self.scaling == 'minmax':
-            min_val = np.min(X)
-            max_val = np.max(X)
+            min_val = np.min(X) if self.min_val is None else self.min_val
+            max_val = np.max(X) if self.max_val is None else self.max_val
             # Evita divisão por zero se min_val == max_val
             return (X - min_val) / (max_val - min_val + 1e-8)
         elif self.scaling == 'meanstd':
@@ -103,9 +184,39 @@ class Normalize(BaseEstimator, TransformerMixin):
             return (X - self.mean) / (self.std + 1e-8)
         else:
             raise ValueError(f"Tipo de escalonamento '{self.scaling}' não suportado.")
-    
-    def fit_transform(self, X):
-        return self.fit(X).transform(X)
+
+    def _transform_into(self, X, out):
+        if not isinstance(out, np.ndarray) or out.dtype != np.float32:
+            raise ValueError("O buffer de saída deve ser um numpy.ndarray float32.")
+        if len(out) != len(X):
+            raise ValueError(f"O buffer de saída tem {len(out)} imagens; a entrada tem {len(X)}.")
+        if self.scaling == 'minmax':
+            min_val, max_val = self.min_val, self.max_val
+            if min_val is None:
+                for batch in self._chunks(X):
+                    batch_min, batch_max = np.float32(batch.min()), np.float32(batch.max())
+                    min_val = batch_min if min_val is None else min(min_val, batch_min)
+                    max_val = batch_max if max_val is None else max(max_val, batch_max)
+            offset, scale = min_val, max_val - min_val + 1e-8
+        elif self.scaling == 'meanstd':
+            if self.mean is None or self.std is None:
+                raise ValueError("O método 'fit' deve ser chamado antes de 'transform' com scaling='meanstd'.")
+            offset, scale = self.mean.astype(np.float32), (self.std + 1e-8).astype(np.float32)
+        else:
+            raise ValueError(f"Tipo de escalonamento '{self.scaling}' não suportado.")
+
+        # Os ufuncs convertem a entrada em blocos internos: nenhuma cópia float do lote inteiro
+        if isinstance(X, np.ndarray):
+            np.subtract(X, offset, out=out, casting='unsafe')
+        else:
+            item_offset = np.reshape(offset, np.shape(offset)[-1:])
+            for img, dst in zip(X, out):
+                np.subtract(img, item_offset, out=dst, casting='unsafe')
+        np.divide(out, scale, out=out)
+        return out
+
+    def fit_transform(self, X, y=None, out=None):
+        return self.fit(X).transform(X, out=out)
     
 # Etapa 2: Filtro Gaussiano (remoção de ruído)
 class GaussianBlur(BaseEstimator, TransformerMixin):
@@ -115,15 +226,20 @@ class GaussianBlur(BaseEstimator, TransformerMixin):
     Args:
         ksize (tuple, optional): Tamanho do kernel gaussiano. Defaults to (5, 5).
         sigma (float, optional): Desvio padrão da distribuição gaussiana. Defaults to 0.
+        n_jobs (int, optional): Número de threads usadas no transform. Defaults to None (serial).
     """
-    def __init__(self, ksize=(5, 5), sigma=0):
+    def __init__(self, ksize=(5, 5), sigma=0, n_jobs=None):
         self.ksize = ksize
         self.sigma = sigma
+        self.n_jobs = n_jobs
 
     def fit(self, X, y=None):
         return self
 
     def transform(self, X):
+        return parallel_transform(self._transform_chunk, X, self.n_jobs)
+
+    def _transform_chunk(self, X):
         return np.array([cv2.GaussianBlur(img, self.ksize, self.sigma) for img in X])
 
 # Etapa 3  (versão 1): CLAHE (Equalização de histograma adaptativa)
@@ -134,15 +250,26 @@ class CLAHE(BaseEstimator, TransformerMixin):
     Args:
         clip_limit (float, optional): Limite de recorte para CLAHE. Defaults to 2.0.
         tile_grid_size (tuple, optional): Tamanho da grade para CLAHE. Defaults to (8, 8).
+        n_jobs (int, optional): Número de threads usadas no transform. Defaults to None (serial).
     """
-    def __init__(self, clip_limit=2.0, tile_grid_size=(8, 8)):
-        self.clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
+    def __init__(self, clip_limit=2.0, tile_grid_size=(8, 8), n_jobs=None):
+        self.clip_limit = clip_limit
+        self.tile_grid_size = tile_grid_size
+        self.n_jobs = n_jobs
+
+    @property
+    def clahe(self):
+        return _get_clahe(self.clip_limit, self.tile_grid_size)
 
     def fit(self, X, y=None):
         return self
 
     def transform(self, X):
-        return np.array([self.clahe.apply(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)) for img in X])
+        return parallel_transform(self._transform_chunk, X, self.n_jobs)
+
+    def _transform_chunk(self, X):
+        clahe = self.clahe
+        return np.array([clahe.apply(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)) for img in X])
 
 # Etapa 3 (versão 2): CLAHE aplicado em cada canal de cor (BGR)
 class CLAHE_Color(BaseEstimator, TransformerMixin):
@@ -152,21 +279,25 @@ class CLAHE_Color(BaseEstimator, TransformerMixin):
     Args:
         clip_limit (float, optional): Limite de recorte para CLAHE. Defaults to 2.0.
         tile_grid_size (tuple, optional): Tamanho da grade para CLAHE. Defaults to (8, 8).
+        n_jobs (int, optional): Número de threads usadas no transform. Defaults to None (serial).
     """
-    def __init__(self, clip_limit=2.0, tile_grid_size=(8, 8)):
+    def __init__(self, clip_limit=2.0, tile_grid_size=(8, 8), n_jobs=None):
         self.clip_limit = clip_limit
         self.tile_grid_size = tile_grid_size
+        self.n_jobs = n_jobs
 
     def fit(self, X, y=None):
         return self
 
     def transform(self, X):
+        return parallel_transform(self._transform_chunk, X, self.n_jobs)
+
+    def _transform_chunk(self, X):
         processed_images = []
         for img in X:
             lab = cv2.cvtColor(img, cv2.COLOR_BGR2LAB)
             l, a, b = cv2.split(lab)
-            clahe = cv2.createCLAHE(clipLimit=self.clip_limit, tileGridSize=self.tile_grid_size)
-            cl = clahe.apply(l)
+            cl = _get_clahe(self.clip_limit, self.tile_grid_size).apply(l)
             merged_lab = cv2.merge((cl, a, b))
             processed_img = cv2.cvtColor(merged_lab, cv2.COLOR_LAB2BGR)
             processed_images.append(processed_img)
@@ -178,12 +309,18 @@ class OtsuThreshold(BaseEstimator, TransformerMixin):
     Aplica o método de Otsu para segmentação de imagens.
 
     Args:
-        threshold (int, optional): Valor do limiar. Defaults to 0.
+        n_jobs (int, optional): Número de threads usadas no transform. Defaults to None (serial).
     """
+    def __init__(self, n_jobs=None):
+        self.n_jobs = n_jobs
+
     def fit(self, X, y=None):
         return self
 
     def transform(self, X):
+        return parallel_transform(self._transform_chunk, X, self.n_jobs)
+
+    def _transform_chunk(self, X):
         binarized = []
         for img in X:
             if len(img.shape) == 3:  # Converte se for imagem colorida
@@ -194,15 +331,23 @@ class OtsuThreshold(BaseEstimator, TransformerMixin):
 
 
 class MorphologicalOperations(BaseEstimator, TransformerMixin):
-    def __init__(self, operation='opening', kernel_size=(5, 5), iterations=1):
+    def __init__(self, operation='opening', kernel_size=(5, 5), iterations=1, n_jobs=None):
         self.operation = operation
-        self.kernel = np.ones(kernel_size, np.uint8)
+        self.kernel_size = kernel_size
         self.iterations = iterations
+        self.n_jobs = n_jobs
+
+    @property
+    def kernel(self):
+        return np.ones(self.kernel_size, np.uint8)
 
     def fit(self, X, y=None):
         return self
 
     def transform(self, X):
+        return parallel_transform(self._transform_chunk, X, self.n_jobs)
+
+    def _transform_chunk(self, X):
         processed_images = []
         for img in X:
             if len(img.shape) == 2:  # Imagem em escala de cinza
@@ -239,15 +384,23 @@ class Watershed(BaseEstimator, TransformerMixin):
             Defaults to 'otsu'.
         structuring_element_size (int, optional): Tamanho do elemento estruturante para operações morfológicas.
             Defaults to 3.
+        n_jobs (int, optional): Número de workers usados no transform. Defaults to None (serial).
+        backend (str, optional): 'process' ou 'thread'. O padrão usa processos porque boa
+            parte das etapas roda em NumPy/Python com o GIL. Defaults to 'process'.
     """
-    def __init__(self, threshold_method='otsu', structuring_element_size=3):
+    def __init__(self, threshold_method='otsu', structuring_element_size=3, n_jobs=None, backend='process'):
         self.threshold_method = threshold_method
         self.structuring_element_size = structuring_element_size
+        self.n_jobs = n_jobs
+        self.backend = backend
 
     def fit(self, X, y=None):
         return self
 
     def transform(self, X):
+        return parallel_transform(self._transform_chunk, X, self.n_jobs, backend=self.backend)
+
+    def _transform_chunk(self, X):
         processed_images = []
         for img in X:
             # Converter para escala de cinza se a imagem for colorida
@@ -294,4 +447,187 @@ class Watershed(BaseEstimator, TransformerMixin):
 
             processed_images.append(segmented_img)
 
-        return np.array(processed_images)
\ No newline at end of file
+        return np.array(processed_images)
+
+def _as_stack(X):
+    """Retorna X como pilha contígua (N, H, W[, C]) se todas as imagens tiverem o mesmo formato, ou None."""
+    if isinstance(X, np.ndarray):
+        return np.ascontiguousarray(X)
+    if len(X) and all(img.shape == X[0].shape for img in X):
+        return np.stack(X)
+    return None
+
+def _gray_stack(X):
+    """Converte uma pilha BGR (N, H, W, 3) para cinza em uma única chamada do OpenCV."""
+    if X.ndim == 3:
+        return X
+    n, h, w, c = X.shape
+    return cv2.cvtColor(X.reshape(n * h, w, c), cv2.COLOR_BGR2GRAY).reshape(n, h, w)
+
+def _compact_labels(markers, dtype=None):
+    """
+    Codifica marcadores do cv2.watershed (-1 = borda, 0 = não rotulado, 1 = fundo,
+    2.. = regiões) como `marcadores + 1` no menor tipo sem sinal que os comporta.
+    """
+    if dtype is None:
+        top = int(markers.max()) + 1 if markers.size else 0
+        dtype = np.uint8 if top <= 0xFF else np.uint16 if top <= 0xFFFF else np.uint32
+    return np.add(markers, 1, out=np.empty(markers.shape, dtype), casting='unsafe')
+
+def labels_to_markers(labels):
+    """Inverte a codificação do BatchWatershed: devolve os marcadores int32 do cv2.watershed."""
+    markers = np.asarray(labels).astype(np.int32)
+    markers -= 1
+    return markers
+
+class BatchOtsuThreshold(BaseEstimator, TransformerMixin):
+    """
+    Versão em lote do OtsuThreshold: mesma binarização, mas converte o lote inteiro
+    para cinza de uma vez, escreve direto em uma pilha uint8 (N, H, W) pré-alocada e
+    divide o lote entre threads.
+
+    Imagens de formatos diferentes são processadas uma a uma e retornadas em lista.
+
+    Args:
+        n_jobs (int, optional): Número de threads usadas no transform. Defaults to None (serial).
+    """
+    def __init__(self, n_jobs=None):
+        self.n_jobs = n_jobs
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X):
+        X = as_sequence(X)
+        stack = _as_stack(X)
+        return parallel_transform(self._transform_chunk, X if stack is None else stack, self.n_jobs)
+
+    def thresholds(self, X):
+        """Limiar de Otsu de cada imagem (numpy.ndarray float64 de tamanho N)."""
+        X = as_sequence(X)
+        stack = _as_stack(X)
+        gray = [_gray_stack(img[None])[0] for img in X] if stack is None else _gray_stack(stack)
+        return np.array([cv2.threshold(img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[0] for img in gray])
+
+    def _transform_chunk(self, X):
+        if not isinstance(X, np.ndarray):
+            return [self._transform_chunk(img[None])[0] for img in X]
+        gray = _gray_stack(X)
+        binary = np.empty(gray.shape, np.uint8)
+        for src, dst in zip(gray, binary):
+            cv2.threshold(src, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=dst)
+        return binary
+
+class BatchWatershed(BaseEstimator, TransformerMixin):
+    """
+    Versão em lote do Watershed, com a mesma segmentação e saída compacta.
+
+    A conversão para cinza é feita para o lote inteiro, o elemento estruturante é criado
+    uma vez por bloco e os intermediários de cada imagem (limiarização, morfologia,
+    distância) ficam em buffers por thread. As etapas por imagem do OpenCV liberam o
+    GIL, então o lote é dividido entre threads.
+
+    O resultado é uma pilha (N, H, W) de rótulos `marcadores + 1` (0 = borda entre
+    regiões, 2 = fundo, 3.. = regiões) em uint8, ou uint16/uint32 se houver regiões
+    demais; `labels_to_markers` recupera exatamente a saída do Watershed. Imagens de
+    formatos diferentes são retornadas em lista.
+
+    Args:
+        threshold_method (str, optional): Método de limiarização a ser usado ('otsu' ou 'binary').
+            Defaults to 'otsu'.
+        structuring_element_size (int, optional): Tamanho do elemento estruturante para operações morfológicas.
+            Defaults to 3.
+        n_jobs (int, optional): Número de threads usadas no transform. Defaults to None (serial).
+    """
+    _THRESHOLD_FLAGS = {
+        'otsu': cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU,
+        'binary': cv2.THRESH_BINARY_INV,
+    }
+
+    def __init__(self, threshold_method='otsu', structuring_element_size=3, n_jobs=None):
+        self.threshold_method = threshold_method
+        self.structuring_element_size = structuring_element_size
+        self.n_jobs = n_jobs
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X):
+        if self.threshold_method not in self._THRESHOLD_FLAGS:
+            raise ValueError(f"Método de limiarização '{self.threshold_method}' não suportado.")
+        X = as_sequence(X)
+        stack = _as_stack(X)
+        markers = parallel_transform(self._transform_chunk, X if stack is None else stack, self.n_jobs)
+        if isinstance(markers, np.ndarray):
+            return _compact_labels(markers)
+        dtype = _compact_labels(np.array([max((int(m.max()) for m in markers), default=0)])).dtype
+        return [_compact_labels(m, dtype) for m in markers]
+
+    def _transform_chunk(self, X):
+        kernel = np.ones((self.structuring_element_size, self.structuring_element_size), np.uint8)
+        if not isinstance(X, np.ndarray):
+            return [self._segment(img, _gray_stack(img[None])[0], kernel) for img in X]
+        gray = _gray_stack(X)
+        markers = np.empty(gray.shape, np.int32)
+        for img, g, out in zip(X, gray, markers):
+            self._segment(img, g, kernel, out)
+        return markers
+
+    def _segment(self, img, gray, kernel, markers=None):
+        """Mesmas etapas do Watershed._transform_chunk para uma imagem, escrevendo em `markers`."""
+        shape = gray.shape
+        thresh = _get_buffer('ws_thresh', shape)
+        cv2.threshold(gray, 0, 255, self._THRESHOLD_FLAGS[self.threshold_method], dst=thresh)
+        opening = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel, dst=_get_buffer('ws_opening', shape),
+                                   iterations=2)
+        sure_bg = cv2.dilate(opening, kernel, dst=_get_buffer('ws_sure_bg', shape), iterations=3)
+
+        dist_transform = cv2.distanceTransform(opening, cv2.DIST_L2, 5,
+                                               dst=_get_buffer('ws_dist', shape, np.float32))
+        # Mesmo limiar (float32) e mesma conversão do Watershed original
+        cv2.threshold(dist_transform, 0.7 * dist_transform.max(), 255, 0, dst=dist_transform)
+        sure_fg = _get_buffer('ws_sure_fg', shape)
+        np.copyto(sure_fg, dist_transform, casting='unsafe')
+        unknown = cv2.subtract(sure_bg, sure_fg, dst=sure_bg)
+
+        if markers is None:
+            markers = np.empty(shape, np.int32)
+        cv2.connectedComponents(sure_fg, labels=markers)
+        markers += 1
+        markers[unknown == 255] = 0
+        color = img if img.ndim == 3 else cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        cv2.watershed(color, markers)
+        return markers
+
+# Versões compatíveis com o sklearn (clone, get_params) das classes de modules.fused
+class LesionCrop(BaseEstimator, TransformerMixin, _LesionCrop):
+    __doc__ = _LesionCrop.__doc__
+
+
+class TracingPipeline(Pipeline):
+    """
+    Pipeline que, opcionalmente, captura a saída de cada etapa durante o transform.
+
+    Útil para visualizar exatamente os tensores que alimentaram o modelo, sem
+    reexecutar as etapas separadamente.
+    """
+    def transform(self, X, trace=None, **params):
+        """
+        Args:
+            X (iterable): Dados de entrada.
+            trace (list, optional): Se informado, recebe pares (nome da etapa, saída).
+        Returns:
+            Saída da última etapa, como em `Pipeline.transform`.
+        """
+        if trace is None:
+            return super().transform(X, **params)
+        Xt = X
+        for name, step in self.steps:
+            if step is None or step == 'passthrough':
+                continue
+            Xt = step.transform(Xt)
+            trace.append((name, Xt))
+        return Xt
+
+class FusedPreprocess(BaseEstimator, TransformerMixin, _FusedPreprocess):
+    __doc__ = _FusedPreprocess.__doc__
@@ -0,0 +1,134 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+from sklearn.metrics import accuracy_score, roc_auc_score
+
+from .serving import MALIGNANT_COLUMN, VARIANTS, load_serving_model, variant_path  # noqa: F401
+
+
+def _representative_dataset(images):
+    def generator():
+        for img in images:
+            yield [np.asarray(img, dtype=np.float32)[None]]
+    return generator
+
+
+def convert(serving_model, path, variant, representative_images=None):
+    """
+    Gera uma variante TFLite do modelo (quantizada pós-treinamento, exceto 'tflite').
+
+    Args:
+        serving_model (ServingModel): Modelo float32 de referência.
+        path (str): Arquivo .tflite de saída.
+        variant (str): 'tflite' (float32, sem quantização), 'dynamic' (pesos int8),
+            'float16' (pesos float16) ou 'int8' (inteiro completo, incluindo entrada e saída).
+        representative_images (sequence, optional): Imagens pré-processadas usadas para
+            calibrar as ativações; obrigatório para 'int8'. Defaults to None.
+    Returns:
+        str: O caminho gravado.
+    """
+    def configure(converter):
+        if variant == 'tflite':
+            return
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if variant == 'float16':
+            converter.target_spec.supported_types = [tf.float16]
+        elif variant == 'int8':
+            if representative_images is None:
+                raise ValueError("A variante 'int8' exige imagens representativas.")
+            converter.representative_dataset = _representative_dataset(representative_images)
+            converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+            converter.inference_input_type = tf.int8
+            converter.inference_output_type = tf.int8
+        elif variant != 'dynamic':
+            raise ValueError(f"Variante '{variant}' não suportada.")
+
+    return serving_model.export_tflite(path, configure=configure)
+
+
+def compare_variants(models, X_test, y_test, batch_size=32, reference='float32'):
+    """
+    Compara variantes do modelo no conjunto de teste.
+
+    Args:
+        models (dict): Nome da variante -> modelo com `predict(batch)`.
+        X_test (numpy.ndarray): Imagens pré-processadas.
+        y_test (numpy.ndarray): Rótulos 0/1 ou one-hot (coluna MALIGNANT_COLUMN = maligno).
+        batch_size (int, optional): Tamanho do lote de inferência. Defaults to 32.
+        reference (str, optional): Variante usada como referência na diferença de
+            probabilidades. Defaults to 'float32'.
+    Returns:
+        dict: Por variante: acurácia, AUC, latência por imagem (ms) e diferença máxima
+            de probabilidade em relação à referência.
+    """
+    y_true = y_test[:, MALIGNANT_COLUMN] if y_test.ndim == 2 else y_test
+    probabilities = {}
+    results = {}
+    for name, model in models.items():
+        model.predict(X_test[:batch_size])
+        start = time.perf_counter()
+        prob = np.concatenate([model.predict(X_test[i:i + batch_size]) for i in range(0, len(X_test), batch_size)])
+        elapsed = time.perf_counter() - start
+        probabilities[name] = prob
+        results[name] = {
+            'accuracy': accuracy_score(y_true, (prob[:, MALIGNANT_COLUMN] > 0.5).astype(int)),
+            'auc': roc_auc_score(y_true, prob[:, MALIGNANT_COLUMN]) if len(np.unique(y_true)) > 1 else float('nan'),
+            'latency_ms': elapsed * 1000.0 / len(X_test),
+        }
+    if reference in probabilities:
+        for name, prob in probabilities.items():
+            results[name]['max_prob_diff'] = float(np.abs(prob - probabilities[reference]).max())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera variantes quantizadas do modelo e as compara no conjunto de teste.")
+    parser.add_argument('--model', default='static/model/skin_cancer.keras')
+    parser.add_argument('--csv', required=True, help="CSV de ground truth do ISIC.")
+    parser.add_argument('--images', required=True, help="Diretório das imagens.")
+    parser.add_argument('--variants', nargs='+', default=list(VARIANTS), choices=list(VARIANTS))
+    parser.add_argument('--n-representative', type=int, default=200)
+    parser.add_argument('--test-size', type=float, default=0.2)
+    args = parser.parse_args()
+
+    from .dataset import StreamingDataset
+    from .fused import FusedPreprocess
+
+    dataset = StreamingDataset.from_csv(args.csv, args.images, pipeline=FusedPreprocess(),
+                                        target_size=None, one_hot=False)
+    train, test = dataset.split(test_size=args.test_size)
+
+    representative = []
+    for X, _ in train:
+        representative.extend(X)
+        if len(representative) >= args.n_representative:
+            break
+    representative = representative[:args.n_representative]
+    batches = list(test)
+    X_test = np.concatenate([X for X, _ in batches])
+    y_test = np.concatenate([y for _, y in batches])
+
+    float_model = load_serving_model(args.model)
+    models = {'float32': float_model}
+    sizes = {'float32': os.path.getsize(args.model)}
+    for variant in args.variants:
+        path = convert(float_model, variant_path(args.model, variant), variant, representative)
+        print(f"Variante {variant} salva em {path}")
+        models[variant] = load_serving_model(path)
+        sizes[variant] = os.path.getsize(path)
+
+    print(f"\n--- Comparação no conjunto de teste ({len(X_test)} imagens) ---")
+    for name, metrics in compare_variants(models, X_test, y_test).items():
+        print(f"{name}:")
+        print(f"  Tamanho: {sizes[name] / 1024 ** 2:.2f} MB")
+        print(f"  Acurácia: {metrics['accuracy']:.4f}")
+        print(f"  AUC: {metrics['auc']:.4f}")
+        print(f"  Latência: {metrics['latency_ms']:.3f} ms/imagem")
+        print(f"  Diferença máx. de probabilidade: {metrics['max_prob_diff']:.4f}")
+
+
+if __name__ == '__main__':
+    main()
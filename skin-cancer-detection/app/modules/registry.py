@@ -0,0 +1,326 @@
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+# Arquivo opcional, na raiz do registro, com o nome da versão a servir
+ACTIVE_FILE = 'ACTIVE'
+
+logger = logging.getLogger(__name__)
+
+
+def _natural_key(name):
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+
+def warmup_check(serving_model, batch_sizes=(1,)):
+    """
+    Aquece o modelo em cada tamanho de lote e verifica a saída: uma linha por imagem,
+    valores finitos no intervalo [0, 1]. Levanta ValueError se a verificação falhar.
+    """
+    for batch_size in batch_sizes:
+        batch = np.zeros((batch_size,) + tuple(serving_model.input_shape), np.float32)
+        output = np.asarray(serving_model.predict(batch))
+        if output.ndim != 2 or output.shape[0] != batch_size:
+            raise ValueError(f"Saída com formato inesperado {output.shape} para um lote de {batch_size}.")
+        if not np.all(np.isfinite(output)) or output.min() < 0.0 or output.max() > 1.0:
+            raise ValueError("Saída fora do intervalo [0, 1] ou não finita.")
+
+
+class ModelBundle:
+    """
+    Uma versão carregada do modelo e os objetos que dependem dela. Cada versão tem o seu
+    MicroBatcher, de modo que um lote nunca mistura predições de versões diferentes.
+
+    Args:
+        version (str): Versão informada nas respostas e usada nas chaves do cache.
+        serving_model: ServingModel ou TFLiteModel usado na inferência.
+        batcher (MicroBatcher): Micro-batching sobre `serving_model.predict`.
+        tta_predictor (TTAPredictor): Test-time augmentation sobre `serving_model.predict`.
+        saliency_factory (callable): Cria o SaliencyEngine no primeiro acesso a
+            `saliency_engine`; o modelo Keras só precisa estar em memória se a saliência
+            for usada.
+
+    Attributes:
+        load_s (float): Tempo de carga (`load_fn`), preenchido por `ModelRegistry.activate`.
+        warmup_s (float): Tempo do aquecimento e da verificação (`check_fn`).
+    """
+    def __init__(self, version, serving_model, batcher, tta_predictor, saliency_factory):
+        self.version = version
+        self.serving_model = serving_model
+        self.batcher = batcher
+        self.tta_predictor = tta_predictor
+        self.load_s = None
+        self.warmup_s = None
+        self._saliency_factory = saliency_factory
+        self._saliency_engine = None
+        self._lock = threading.Lock()
+
+    @property
+    def saliency_engine(self):
+        if self._saliency_engine is None:
+            with self._lock:
+                if self._saliency_engine is None:
+                    self._saliency_engine = self._saliency_factory()
+        return self._saliency_engine
+
+    def close(self):
+        self.batcher.stop()
+
+
+class _Entry:
+    def __init__(self, name, bundle):
+        self.name = name
+        self.bundle = bundle
+        self.loaded_at = time.time()
+        self.users = 0
+        self.retired = False
+
+
+class ModelRegistry:
+    """
+    Registro de versões do modelo em um diretório local, com troca a quente.
+
+    Cada subdiretório de `root` é uma versão (ex.: models/2024-06-02/skin_cancer.keras,
+    com as variantes .tflite ao lado). A versão servida é a indicada no arquivo ACTIVE,
+    se existir, ou a mais recente pela ordem natural dos nomes. Uma versão nova é
+    carregada e aquecida em segundo plano e só substitui a atual se passar na
+    verificação; a troca é uma atribuição sob lock. Na inicialização, se a versão
+    desejada falhar, as demais são tentadas da mais recente para a mais antiga. Uma versão
+    que falhou só é tentada de novo quando seu arquivo muda. As falhas ficam em
+    `stats()['last_failure']` (exibido em /predict/stats) e no log do módulo.
+    Requisições em andamento terminam na versão que obtiveram em `acquire`, e a versão
+    antiga é fechada quando a última delas termina.
+
+    Args:
+        load_fn (callable): (nome da versão, caminho do .keras) -> ModelBundle.
+        root (str, optional): Diretório das versões. Defaults to None.
+        model_path (str, optional): Sem `root`, serve apenas este arquivo, como versão
+            fixa. Defaults to None.
+        check_fn (callable, optional): Recebe o ModelBundle carregado e levanta exceção se
+            ele não puder ser servido. Defaults to None (`warmup_check` com lote 1).
+        poll_interval (float, optional): Segundos entre as verificações de `root` pela
+            thread de recarga (`start`). Defaults to 30.
+    """
+    def __init__(self, load_fn, root=None, model_path=None, check_fn=None, poll_interval=30.0):
+        if (root is None) == (model_path is None):
+            raise ValueError("Informe `root` ou `model_path`.")
+        self.load_fn = load_fn
+        self.root = root
+        self.model_path = model_path
+        self.check_fn = check_fn or (lambda bundle: warmup_check(bundle.serving_model))
+        self.poll_interval = poll_interval
+        self._active = None
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._counters = {'reloads': 0, 'failures': 0}
+        self._last_failure = None
+        self._failed = None
+
+    # ----- versões -----
+    def versions(self):
+        """Versões disponíveis, da mais antiga para a mais recente."""
+        if self.root is None:
+            return [os.path.basename(self.model_path)]
+        names = [name for name in os.listdir(self.root)
+                 if os.path.isdir(os.path.join(self.root, name)) and not name.startswith('.')]
+        return sorted((name for name in names if self._find_model(name)), key=_natural_key)
+
+    def _find_model(self, name):
+        directory = os.path.join(self.root, name)
+        models = sorted(f for f in os.listdir(directory) if f.endswith('.keras'))
+        return os.path.join(directory, models[0]) if models else None
+
+    def path(self, name):
+        """Caminho do .keras de uma versão."""
+        if self.root is None:
+            return self.model_path
+        path = self._find_model(name) if os.path.isdir(os.path.join(self.root, name)) else None
+        if path is None:
+            raise FileNotFoundError(f"Versão '{name}' não encontrada em {self.root}")
+        return path
+
+    def desired_version(self):
+        """Versão que deveria estar ativa: a do arquivo ACTIVE ou a mais recente."""
+        if self.root is not None:
+            try:
+                with open(os.path.join(self.root, ACTIVE_FILE)) as f:
+                    name = f.read().strip()
+                if name:
+                    return name
+            except FileNotFoundError:
+                pass
+        versions = self.versions()
+        if not versions:
+            raise FileNotFoundError(f"Nenhuma versão com arquivo .keras em {self.root}")
+        return versions[-1]
+
+    # ----- carga e troca -----
+    def candidates(self):
+        """Versões a tentar na inicialização: a desejada e as demais, da mais recente à mais antiga."""
+        versions = self.versions()[::-1]
+        try:
+            desired = self.desired_version()
+        except FileNotFoundError:
+            return versions
+        return [desired] + [name for name in versions if name != desired]
+
+    def activate(self, name=None):
+        """
+        Carrega, verifica e ativa uma versão. Se a carga ou a verificação falhar, a
+        versão atual continua ativa e o erro é propagado.
+
+        Sem `name` (inicialização), tenta as versões de `candidates()` em ordem e ativa
+        a primeira que passar; o erro só é propagado se nenhuma puder ser carregada.
+
+        Returns:
+            ModelBundle: O modelo ativo após a chamada.
+        """
+        names = [name] if name else self.candidates()
+        if not names:
+            raise FileNotFoundError(f"Nenhuma versão com arquivo .keras em {self.root}")
+        for i, name in enumerate(names):
+            try:
+                return self._activate(name)
+            except Exception:
+                # Como na recarga: a versão desejada só é tentada de novo se o arquivo mudar
+                if i == 0:
+                    self._failed = self._attempt(name)
+                if i == len(names) - 1:
+                    raise
+                logger.warning("Versão %s não pôde ser ativada; tentando %s", name, names[i + 1])
+
+    def _attempt(self, name):
+        """Identifica uma tentativa de carga: a versão e a data de modificação do arquivo."""
+        try:
+            return name, os.path.getmtime(self.path(name))
+        except OSError:
+            return name, None
+
+    def _record_failure(self, name, error):
+        with self._lock:
+            self._counters['failures'] += 1
+            self._last_failure = {'version': name, 'error': f"{type(error).__name__}: {error}", 'at': time.time()}
+        logger.error("Falha ao carregar a versão %s do modelo: %s: %s", name, type(error).__name__, error)
+
+    def _activate(self, name):
+        with self._reload_lock:
+            start = time.perf_counter()
+            try:
+                bundle = self.load_fn(name, self.path(name))
+                loaded = time.perf_counter()
+                try:
+                    self.check_fn(bundle)
+                except Exception:
+                    bundle.close()
+                    raise
+            except Exception as e:
+                self._record_failure(name, e)
+                raise
+            bundle.load_s, bundle.warmup_s = loaded - start, time.perf_counter() - loaded
+            entry = _Entry(name, bundle)
+            with self._lock:
+                previous, self._active = self._active, entry
+                if previous is not None:
+                    self._counters['reloads'] += 1
+                    previous.retired = True
+                close_previous = previous is not None and previous.users == 0
+            if close_previous:
+                previous.bundle.close()
+            logger.info("Versão %s do modelo ativa (carga %.2fs, aquecimento %.2fs)",
+                        bundle.version, bundle.load_s, bundle.warmup_s)
+            return bundle
+
+    def refresh(self):
+        """Ativa a versão desejada se ela for diferente da atual. Retorna True se trocou."""
+        try:
+            name = self.desired_version()
+            self.path(name)
+        except FileNotFoundError as e:
+            # Ex.: ACTIVE indica uma versão inexistente; registrado uma vez até mudar
+            if self._failed != (None, str(e)):
+                self._failed = (None, str(e))
+                self._record_failure(None, e)
+            return False
+        with self._lock:
+            current = self._active.name if self._active is not None else None
+        if name == current:
+            self._failed = None
+            return False
+        # Uma versão que falhou só é tentada de novo se o arquivo mudar
+        attempt = self._attempt(name)
+        if attempt == self._failed:
+            return False
+        try:
+            self.activate(name)
+        except Exception:
+            self._failed = attempt
+            raise
+        self._failed = None
+        return True
+
+    @property
+    def active(self):
+        """ModelBundle ativo (para leituras pontuais; requisições devem usar `acquire`)."""
+        entry = self._active
+        return entry.bundle if entry is not None else None
+
+    @contextmanager
+    def acquire(self):
+        """Fornece o ModelBundle ativo, mantendo-o aberto até o fim do bloco."""
+        with self._lock:
+            entry = self._active
+            if entry is None:
+                raise RuntimeError("Nenhuma versão do modelo ativa.")
+            entry.users += 1
+        try:
+            yield entry.bundle
+        finally:
+            with self._lock:
+                entry.users -= 1
+                close = entry.retired and entry.users == 0
+            if close:
+                entry.bundle.close()
+
+    # ----- recarga em segundo plano -----
+    def start(self):
+        """Inicia a thread que verifica `root` a cada `poll_interval` segundos."""
+        if self.root is None or self.poll_interval <= 0:
+            return self
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._poll, name='model-registry', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception:
+                # Já registrada em `last_failure` por `activate`; a versão atual continua ativa
+                continue
+
+    def stats(self):
+        with self._lock:
+            entry = self._active
+            stats = dict(self._counters)
+            stats['last_failure'] = self._last_failure
+            if entry is not None:
+                stats.update({'active': entry.name, 'version': entry.bundle.version, 'load_s': entry.bundle.load_s,
+                              'warmup_s': entry.bundle.warmup_s, 'loaded_at': entry.loaded_at,
+                              'in_flight': entry.users})
+        stats['root'] = self.root
+        return stats
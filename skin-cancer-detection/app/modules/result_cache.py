@@ -0,0 +1,147 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from .cache import array_key
+
+
+def result_key(image, model_version):
+    """Chave de um resultado: hash dos pixels decodificados + versão do modelo."""
+    return hashlib.blake2b(f'{array_key(image)}:{model_version}'.encode(), digest_size=16).hexdigest()
+
+
+def file_version(path):
+    """Versão de um artefato (ex.: o arquivo .keras), derivada do hash do seu conteúdo."""
+    h = hashlib.blake2b(digest_size=8)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Cache LRU de resultados de predição (probabilidade, saliência e imagens codificadas).
+
+    Mantém até `max_entries` resultados em memória e, se `disk_dir` for informado, uma
+    segunda camada em disco (um arquivo pickle por entrada) consultada quando a
+    entrada já saiu da memória. Entradas mais antigas que `ttl` segundos expiram em
+    ambas as camadas.
+
+    Args:
+        max_entries (int, optional): Entradas mantidas em memória. Defaults to 256.
+        ttl (float, optional): Tempo de vida, em segundos; None desativa. Defaults to 3600.
+        disk_dir (str, optional): Diretório da camada em disco. Defaults to None.
+        disk_max_entries (int, optional): Entradas mantidas em disco. Defaults to 4096.
+    """
+    def __init__(self, max_entries=256, ttl=3600, disk_dir=None, disk_max_entries=4096):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.disk_max_entries = disk_max_entries
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._disk = OrderedDict()
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+        if disk_dir is not None:
+            os.makedirs(disk_dir, exist_ok=True)
+            entries = sorted((entry.stat().st_mtime, entry.name[:-4]) for entry in os.scandir(disk_dir)
+                             if entry.name.endswith('.pkl'))
+            self._disk.update((key, mtime) for mtime, key in entries)
+
+    def _expired(self, created):
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key + '.pkl')
+
+    def get(self, key):
+        """Retorna o resultado armazenado ou None (ausente ou expirado)."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, value = entry
+                if not self._expired(created):
+                    self._memory.move_to_end(key)
+                    self._counters['memory_hits'] += 1
+                    return value
+                del self._memory[key]
+                self._counters['expired'] += 1
+                self._counters['misses'] += 1
+                expired_on_disk = self._disk.pop(key, None) is not None
+            else:
+                expired_on_disk = False
+            on_disk = self.disk_dir is not None and key in self._disk
+
+        if expired_on_disk:
+            self._remove_files([key])
+            return None
+
+        if on_disk:
+            try:
+                with open(self._disk_path(key), 'rb') as f:
+                    created, value = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                created, value = None, None
+            with self._lock:
+                if created is not None and not self._expired(created):
+                    self._counters['disk_hits'] += 1
+                    self._store_memory(key, created, value)
+                    return value
+                self._disk.pop(key, None)
+                if created is not None:
+                    self._counters['expired'] += 1
+            self._remove_files([key])
+
+        with self._lock:
+            self._counters['misses'] += 1
+        return None
+
+    def put(self, key, value):
+        created = time.time()
+        with self._lock:
+            self._store_memory(key, created, value)
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((created, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        evicted = []
+        with self._lock:
+            self._disk.pop(key, None)
+            self._disk[key] = created
+            while len(self._disk) > self.disk_max_entries:
+                evicted.append(self._disk.popitem(last=False)[0])
+        self._remove_files(evicted)
+
+    def _store_memory(self, key, created, value):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters['evictions'] += 1
+
+    def _remove_files(self, keys):
+        for key in keys:
+            try:
+                os.remove(self._disk_path(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        """Contadores de acerto/falta, taxa de acerto e ocupação das camadas."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['memory_entries'] = len(self._memory)
+            stats['disk_entries'] = len(self._disk)
+        stats['max_entries'] = self.max_entries
+        stats['ttl'] = self.ttl
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
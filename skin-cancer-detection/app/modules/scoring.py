@@ -0,0 +1,359 @@
+"""
+Pontuação offline em lote de diretórios de imagens ou do CSV de ground truth do ISIC.
+
+As etapas decodificação -> pré-processamento -> inferência rodam em threads separadas,
+ligadas por filas limitadas: enquanto um lote é classificado, o seguinte está sendo
+pré-processado e o outro decodificado, e nunca há mais que alguns lotes em memória.
+Os resultados são gravados lote a lote; ao rodar de novo com a mesma saída, as imagens
+já pontuadas são puladas e as que falharam na leitura são tentadas de novo.
+
+Uso (a partir de skin-cancer-detection/app):
+    python -m modules.scoring --images /dados/arquivo --output scores.csv
+    python -m modules.scoring --csv ISIC_GroundTruth.csv --images /dados/isic --output scores.parquet --metrics
+"""
+import argparse
+import glob
+import os
+import queue
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from .decode import decode_image
+from .parallel import effective_n_jobs, parallel_transform
+from .serving import MALIGNANT_COLUMN
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')
+
+
+def list_images(folder, extensions=IMAGE_EXTENSIONS):
+    """
+    Lista recursivamente as imagens de um diretório.
+
+    Returns:
+        pandas.DataFrame: Colunas `image_id` (caminho relativo sem extensão) e `path`.
+    """
+    paths = []
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        paths.extend(os.path.join(root, name) for name in sorted(files) if name.lower().endswith(extensions))
+    ids = [os.path.splitext(os.path.relpath(path, folder))[0].replace(os.sep, '/') for path in paths]
+    return pd.DataFrame({'image_id': ids, 'path': paths})
+
+
+def read_ground_truth(csv_path, image_folder, id_column='isic_id', label_column='malignant', image_ext='.jpg'):
+    """
+    Lê as imagens a pontuar do CSV de ground truth do ISIC. A coluna de rótulo é
+    opcional; quando existe, vira a coluna `label` dos resultados.
+
+    Returns:
+        pandas.DataFrame: Colunas `image_id`, `path` e, se houver, `label`.
+    """
+    columns = pd.read_csv(csv_path, nrows=0).columns
+    usecols = [id_column] + ([label_column] if label_column in columns else [])
+    df = pd.read_csv(csv_path, usecols=usecols, dtype={id_column: str})
+    inputs = pd.DataFrame({'image_id': df[id_column],
+                           'path': [os.path.join(image_folder, name + image_ext) for name in df[id_column]]})
+    if label_column in df:
+        inputs['label'] = df[label_column].to_numpy()
+    return inputs
+
+
+def _succeeded_ids(df):
+    """IDs das linhas sem erro; as linhas com erro não contam como feitas."""
+    if 'error' in df:
+        df = df[df['error'].fillna('') == '']
+    return set(df['image_id'])
+
+
+def _latest(df):
+    """Uma linha por imagem: a mais recente (uma nova tentativa substitui o erro)."""
+    return df.drop_duplicates('image_id', keep='last').reset_index(drop=True)
+
+
+class CSVResultWriter:
+    """
+    Grava os resultados em um CSV, acrescentando e sincronizando cada lote com o disco.
+    Ao reabrir, descarta uma última linha incompleta (escrita interrompida).
+    """
+    def __init__(self, path):
+        self.path = path
+        if os.path.exists(path):
+            with open(path, 'rb+') as f:
+                content = f.read()
+                end = content.rfind(b'\n') + 1
+                if end < len(content):
+                    f.truncate(end)
+
+    def done_ids(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return set()
+        df = pd.read_csv(self.path, usecols=lambda column: column in ('image_id', 'error'),
+                         dtype={'image_id': str, 'error': str}, keep_default_na=False)
+        return _succeeded_ids(df)
+
+    def write(self, df):
+        header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, 'a', newline='') as f:
+            df.to_csv(f, header=header, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def close(self):
+        pass
+
+    def read(self):
+        return _latest(pd.read_csv(self.path, dtype={'image_id': str}))
+
+
+class ParquetResultWriter:
+    """
+    Grava os resultados como um diretório de arquivos Parquet (`part-*.parquet`). Uma
+    parte é gravada a cada `rows_per_part` linhas ou quando as linhas pendentes mais
+    antigas têm `flush_interval_s` segundos; cada parte é escrita em um arquivo
+    temporário e depois renomeada, então uma interrupção perde no máximo essas linhas
+    ainda não gravadas, que são pontuadas de novo na próxima execução.
+    Requer `pyarrow`.
+
+    Args:
+        path (str): Diretório de saída.
+        rows_per_part (int, optional): Linhas por parte. Defaults to 256.
+        flush_interval_s (float, optional): Tempo máximo que uma linha fica pendente.
+            Defaults to 10.0.
+    """
+    def __init__(self, path, rows_per_part=256, flush_interval_s=10.0):
+        self.path = path
+        self.rows_per_part = rows_per_part
+        self.flush_interval_s = flush_interval_s
+        self._pending = []
+        self._pending_rows = 0
+        self._pending_since = None
+        os.makedirs(path, exist_ok=True)
+        for tmp in glob.glob(os.path.join(path, '*.tmp')):
+            os.remove(tmp)
+
+    def _parts(self):
+        return sorted(glob.glob(os.path.join(self.path, 'part-*.parquet')))
+
+    def done_ids(self):
+        ids = set()
+        for part in self._parts():
+            ids.update(_succeeded_ids(pd.read_parquet(part, columns=['image_id', 'error'])))
+        return ids
+
+    def write(self, df):
+        if not self._pending:
+            self._pending_since = time.monotonic()
+        self._pending.append(df)
+        self._pending_rows += len(df)
+        if (self._pending_rows >= self.rows_per_part
+                or time.monotonic() - self._pending_since >= self.flush_interval_s):
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        part = os.path.join(self.path, f'part-{len(self._parts()):05d}.parquet')
+        tmp_path = f'{part}.{uuid.uuid4().hex}.tmp'
+        pd.concat(self._pending, ignore_index=True).to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, part)
+        self._pending = []
+        self._pending_rows = 0
+
+    def close(self):
+        self._flush()
+
+    def read(self):
+        parts = self._parts()
+        if not parts:
+            return pd.DataFrame(columns=['image_id'])
+        return _latest(pd.concat([pd.read_parquet(part) for part in parts], ignore_index=True))
+
+
+def open_writer(path):
+    """Escolhe o formato pela extensão da saída: .parquet (diretório) ou CSV."""
+    if path.rstrip('/\\').endswith('.parquet'):
+        return ParquetResultWriter(path)
+    return CSVResultWriter(path)
+
+
+def _background(items, fn, maxsize):
+    """
+    Aplica `fn` a cada item em uma thread de fundo, mantendo no máximo `maxsize`
+    resultados prontos; erros são repassados ao consumidor.
+    """
+    buffer = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(fn(item)):
+                    return
+        except Exception as e:
+            put(e)
+        put(done)
+
+    producer = threading.Thread(target=produce, name='scoring-stage', daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+
+def score(inputs, model, preprocess, writer, batch_size=64, n_jobs=-1, prefetch=2,
+          reduced_decode=False, probability_column=MALIGNANT_COLUMN):
+    """
+    Pontua as imagens de `inputs` ainda ausentes na saída.
+
+    Args:
+        inputs (pandas.DataFrame): Colunas `image_id`, `path` e, opcionalmente, `label`.
+        model: Modelo com `predict(batch)` (ex.: `load_serving_model`).
+        preprocess (FusedPreprocess): Pré-processamento aplicado a cada lote.
+        writer (CSVResultWriter ou ParquetResultWriter): Destino dos resultados.
+        batch_size (int, optional): Imagens por lote. Defaults to 64.
+        n_jobs (int, optional): Threads de decodificação e pré-processamento.
+            Defaults to -1 (todos os núcleos).
+        prefetch (int, optional): Lotes prontos entre cada par de etapas. Defaults to 2.
+        reduced_decode (bool, optional): Decodifica JPEGs grandes em resolução reduzida
+            (como REDUCED_DECODE no app). Defaults to False.
+        probability_column (int, optional): Saída do modelo usada como probabilidade de
+            malignidade. Defaults to MALIGNANT_COLUMN.
+    Returns:
+        dict: Imagens pontuadas, puladas (já presentes sem erro), com erro de leitura e o
+            tempo.
+    """
+    done = writer.done_ids()
+    pending = inputs[~inputs['image_id'].isin(done)].reset_index(drop=True)
+    target_size = preprocess.size if reduced_decode else None
+
+    def read(paths):
+        images = []
+        for path in paths:
+            try:
+                with open(path, 'rb') as f:
+                    images.append(decode_image(f.read(), target_size))
+            except OSError:
+                images.append(None)
+        return images
+
+    def decode(rows):
+        return rows, parallel_transform(read, list(rows['path']), n_jobs)
+
+    def transform(batch):
+        rows, images = batch
+        ok = np.array([img is not None for img in images], dtype=bool)
+        X = preprocess.transform([img for img in images if img is not None]) if ok.any() else None
+        return rows, ok, X
+
+    batches = (pending.iloc[start:start + batch_size] for start in range(0, len(pending), batch_size))
+    stages = _background(_background(batches, decode, prefetch), transform, prefetch)
+
+    start = time.perf_counter()
+    counts = {'scored': 0, 'skipped': len(inputs) - len(pending), 'errors': 0}
+    for rows, ok, X in stages:
+        probability = np.full(len(rows), np.nan)
+        if X is not None:
+            probability[ok] = np.asarray(model.predict(X))[:, probability_column]
+        result = pd.DataFrame({'image_id': rows['image_id'].to_numpy(), 'probability': probability})
+        result['class'] = np.where(~ok, '', np.where(probability > 0.5, 'maligno', 'benigno'))
+        if 'label' in rows:
+            result['label'] = rows['label'].to_numpy()
+        result['error'] = np.where(ok, '', 'Erro ao carregar a imagem')
+        writer.write(result)
+        counts['scored'] += int(ok.sum())
+        counts['errors'] += int((~ok).sum())
+    writer.close()
+    counts['elapsed_s'] = time.perf_counter() - start
+    return counts
+
+
+def compute_metrics(results, threshold=0.5):
+    """
+    ROC AUC e classification_report das linhas pontuadas que têm rótulo.
+
+    Returns:
+        dict ou None: {'n', 'roc_auc', 'report'}, ou None se não houver rótulos.
+    """
+    from sklearn.metrics import classification_report, roc_auc_score
+
+    if 'label' not in results:
+        return None
+    scored = results.dropna(subset=['probability', 'label'])
+    if scored.empty:
+        return None
+    y_true = scored['label'].astype(int).to_numpy()
+    y_prob = scored['probability'].to_numpy()
+    return {
+        'n': len(scored),
+        'roc_auc': roc_auc_score(y_true, y_prob) if len(np.unique(y_true)) > 1 else float('nan'),
+        'report': classification_report(y_true, (y_prob > threshold).astype(int),
+                                        labels=[0, 1], target_names=['benigno', 'maligno'], zero_division=0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='static/model/skin_cancer.keras',
+                        help="Artefato de inferência: .keras, .tflite ou diretório SavedModel.")
+    parser.add_argument('--images', required=True, help="Diretório das imagens.")
+    parser.add_argument('--csv', help="CSV de ground truth do ISIC; sem ele, o diretório é percorrido.")
+    parser.add_argument('--output', required=True, help="Arquivo .csv ou diretório .parquet de saída.")
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--prefetch', type=int, default=2)
+    parser.add_argument('--reduced-decode', action='store_true')
+    parser.add_argument('--probability-column', type=int, default=MALIGNANT_COLUMN,
+                        help=f"Saída do modelo usada como probabilidade de malignidade ({MALIGNANT_COLUMN}).")
+    parser.add_argument('--metrics', action='store_true', help="Calcula ROC AUC e classification_report.")
+    args = parser.parse_args()
+
+    from .fused import FusedPreprocess
+    from .serving import load_serving_model
+
+    inputs = read_ground_truth(args.csv, args.images) if args.csv else list_images(args.images)
+    model = load_serving_model(args.model)
+    preprocess = FusedPreprocess(n_jobs=args.n_jobs)
+    writer = open_writer(args.output)
+    counts = score(inputs, model, preprocess, writer, batch_size=args.batch_size, n_jobs=args.n_jobs,
+                   prefetch=args.prefetch, reduced_decode=args.reduced_decode,
+                   probability_column=args.probability_column)
+
+    print(f"{counts['scored']} imagens pontuadas, {counts['skipped']} já presentes em {args.output}, "
+          f"{counts['errors']} com erro de leitura ({effective_n_jobs(args.n_jobs)} threads)")
+    if counts['scored']:
+        print(f"  {counts['scored'] / counts['elapsed_s']:.1f} imagens/s")
+
+    if args.metrics:
+        metrics = compute_metrics(writer.read())
+        if metrics is None:
+            print("Sem rótulos para calcular métricas.")
+        else:
+            print(f"\n--- Métricas ({metrics['n']} imagens rotuladas) ---")
+            print(f"ROC AUC: {metrics['roc_auc']:.4f}")
+            print(metrics['report'])
+
+
+if __name__ == '__main__':
+    main()
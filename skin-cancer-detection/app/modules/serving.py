@@ -0,0 +1,280 @@
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+# Coluna da saída do modelo com a probabilidade de malignidade. O modelo é treinado com
+# rótulos one-hot (`to_categorical` da coluna `malignant` do ISIC, como nos notebooks):
+# a coluna 0 é benigno e a 1 é maligno
+MALIGNANT_COLUMN = 1
+
+# Variantes em TFLite (geradas por `python -m modules.quantization`) e o sufixo do
+# arquivo de cada uma: 'tflite' é o modelo float32 convertido, as demais são quantizadas
+VARIANTS = {
+    'tflite': '.tflite',
+    'dynamic': '_dynamic.tflite',
+    'float16': '_float16.tflite',
+    'int8': '_int8.tflite',
+}
+
+
+def variant_path(model_path, variant):
+    """
+    Caminho do artefato de uma variante ao lado do modelo .keras
+    (ex.: static/model/skin_cancer_int8.tflite). 'float32' é o próprio modelo.
+    """
+    if variant in (None, '', 'float32'):
+        return model_path
+    if variant not in VARIANTS:
+        raise ValueError(f"Variante '{variant}' não suportada. Opções: float32, {', '.join(VARIANTS)}.")
+    return os.path.splitext(model_path)[0] + VARIANTS[variant]
+
+
+def _is_augmentation(layer):
+    if type(layer).__name__.startswith('Random'):
+        return True
+    sublayers = getattr(layer, 'layers', None)
+    return bool(sublayers) and all(_is_augmentation(sublayer) for sublayer in sublayers)
+
+
+def strip_augmentation(model, input_shape=(128, 128, 3)):
+    """
+    Remove as camadas de aumento de dados (RandomFlip, RandomRotation, ...) de um
+    modelo Sequential. Em inferência elas são a identidade, mas continuam no grafo e
+    impedem a conversão para TFLite. Os pesos das demais camadas são compartilhados.
+    """
+    from tensorflow import keras
+
+    if not isinstance(model, keras.Sequential):
+        return model
+    layers = [layer for layer in model.layers if not _is_augmentation(layer)]
+    if len(layers) == len(model.layers):
+        return model
+    stripped = keras.Sequential([keras.Input(shape=input_shape)] + layers, name=model.name)
+    return stripped
+
+
+class ServingModel:
+    """
+    Inferência por uma `tf.function` de assinatura fixa, chamando o modelo diretamente
+    (`model(x, training=False)`) em vez de `model.predict`, que recria o adaptador de
+    dados a cada chamada.
+
+    Args:
+        model (keras.Model ou objeto SavedModel carregado): Modelo servido.
+        input_shape (tuple, optional): Formato (H, W, C) de uma imagem. Defaults to (128, 128, 3).
+        call (callable, optional): Função que recebe o lote float32 e retorna as
+            predições. Defaults to None (`model(x, training=False)`).
+    """
+    def __init__(self, model, input_shape=(128, 128, 3), call=None):
+        self.input_shape = tuple(input_shape)
+        if call is None:
+            model = strip_augmentation(model, self.input_shape)
+        self.model = model
+        if call is None:
+            call = lambda x: model(x, training=False)  # noqa: E731
+        import tensorflow as tf
+
+        signature = [tf.TensorSpec(shape=(None,) + self.input_shape, dtype=tf.float32)]
+        self._predict = tf.function(call, input_signature=signature)
+
+    def predict(self, batch):
+        """Recebe um lote (N, H, W, C) e retorna as predições como numpy.ndarray."""
+        return self._predict(np.asarray(batch, dtype=np.float32)).numpy()
+
+    __call__ = predict
+
+    def warmup(self, batch_sizes=(1, 8, 32)):
+        """Executa lotes de aquecimento (rastreamento do grafo e alocações iniciais)."""
+        for batch_size in batch_sizes:
+            self.predict(np.zeros((batch_size,) + self.input_shape, np.float32))
+
+    def export_saved_model(self, path):
+        """Exporta o modelo como SavedModel de inferência (assinatura `serving_default`)."""
+        if hasattr(self.model, 'export'):
+            self.model.export(path, format='tf_saved_model', verbose=False)
+        else:
+            import tensorflow as tf
+
+            tf.saved_model.save(self.model, path,
+                                signatures={'serving_default': self._predict.get_concrete_function()})
+        return path
+
+    def export_tflite(self, path, configure=None):
+        """
+        Converte para TFLite (float32) a partir de um SavedModel temporário.
+
+        Args:
+            path (str): Arquivo .tflite de saída.
+            configure (callable, optional): Recebe o `tf.lite.TFLiteConverter` para
+                ajustes (ex.: quantização) antes da conversão. Defaults to None.
+        """
+        import tensorflow as tf
+
+        with tempfile.TemporaryDirectory() as saved_model_dir:
+            self.export_saved_model(saved_model_dir)
+            converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_dir)
+            if configure is not None:
+                configure(converter)
+            tflite_model = converter.convert()
+        with open(path, 'wb') as f:
+            f.write(tflite_model)
+        return path
+
+
+def _tflite_interpreter():
+    """
+    Classe do interpretador TFLite e o enum de resolvedores de operações. Usa o pacote
+    LiteRT (`pip install ai-edge-litert`) quando instalado, que dispensa importar o
+    TensorFlow no processo; caso contrário, `tf.lite`.
+    """
+    try:
+        from ai_edge_litert.interpreter import Interpreter, OpResolverType
+    except ImportError:
+        import tensorflow as tf
+
+        return tf.lite.Interpreter, tf.lite.experimental.OpResolverType
+    return Interpreter, OpResolverType
+
+
+class TFLiteModel:
+    """
+    Inferência por um artefato TFLite, com a mesma interface de `ServingModel`.
+
+    Entradas e saídas quantizadas (int8/uint8) são convertidas automaticamente usando a
+    escala e o ponto zero do modelo.
+
+    Há um interpretador por tamanho de lote em `batch_sizes`, alocado na carga, e cada
+    lote é dividido em pedaços desses tamanhos (sempre o maior que cabe no restante): as
+    chamadas nunca redimensionam tensores nem realocam a arena, e nenhuma imagem de
+    preenchimento é calculada. Cada tamanho a mais custa uma arena proporcional a ele e
+    evita a divisão dos lotes intermediários em pedaços menores. Um interpretador não é
+    seguro entre threads, por isso as chamadas a um mesmo tamanho são serializadas.
+
+    O arquivo é mapeado em memória pelo TFLite. Com `shared_weights`, o delegate padrão
+    (XNNPACK, que copia os pesos para um formato próprio em cada interpretador) é
+    desativado e os kernels leem os pesos direto do mapeamento: os interpretadores, e
+    os processos que servem o mesmo arquivo, compartilham essas páginas em vez de manter
+    uma cópia cada, ao custo de uma inferência mais lenta. Com o LiteRT instalado, o
+    TensorFlow nem chega a ser importado (ver `_tflite_interpreter`), o que domina a
+    memória de cada processo.
+
+    Args:
+        path (str): Arquivo .tflite.
+        num_threads (int, optional): Threads do interpretador. Defaults to None (padrão do TFLite).
+        shared_weights (bool, optional): Lê os pesos do arquivo mapeado, sem cópia por
+            interpretador. Defaults to False.
+        batch_sizes (tuple, optional): Tamanhos de lote fixos; 1 é sempre incluído.
+            Defaults to (1, 8, 32).
+    """
+    def __init__(self, path, num_threads=None, shared_weights=False, batch_sizes=(1, 8, 32)):
+        Interpreter, OpResolverType = _tflite_interpreter()
+        self.path = path
+        options = {'model_path': path, 'num_threads': num_threads}
+        if shared_weights:
+            options['experimental_op_resolver_type'] = OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+        self.batch_sizes = tuple(sorted({1, *batch_sizes}))
+        self._interpreters = {}
+        for batch_size in self.batch_sizes:
+            interpreter = Interpreter(**options)
+            input_details = interpreter.get_input_details()[0]
+            self.input_shape = tuple(int(d) for d in input_details['shape'][1:])
+            interpreter.resize_tensor_input(input_details['index'], (batch_size,) + self.input_shape)
+            interpreter.allocate_tensors()
+            self._interpreters[batch_size] = (interpreter, interpreter.get_input_details()[0],
+                                              interpreter.get_output_details()[0], threading.Lock())
+
+    def predict(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        outputs = []
+        start = 0
+        while start < len(batch) or not outputs:
+            size = max(s for s in self.batch_sizes if s <= max(1, len(batch) - start))
+            outputs.append(self._invoke(size, batch[start:start + size]))
+            start += size
+        return outputs[0] if len(outputs) == 1 else np.concatenate(outputs)
+
+    __call__ = predict
+
+    def _invoke(self, batch_size, batch):
+        interpreter, input_details, output_details, lock = self._interpreters[batch_size]
+        dtype = input_details['dtype']
+        if dtype in (np.int8, np.uint8):
+            scale, zero_point = input_details['quantization']
+            info = np.iinfo(dtype)
+            batch = np.clip(np.round(batch / scale + zero_point), info.min, info.max)
+        with lock:
+            if len(batch) == batch_size:
+                interpreter.set_tensor(input_details['index'], batch.astype(dtype))
+            else:
+                # Lote vazio: executa uma imagem de zeros só para obter o formato da saída
+                interpreter.set_tensor(input_details['index'], np.zeros((batch_size,) + self.input_shape, dtype))
+            interpreter.invoke()
+            output = interpreter.get_tensor(output_details['index'])[:len(batch)]
+        if output.dtype in (np.int8, np.uint8):
+            scale, zero_point = output_details['quantization']
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
+    def warmup(self, batch_sizes=None):
+        """Executa um lote em cada interpretador (ou nos tamanhos informados)."""
+        for batch_size in batch_sizes or self.batch_sizes:
+            self.predict(np.zeros((batch_size,) + self.input_shape, np.float32))
+
+
+def load_serving_model(path, input_shape=(128, 128, 3), shared_weights=False, batch_sizes=(1, 8, 32)):
+    """
+    Carrega um artefato de inferência conforme o formato: .keras/.h5 (Keras), .tflite
+    (TFLite) ou diretório SavedModel. `shared_weights` e `batch_sizes` só valem para
+    .tflite (ver TFLiteModel).
+    """
+    if path.endswith('.tflite'):
+        return TFLiteModel(path, shared_weights=shared_weights, batch_sizes=batch_sizes)
+    if os.path.isdir(path):
+        import tensorflow as tf
+
+        loaded = tf.saved_model.load(path)
+        signature = loaded.signatures['serving_default']
+        output_key = list(signature.structured_outputs)[0]
+        return ServingModel(loaded, input_shape, call=lambda x: signature(x)[output_key])
+    from tensorflow import keras
+    return ServingModel(keras.models.load_model(path), input_shape)
+
+
+def timed_load(path, input_shape=(128, 128, 3), warmup_batch_sizes=(1, 8, 32)):
+    """
+    Carrega e aquece um artefato, medindo cada fase.
+
+    Returns:
+        tuple: (modelo, {'model_load_s': ..., 'warmup_s': ...})
+    """
+    start = time.perf_counter()
+    model = load_serving_model(path, input_shape)
+    loaded = time.perf_counter()
+    model.warmup(warmup_batch_sizes)
+    return model, {'model_load_s': loaded - start, 'warmup_s': time.perf_counter() - loaded}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta o modelo .keras como SavedModel e/ou TFLite.")
+    parser.add_argument('--model', default='static/model/skin_cancer.keras')
+    parser.add_argument('--saved-model', help="Diretório de saída do SavedModel.")
+    parser.add_argument('--tflite', help="Arquivo .tflite de saída.")
+    args = parser.parse_args()
+
+    from tensorflow import keras
+    serving = ServingModel(keras.models.load_model(args.model))
+    if args.saved_model:
+        print(f"SavedModel salvo em {serving.export_saved_model(args.saved_model)}")
+    if args.tflite:
+        print(f"TFLite salvo em {serving.export_tflite(args.tflite)}")
+    for path in filter(None, (args.model, args.saved_model, args.tflite)):
+        _, timings = timed_load(path)
+        print(f"{path}: carga {timings['model_load_s']:.2f}s, aquecimento {timings['warmup_s']:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
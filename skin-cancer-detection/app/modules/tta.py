@@ -0,0 +1,85 @@
+import numpy as np
+
+from .serving import MALIGNANT_COLUMN
+
+# Vistas usadas no test-time augmentation, na ordem em que são acrescentadas. As quatro
+# primeiras (espelhamentos e rotação de 180°) são cobertas pelo RandomFlip do treino; as
+# seguintes completam as rotações de 90° e as transposições do quadrado.
+VIEWS = ('identity', 'flip_horizontal', 'flip_vertical', 'rotate_180',
+         'rotate_90', 'rotate_270', 'transpose', 'transverse')
+
+_TRANSFORMS = {
+    'identity': lambda img: img,
+    'flip_horizontal': lambda img: img[:, ::-1],
+    'flip_vertical': lambda img: img[::-1],
+    'rotate_180': lambda img: img[::-1, ::-1],
+    'rotate_90': lambda img: np.rot90(img, 1),
+    'rotate_270': lambda img: np.rot90(img, -1),
+    'transpose': lambda img: img.swapaxes(0, 1),
+    'transverse': lambda img: img[::-1, ::-1].swapaxes(0, 1),
+}
+
+
+def tta_views(img, n_views=4, out=None):
+    """
+    Empilha as `n_views` primeiras vistas de VIEWS de uma imagem em um único lote.
+
+    Args:
+        img (numpy.ndarray): Imagem pré-processada (H, W, C).
+        n_views (int, optional): Número de vistas (1 a 8). Defaults to 4.
+        out (numpy.ndarray, optional): Buffer (n_views, H, W, C) de destino. Defaults to
+            None (um novo array float32).
+    Returns:
+        numpy.ndarray: Lote (n_views, H, W, C) pronto para um único forward pass.
+    """
+    if not 1 <= n_views <= len(VIEWS):
+        raise ValueError(f"n_views deve estar entre 1 e {len(VIEWS)}.")
+    if n_views > 4 and img.shape[0] != img.shape[1]:
+        raise ValueError("Rotações de 90° exigem uma imagem quadrada.")
+    if out is None:
+        out = np.empty((n_views,) + img.shape, np.float32)
+    for dst, name in zip(out, VIEWS[:n_views]):
+        dst[...] = _TRANSFORMS[name](img)
+    return out
+
+
+def aggregate(probabilities):
+    """Média das probabilidades das vistas e desvio padrão entre elas (incerteza)."""
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    return float(probabilities.mean()), float(probabilities.std())
+
+
+class TTAPredictor:
+    """
+    Classifica uma imagem pela média das predições de suas vistas espelhadas/rotacionadas,
+    calculadas em um único forward pass.
+
+    Args:
+        predict_fn (callable): Recebe um lote (N, H, W, C) e retorna as predições (N, ...).
+            Ex.: `ServingModel.predict`.
+        n_views (int, optional): Número de vistas (1 a 8). Defaults to 4.
+        probability_column (int, optional): Coluna da saída usada como probabilidade de
+            malignidade. Defaults to MALIGNANT_COLUMN.
+    """
+    def __init__(self, predict_fn, n_views=4, probability_column=MALIGNANT_COLUMN):
+        if not 1 <= n_views <= len(VIEWS):
+            raise ValueError(f"n_views deve estar entre 1 e {len(VIEWS)}.")
+        self.predict_fn = predict_fn
+        self.n_views = n_views
+        self.probability_column = probability_column
+
+    def __call__(self, img):
+        """
+        Returns:
+            dict: probability (média), uncertainty (desvio padrão entre as vistas), views
+                (número de vistas) e view_probabilities (na ordem de VIEWS).
+        """
+        predictions = np.asarray(self.predict_fn(tta_views(img, self.n_views)))
+        probabilities = predictions[:, self.probability_column]
+        probability, uncertainty = aggregate(probabilities)
+        return {
+            'probability': probability,
+            'uncertainty': uncertainty,
+            'views': self.n_views,
+            'view_probabilities': [float(p) for p in probabilities],
+        }
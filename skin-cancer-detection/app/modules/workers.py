@@ -0,0 +1,100 @@
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PoolSaturated(Exception):
+    """Levantada quando a fila do WorkerPool está cheia; a requisição deve ser recusada."""
+    def __init__(self, retry_after):
+        super().__init__(f"Fila de processamento cheia; tente novamente em {retry_after}s.")
+        self.retry_after = retry_after
+
+
+class WorkerPool:
+    """
+    Pool de workers para o trabalho pesado (pré-processamento, inferência, saliência)
+    com fila limitada.
+
+    No máximo `n_workers` tarefas executam ao mesmo tempo e até `max_queue` aguardam;
+    acima disso `submit` falha imediatamente com PoolSaturated, para que o servidor
+    responda 503 + Retry-After em vez de acumular requisições.
+
+    Args:
+        n_workers (int): Tarefas simultâneas.
+        max_queue (int): Tarefas aguardando além das que executam.
+        stats_window (int, optional): Tarefas recentes usadas para estimar o Retry-After.
+            Defaults to 256.
+    """
+    def __init__(self, n_workers, max_queue, stats_window=256):
+        self.n_workers = n_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix='worker')
+        self._slots = threading.BoundedSemaphore(n_workers + max_queue)
+        self._lock = threading.Lock()
+        self._durations = deque(maxlen=stats_window)
+        self._in_flight = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def retry_after(self):
+        """Estimativa, em segundos, de quando a fila terá espaço (mínimo 1)."""
+        with self._lock:
+            mean = sum(self._durations) / len(self._durations) if self._durations else 1.0
+        return max(1, math.ceil(mean * (self.max_queue + self.n_workers) / self.n_workers))
+
+    def submit(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise PoolSaturated(self.retry_after())
+        with self._lock:
+            self._in_flight += 1
+        start = time.perf_counter()
+
+        def release(_):
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+                self._durations.append(time.perf_counter() - start)
+            self._slots.release()
+
+        # Executa no contexto de quem submeteu (ex.: o perfil da requisição em modules.metrics)
+        future = self._executor.submit(contextvars.copy_context().run, self._run_task, fn, *args, **kwargs)
+        future.add_done_callback(release)
+        return future
+
+    def _run_task(self, fn, *args, **kwargs):
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def running(self):
+        """Tarefas executando agora (no máximo `n_workers`; as que estão na fila não contam)."""
+        with self._lock:
+            return self._running
+
+    def run(self, fn, *args, **kwargs):
+        """Executa `fn` no pool e aguarda o resultado (PoolSaturated se a fila estiver cheia)."""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'n_workers': self.n_workers,
+                'max_queue': self.max_queue,
+                'in_flight': self._in_flight,
+                'running': self._running,
+                'completed': self._completed,
+                'rejected': self._rejected,
+            }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
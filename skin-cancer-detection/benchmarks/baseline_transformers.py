@@ -0,0 +1,111 @@
+"""
+Cópia fixa dos transformadores do baseline (antes do FusedPreprocess, do n_jobs e dos
+buffers reutilizáveis), usada como o lado "antes" do preprocess_benchmark.py. Não é
+importada pelo app: os transformadores atuais estão em app/modules/preprocess.py.
+"""
+import cv2
+import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin
+
+
+class Resize(BaseEstimator, TransformerMixin):
+    """
+    Redimensiona as imagens para um tamanho fixo.
+    
+    Args:
+        size (tuple, optional): O tamanho para o qual as imagens serão redimensionadas.
+            Defaults to (128, 128).
+    """
+    def __init__(self, size=(128, 128)):
+        self.size = size
+        
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X):
+        return np.array([cv2.resize(img, self.size) for img in X])
+
+
+class GaussianBlur(BaseEstimator, TransformerMixin):
+    """
+    Aplica um filtro gaussiano para remoção de ruído.
+    
+    Args:
+        ksize (tuple, optional): Tamanho do kernel gaussiano. Defaults to (5, 5).
+        sigma (float, optional): Desvio padrão da distribuição gaussiana. Defaults to 0.
+    """
+    def __init__(self, ksize=(5, 5), sigma=0):
+        self.ksize = ksize
+        self.sigma = sigma
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X):
+        return np.array([cv2.GaussianBlur(img, self.ksize, self.sigma) for img in X])
+
+
+class CLAHE_Color(BaseEstimator, TransformerMixin):
+    """
+    Aplica CLAHE em cada canal de cor (BGR) de uma imagem.
+
+    Args:
+        clip_limit (float, optional): Limite de recorte para CLAHE. Defaults to 2.0.
+        tile_grid_size (tuple, optional): Tamanho da grade para CLAHE. Defaults to (8, 8).
+    """
+    def __init__(self, clip_limit=2.0, tile_grid_size=(8, 8)):
+        self.clip_limit = clip_limit
+        self.tile_grid_size = tile_grid_size
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X):
+        processed_images = []
+        for img in X:
+            lab = cv2.cvtColor(img, cv2.COLOR_BGR2LAB)
+            l, a, b = cv2.split(lab)
+            clahe = cv2.createCLAHE(clipLimit=self.clip_limit, tileGridSize=self.tile_grid_size)
+            cl = clahe.apply(l)
+            merged_lab = cv2.merge((cl, a, b))
+            processed_img = cv2.cvtColor(merged_lab, cv2.COLOR_LAB2BGR)
+            processed_images.append(processed_img)
+        return np.array(processed_images)
+
+
+class MorphologicalOperations(BaseEstimator, TransformerMixin):
+    def __init__(self, operation='opening', kernel_size=(5, 5), iterations=1):
+        self.operation = operation
+        self.kernel = np.ones(kernel_size, np.uint8)
+        self.iterations = iterations
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X):
+        processed_images = []
+        for img in X:
+            if len(img.shape) == 2:  # Imagem em escala de cinza
+                gray = img
+            elif len(img.shape) == 3: # Imagem colorida, converter para escala de cinza
+                gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+            else:
+                raise ValueError("Imagem com formato não suportado.")
+
+            if self.operation == 'erosion':
+                processed_img = cv2.erode(gray, self.kernel, iterations=self.iterations)
+            elif self.operation == 'dilation':
+                processed_img = cv2.dilate(gray, self.kernel, iterations=self.iterations)
+            elif self.operation == 'opening':
+                processed_img = cv2.morphologyEx(gray, cv2.MORPH_OPEN, self.kernel, iterations=self.iterations)
+            elif self.operation == 'closing':
+                processed_img = cv2.morphologyEx(gray, cv2.MORPH_CLOSE, self.kernel, iterations=self.iterations)
+            else:
+                raise ValueError(f"Operação morfológica '{self.operation}' não suportada.")
+
+            if len(img.shape) == 3: # Retornar na forma original (mantendo 3 canais)
+                processed_images.append(cv2.cvtColor(processed_img, cv2.COLOR_GRAY2RGB))
+            else:
+                processed_images.append(processed_img)
+
+        return np.array(processed_images)
@@ -0,0 +1,135 @@
+"""
+Relatório de tempo de importação (`python -X importtime`) dos módulos do caminho de
+inferência, com verificação de regressões.
+
+Para cada grupo, importa os módulos em um processo novo, soma o tempo por pacote de
+primeiro nível e verifica que nenhum módulo do app importa diretamente um pacote
+pesado de uso offline (matplotlib, métricas e seleção de modelos do sklearn, ...).
+Importações feitas por bibliotecas de terceiros são apenas listadas. Termina com
+código 1 se houver violação ou se o tempo mediano passar de `--budget-ms`.
+
+Uso (a partir de skin-cancer-detection/):
+    python benchmarks/import_report.py
+    python benchmarks/import_report.py --group preprocess --budget-ms 1500 --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+import numpy as np
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app')
+
+# Módulos de cada grupo e os pacotes que eles não podem importar
+GROUPS = {
+    'preprocess': {
+        'modules': ['modules.preprocess', 'modules.decode', 'modules.montage', 'modules.batching',
+                    'modules.result_cache', 'modules.workers', 'modules.metrics'],
+        'forbidden': ['tensorflow', 'keras', 'matplotlib', 'sklearn.metrics', 'sklearn.model_selection'],
+    },
+    # Os módulos importados pelo app.py. TensorFlow/Keras só são importados ao carregar o
+    # modelo (TFLite ou Keras) ou a saliência, e entram no `model_load_s` do startup_report;
+    # o pré-processamento vem de modules.fused, sem o sklearn (que traz SciPy e pandas)
+    'serving': {
+        'modules': ['modules.fused', 'modules.decode', 'modules.montage', 'modules.batching',
+                    'modules.result_cache', 'modules.workers', 'modules.metrics', 'modules.heatmap',
+                    'modules.serving', 'modules.tta', 'modules.registry'],
+        'forbidden': ['tensorflow', 'keras', 'matplotlib', 'sklearn', 'scipy', 'pandas'],
+    },
+}
+
+
+def import_times(modules, python=sys.executable):
+    """
+    Importa `modules` em um processo novo com `-X importtime`.
+
+    Returns:
+        list: (módulo, tempo próprio em ms, tempo acumulado em ms, módulo que o importou)
+            na ordem do relatório.
+    """
+    code = 'import ' + ', '.join(modules)
+    env = dict(os.environ, PYTHONPATH=APP_DIR, TF_CPP_MIN_LOG_LEVEL='3')
+    proc = subprocess.run([python, '-X', 'importtime', '-c', code], cwd=APP_DIR, env=env,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {modules}:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = len(name) - len(name.lstrip())
+        rows.append((name.strip(), int(self_us) / 1000.0, int(cumulative_us) / 1000.0, depth))
+    # Cada módulo aparece antes de quem o importou, com indentação maior; o importador
+    # considerado é o ancestral mais próximo fora do próprio pacote
+    entries = []
+    for i, (name, self_ms, cumulative_ms, depth) in enumerate(rows):
+        parent = None
+        for ancestor, _, _, ancestor_depth in rows[i + 1:]:
+            if ancestor_depth < depth:
+                depth = ancestor_depth
+                if ancestor.split('.')[0] != name.split('.')[0]:
+                    parent = ancestor
+                    break
+        entries.append((name, self_ms, cumulative_ms, parent))
+    return entries
+
+
+def _is_app_module(name):
+    return name is None or name == 'app' or name.startswith('modules.')
+
+
+def summarize(entries):
+    """Tempo total e tempo próprio somado por pacote de primeiro nível (ms)."""
+    by_package = defaultdict(float)
+    for name, self_ms, _, _ in entries:
+        by_package[name.split('.')[0]] += self_ms
+    return sum(by_package.values()), dict(by_package)
+
+
+def check_group(name, repeat=3, budget_ms=None, top=10):
+    group = GROUPS[name]
+    runs = [import_times(group['modules']) for _ in range(repeat)]
+    totals = [summarize(entries)[0] for entries in runs]
+    total_ms = float(np.median(totals))
+    _, by_package = summarize(runs[int(np.argsort(totals)[len(totals) // 2])])
+    importers = {name: parent for name, _, _, parent in runs[0]}
+    forbidden = [module for module in group['forbidden'] if module in importers]
+    violations = sorted(module for module in forbidden if _is_app_module(importers[module]))
+
+    print(f"[{name}] {len(group['modules'])} módulos, mediana de {repeat} execuções: {total_ms:.0f} ms")
+    for package, ms in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {package:<24} {ms:9.1f} ms")
+    for module in forbidden:
+        if module in violations:
+            print(f"  ERRO: {module} importado por {importers[module]}")
+        else:
+            print(f"  aviso: {module} importado indiretamente por {importers[module]}")
+    over_budget = budget_ms is not None and total_ms > budget_ms
+    if over_budget:
+        print(f"  ERRO: {total_ms:.0f} ms acima do limite de {budget_ms:.0f} ms")
+    return {'total_ms': total_ms, 'by_package': by_package, 'violations': violations,
+            'ok': not violations and not over_budget}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--group', nargs='+', default=list(GROUPS), choices=list(GROUPS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--budget-ms', type=float, help="Tempo máximo de importação por grupo.")
+    parser.add_argument('--top', type=int, default=10, help="Pacotes listados por grupo.")
+    parser.add_argument('--output', help="Arquivo JSON com o relatório.")
+    args = parser.parse_args()
+
+    report = {name: check_group(name, args.repeat, args.budget_ms, args.top) for name in args.group}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0 if all(result['ok'] for result in report.values()) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Custo do recorte da lesão (LesionCrop) e comparação de acurácia com e sem recorte.
+
+O custo é medido por resolução de entrada: a segmentação em si (`bounding_box`) e o
+pré-processamento completo (FusedPreprocess) com e sem a etapa de recorte. Com
+--csv/--images, o conjunto de teste (mesma divisão dos notebooks) é classificado
+pelas duas variantes e a acurácia e o AUC são comparados.
+
+Uso (a partir de skin-cancer-detection/):
+    python benchmarks/lesion_crop_benchmark.py
+    python benchmarks/lesion_crop_benchmark.py --csv ISIC_GroundTruth.csv --images /dados/isic \\
+        --model app/static/model/skin_cancer.keras
+"""
+import argparse
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from modules.preprocess import LesionCrop, FusedPreprocess  # noqa: E402
+from modules.serving import MALIGNANT_COLUMN  # noqa: E402
+from preprocess_benchmark import load_images  # noqa: E402
+from run_benchmarks import DEFAULT_MODEL, time_calls  # noqa: E402
+
+RESOLUTIONS = ((600, 450), (1024, 768), (2048, 1536), (4000, 3000))
+
+
+def benchmark_cost(images, resolutions=RESOLUTIONS, repeat=20, warmup=2):
+    """Latência p50/p95 (ms por imagem) do recorte e do pré-processamento com e sem ele."""
+    crop = LesionCrop()
+    plain, cropped = FusedPreprocess(), FusedPreprocess(crop=crop)
+    results = {}
+    for width, height in resolutions:
+        batch = [cv2.resize(img, (width, height)) for img in images]
+        cases = {
+            'bounding_box': lambda: [crop.bounding_box(img) for img in batch],
+            'FusedPreprocess': lambda: plain.transform(batch),
+            'FusedPreprocess + LesionCrop': lambda: cropped.transform(batch),
+        }
+        for name, fn in cases.items():
+            latencies = time_calls(fn, repeat, warmup) / len(batch)
+            results[(f'{width}x{height}', name)] = np.percentile(latencies, [50, 95])
+    return results
+
+
+def evaluate(model, dataset, probability_column=MALIGNANT_COLUMN):
+    """Acurácia e AUC de `model` em um StreamingDataset (rótulos 0/1)."""
+    from sklearn.metrics import accuracy_score, roc_auc_score
+
+    probabilities, labels = [], []
+    for X, y in dataset:
+        probabilities.append(np.asarray(model.predict(X))[:, probability_column])
+        labels.append(y)
+    y_prob, y_true = np.concatenate(probabilities), np.concatenate(labels)
+    return {
+        'accuracy': accuracy_score(y_true, (y_prob > 0.5).astype(int)),
+        'auc': roc_auc_score(y_true, y_prob) if len(np.unique(y_true)) > 1 else float('nan'),
+        'n': len(y_true),
+    }
+
+
+def compare_accuracy(csv_path, image_folder, model_path, test_size=0.2, probability_column=MALIGNANT_COLUMN, n_jobs=-1):
+    from modules.dataset import StreamingDataset
+    from modules.serving import load_serving_model
+
+    model = load_serving_model(model_path)
+    results = {}
+    for name, crop in (('sem recorte', None), ('com recorte', LesionCrop())):
+        dataset = StreamingDataset.from_csv(csv_path, image_folder, pipeline=FusedPreprocess(n_jobs=n_jobs, crop=crop),
+                                            target_size=None, one_hot=False, n_jobs=n_jobs)
+        _, test = dataset.split(test_size=test_size)
+        results[name] = evaluate(model, test, probability_column)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n-images', type=int, default=16)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--csv', help="CSV de ground truth do ISIC (ativa a comparação de acurácia).")
+    parser.add_argument('--images', help="Diretório das imagens do ISIC.")
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--test-size', type=float, default=0.2)
+    parser.add_argument('--probability-column', type=int, default=MALIGNANT_COLUMN,
+                        help=f"Saída do modelo usada como probabilidade de malignidade ({MALIGNANT_COLUMN}).")
+    args = parser.parse_args()
+
+    print(f"--- Custo por imagem ({args.n_images} imagens, {args.repeat} execuções) ---")
+    for (resolution, name), (p50, p95) in benchmark_cost(load_images(args.n_images), repeat=args.repeat).items():
+        print(f"  {resolution:<10} {name:<30} p50={p50:7.3f} ms  p95={p95:7.3f} ms")
+
+    if args.csv and args.images:
+        print(f"\n--- Conjunto de teste ({args.model}) ---")
+        for name, metrics in compare_accuracy(args.csv, args.images, args.model, args.test_size,
+                                              args.probability_column).items():
+            print(f"  {name:<12} acurácia={metrics['accuracy']:.4f}  AUC={metrics['auc']:.4f}  (n={metrics['n']})")
+
+
+if __name__ == '__main__':
+    main()
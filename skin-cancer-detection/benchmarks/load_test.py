@@ -0,0 +1,115 @@
+"""
+Gerador de carga para o servidor: envia uploads concorrentes para /predict (ou
+/predict/batch) e mede vazão, latência e códigos de resposta, incluindo os 503 da
+fila limitada.
+
+Uso (a partir de skin-cancer-detection/, com o servidor rodando):
+    python benchmarks/load_test.py --url http://localhost:8000/predict --concurrency 32 --requests 500
+"""
+import argparse
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter
+
+import numpy as np
+
+SAMPLE_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', '03_primary', 'ISIC_0052003.jpg')
+
+
+def multipart_body(field, filename, data):
+    boundary = uuid.uuid4().hex
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f'Content-Type: image/jpeg\r\n\r\n').encode() + data + f'\r\n--{boundary}--\r\n'.encode()
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+def send(url, body, content_type, timeout):
+    """Envia uma requisição e retorna (status, latência em segundos, Retry-After)."""
+    req = urllib.request.Request(url, data=body, headers={'Content-Type': content_type}, method='POST')
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+            return response.status, time.perf_counter() - start, None
+    except urllib.error.HTTPError as e:
+        e.read()
+        return e.code, time.perf_counter() - start, e.headers.get('Retry-After')
+    except OSError:
+        return 'erro', time.perf_counter() - start, None
+
+
+def run_load(url, data, field='file', concurrency=16, n_requests=200, timeout=120.0):
+    """
+    Dispara `n_requests` uploads com `concurrency` clientes simultâneos.
+
+    Returns:
+        dict: Vazão (req/s), contagem por status, latências p50/p95/p99 (ms) das
+            respostas 200 e dos 503, e os valores de Retry-After recebidos.
+    """
+    body, content_type = multipart_body(field, 'lesion.jpg', data)
+    lock = threading.Lock()
+    remaining = [n_requests]
+    samples = []
+
+    def client():
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    return
+                remaining[0] -= 1
+            sample = send(url, body, content_type, timeout)
+            with lock:
+                samples.append(sample)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    def percentiles(status):
+        latencies = np.array([latency for code, latency, _ in samples if code == status]) * 1000.0
+        if latencies.size == 0:
+            return None
+        return dict(zip(('p50', 'p95', 'p99'), np.percentile(latencies, [50, 95, 99]).round(1).tolist()))
+
+    return {
+        'elapsed_s': elapsed,
+        'throughput': len(samples) / elapsed,
+        'status': dict(Counter(code for code, _, _ in samples)),
+        'latency_ok_ms': percentiles(200),
+        'latency_503_ms': percentiles(503),
+        'retry_after': sorted({value for _, _, value in samples if value is not None}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8000/predict')
+    parser.add_argument('--image', default=SAMPLE_IMAGE)
+    parser.add_argument('--field', default='file', help="Campo do formulário ('files' para /predict/batch).")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--timeout', type=float, default=120.0)
+    args = parser.parse_args()
+
+    with open(args.image, 'rb') as f:
+        data = f.read()
+    report = run_load(args.url, data, args.field, args.concurrency, args.requests, args.timeout)
+    print(f"{args.requests} requisições, {args.concurrency} clientes, {report['elapsed_s']:.1f}s")
+    print(f"  Vazão: {report['throughput']:.1f} req/s")
+    print(f"  Status: {report['status']}")
+    print(f"  Latência 200 (ms): {report['latency_ok_ms']}")
+    print(f"  Latência 503 (ms): {report['latency_503_ms']}")
+    if report['retry_after']:
+        print(f"  Retry-After recebidos: {report['retry_after']}")
+
+
+if __name__ == '__main__':
+    main()
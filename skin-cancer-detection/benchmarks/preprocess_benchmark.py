@@ -0,0 +1,97 @@
+"""
+Compara a vazão (imagens/s) do Pipeline sklearn do baseline (cópia fixa em
+baseline_transformers.py) com o mesmo Pipeline usando os transformadores atuais e com o
+FusedPreprocess. As saídas são verificadas idênticas às do baseline.
+
+Uso (a partir de skin-cancer-detection/):
+    python benchmarks/preprocess_benchmark.py --n-images 256 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import cv2
+import numpy as np
+from sklearn.pipeline import Pipeline
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+import baseline_transformers  # noqa: E402
+from modules import preprocess  # noqa: E402
+
+# Os transformadores do baseline não declaram que dispensam o fit, e o sklearn avisaria a
+# cada transform de um Pipeline não ajustado
+warnings.filterwarnings('ignore', message='This Pipeline instance is not fitted', category=FutureWarning)
+
+SAMPLE_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', '03_primary', 'ISIC_0052003.jpg')
+
+
+def build_pipeline(transformers=preprocess):
+    """Pipeline do app com as classes de `transformers` (modules.preprocess ou baseline_transformers)."""
+    return Pipeline([
+        ('resize', transformers.Resize((128, 128))),
+        ('blur', transformers.GaussianBlur()),
+        ('morph_opening', transformers.MorphologicalOperations(operation='opening', kernel_size=(3, 3))),
+        ('morph_closing', transformers.MorphologicalOperations(operation='closing', kernel_size=(3, 3))),
+        ('clahe', transformers.CLAHE_Color())
+    ])
+
+
+def load_images(n_images, shape=(450, 600), seed=42):
+    """Usa a imagem de amostra do ISIC, se existir, e completa com imagens sintéticas."""
+    rng = np.random.default_rng(seed)
+    images = []
+    sample = cv2.imread(SAMPLE_IMAGE)
+    if sample is not None:
+        images.append(cv2.cvtColor(sample, cv2.COLOR_BGR2RGB))
+    while len(images) < n_images:
+        noise = rng.integers(0, 256, size=(*shape, 3), dtype=np.uint8)
+        images.append(cv2.GaussianBlur(noise, (9, 9), 0))
+    return images
+
+
+def best_throughput(fn, images, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(images)
+        best = min(best, time.perf_counter() - start)
+    return len(images) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n-images', type=int, default=256)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Threads da variante paralela (-1 = todos os núcleos).")
+    args = parser.parse_args()
+
+    images = load_images(args.n_images)
+    baseline_pipeline = build_pipeline(baseline_transformers)
+    pipeline = build_pipeline()
+    fused = preprocess.FusedPreprocess.from_pipeline(pipeline)
+    fused_parallel = preprocess.FusedPreprocess.from_pipeline(pipeline, n_jobs=args.n_jobs)
+    out = np.empty((len(images), 128, 128, 3), np.uint8)
+
+    reference = baseline_pipeline.transform(images)
+    for name, candidate in (('Pipeline atual', pipeline), ('FusedPreprocess', fused)):
+        if not np.array_equal(reference, candidate.transform(images)):
+            raise SystemExit(f"{name} divergiu do Pipeline do baseline.")
+
+    results = {
+        'Pipeline (baseline)': best_throughput(baseline_pipeline.transform, images, args.repeat),
+        'Pipeline (atual)': best_throughput(pipeline.transform, images, args.repeat),
+        'FusedPreprocess': best_throughput(fused.transform, images, args.repeat),
+        'FusedPreprocess (out=buffer)': best_throughput(lambda X: fused.transform(X, out=out), images, args.repeat),
+        f'FusedPreprocess (n_jobs={args.n_jobs})': best_throughput(lambda X: fused_parallel.transform(X, out=out), images, args.repeat),
+    }
+    baseline = results['Pipeline (baseline)']
+    print(f"{len(images)} imagens, melhor de {args.repeat} execuções (saída idêntica verificada)")
+    for name, throughput in results.items():
+        print(f"  {name:<30} {throughput:10.1f} imagens/s  ({throughput / baseline:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
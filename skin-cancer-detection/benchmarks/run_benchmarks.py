@@ -0,0 +1,258 @@
+"""
+Benchmarks reprodutíveis das etapas de pré-processamento, inferência, saliência,
+visualização e da requisição completa ao app.
+
+Cada caso é executado `--repeat` vezes (após `--warmup` execuções descartadas) para
+cada tamanho de lote e número de threads, e o resultado traz latência p50/p95/p99 por
+chamada e vazão em imagens/s. As imagens são a amostra do ISIC em data/03_primary (se
+existir) completada com imagens sintéticas, sempre com a mesma semente.
+
+Uso (a partir de skin-cancer-detection/):
+    python benchmarks/run_benchmarks.py --output baseline.json
+    python benchmarks/run_benchmarks.py --groups preprocess --batch-sizes 1 32 --n-jobs 1 4 --output novo.json
+    python benchmarks/run_benchmarks.py --compare baseline.json novo.json --threshold 0.10
+
+Os grupos 'model' e 'e2e' usam o modelo em app/static/model (ou --model) e são
+pulados se ele não existir.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(BENCHMARKS_DIR, '..', 'app')
+sys.path.insert(0, APP_DIR)
+
+from modules.preprocess import (  # noqa: E402
+    Resize, GaussianBlur, CLAHE_Color, MorphologicalOperations, OtsuThreshold, Watershed, FusedPreprocess,
+    BatchOtsuThreshold, BatchWatershed,
+)
+from preprocess_benchmark import load_images  # noqa: E402
+
+GROUPS = ('preprocess', 'model', 'visualization', 'e2e')
+DEFAULT_MODEL = os.path.join(APP_DIR, 'static', 'model', 'skin_cancer.keras')
+
+
+def time_calls(fn, repeat, warmup):
+    """Executa `fn` e retorna a latência (ms) de cada uma das `repeat` chamadas medidas."""
+    for _ in range(warmup):
+        fn()
+    latencies = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies[i] = (time.perf_counter() - start) * 1000.0
+    return latencies
+
+
+class BenchmarkRun:
+    """Coleta os casos de uma execução e os resume em um dicionário serializável."""
+    def __init__(self, repeat, warmup):
+        self.repeat = repeat
+        self.warmup = warmup
+        self.results = []
+
+    def add(self, group, name, fn, batch_size=1, n_jobs=1):
+        latencies = time_calls(fn, self.repeat, self.warmup)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        result = {
+            'group': group,
+            'name': name,
+            'batch_size': batch_size,
+            'n_jobs': n_jobs,
+            'p50_ms': float(p50),
+            'p95_ms': float(p95),
+            'p99_ms': float(p99),
+            'mean_ms': float(latencies.mean()),
+            'throughput': float(batch_size * 1000.0 / p50),
+        }
+        self.results.append(result)
+        print(f"  {name:<28} lote={batch_size:<4} n_jobs={n_jobs:<3} p50={p50:9.2f} ms  p95={p95:9.2f} ms  "
+              f"p99={p99:9.2f} ms  {result['throughput']:9.1f} img/s", flush=True)
+
+
+def bench_preprocess(run, images, batch_sizes, n_jobs_list):
+    print("[preprocess]")
+    resized = Resize((128, 128)).transform(images)
+    stages = [
+        ('Resize', lambda n: Resize((128, 128), n_jobs=n), images),
+        ('GaussianBlur', lambda n: GaussianBlur(n_jobs=n), resized),
+        ('MorphologicalOperations', lambda n: MorphologicalOperations('opening', (3, 3), n_jobs=n), resized),
+        ('CLAHE_Color', lambda n: CLAHE_Color(n_jobs=n), resized),
+        ('OtsuThreshold', lambda n: OtsuThreshold(n_jobs=n), resized),
+        ('BatchOtsuThreshold', lambda n: BatchOtsuThreshold(n_jobs=n), resized),
+        ('Watershed', lambda n: Watershed(n_jobs=n), resized),
+        ('BatchWatershed', lambda n: BatchWatershed(n_jobs=n), resized),
+        ('FusedPreprocess', lambda n: FusedPreprocess(n_jobs=n), images),
+    ]
+    for name, make, inputs in stages:
+        for n_jobs in n_jobs_list:
+            step = make(n_jobs)
+            for batch_size in batch_sizes:
+                batch = inputs[:batch_size]
+                run.add('preprocess', name, lambda: step.transform(batch), len(batch), n_jobs)
+
+
+def bench_model(run, model_path, processed, batch_sizes):
+    from tensorflow import keras
+    from modules.heatmap import SaliencyEngine, saliency_map
+    from modules.serving import ServingModel, strip_augmentation
+
+    print("[model]")
+    model = keras.models.load_model(model_path)
+    serving = ServingModel(model)
+    engine = SaliencyEngine(strip_augmentation(model))
+    for batch_size in batch_sizes:
+        batch = processed[:batch_size].astype(np.float32)
+        run.add('model', 'inference', lambda: serving.predict(batch), len(batch))
+        run.add('model', 'SaliencyEngine', lambda: engine(processed[:batch_size]), len(batch))
+    run.add('model', 'saliency_map', lambda: saliency_map(model, processed[0]))
+
+
+def bench_visualization(run, images, processed):
+    import matplotlib
+    matplotlib.use('Agg')
+    from modules.heatmap import visualize_saliency
+    from modules.montage import render_montage
+    from modules.preprocess import show_images
+
+    print("[visualization]")
+    saliency = np.random.default_rng(0).random(processed.shape[1:3]).astype(np.float32)
+    run.add('visualization', 'visualize_saliency', lambda: visualize_saliency(images[0], saliency))
+    panel = [images[0]] + [processed[0]] * 5
+    titles = ['Original', 'Resize', 'GaussianBlur', 'Opening', 'Closing', 'CLAHE']
+    run.add('visualization', 'show_images', lambda: show_images(panel, titles))
+    run.add('visualization', 'render_montage', lambda: render_montage(panel, titles))
+
+
+def bench_e2e(run, model_path, image):
+    print("[e2e]")
+    # O app resolve caminhos relativos ao seu diretório; o cache de resultados é
+    # desativado para medir o processamento completo a cada requisição
+    os.environ.setdefault('MODEL_PATH', os.path.abspath(model_path))
+    os.environ['RESULT_CACHE_SIZE'] = '0'
+    os.environ.pop('RESULT_CACHE_DIR', None)
+    cwd = os.getcwd()
+    os.chdir(APP_DIR)
+    try:
+        from app import app
+    finally:
+        os.chdir(cwd)
+    client = app.test_client()
+    _, encoded = cv2.imencode('.jpg', cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+    data = encoded.tobytes()
+
+    def post(path):
+        response = client.post(path, data={'file': (io.BytesIO(data), 'lesion.jpg')})
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} retornou {response.status_code}")
+
+    run.add('e2e', '/predict', lambda: post('/predict'))
+    run.add('e2e', '/api/v1/predict', lambda: post('/api/v1/predict'))
+
+
+def metadata(args):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCHMARKS_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'repeat': args.repeat,
+        'warmup': args.warmup,
+        'n_images': args.n_images,
+    }
+
+
+def compare(baseline_path, candidate_path, threshold=0.10):
+    """
+    Compara duas execuções caso a caso (grupo, nome, lote, n_jobs) e aponta as
+    lentidões: p50 ou p95 mais de `threshold` acima da execução de referência.
+
+    Returns:
+        list: Casos com lentidão, como (chave, métrica, referência, nova, variação).
+    """
+    def load(path):
+        with open(path) as f:
+            results = json.load(f)['results']
+        return {(r['group'], r['name'], r['batch_size'], r['n_jobs']): r for r in results}
+
+    baseline, candidate = load(baseline_path), load(candidate_path)
+    regressions = []
+    print(f"{'caso':<52} {'p50 ref':>10} {'p50 novo':>10} {'var':>8}")
+    for key in sorted(baseline.keys() & candidate.keys()):
+        old, new = baseline[key], candidate[key]
+        change = new['p50_ms'] / old['p50_ms'] - 1.0
+        flagged = [metric for metric in ('p50_ms', 'p95_ms') if new[metric] > old[metric] * (1.0 + threshold)]
+        label = f"{key[0]}/{key[1]} lote={key[2]} n_jobs={key[3]}"
+        print(f"{label:<52} {old['p50_ms']:10.2f} {new['p50_ms']:10.2f} {change:+8.1%}"
+              + ("  LENTIDÃO (" + ", ".join(flagged) + ")" if flagged else ""))
+        regressions.extend((key, metric, old[metric], new[metric], new[metric] / old[metric] - 1.0)
+                           for metric in flagged)
+    for key in sorted(baseline.keys() - candidate.keys()):
+        print(f"Caso ausente na nova execução: {key}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--groups', nargs='+', default=list(GROUPS), choices=GROUPS)
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=[1, 8, 32])
+    parser.add_argument('--n-jobs', nargs='+', type=int, default=[1, -1],
+                        help="Números de threads das etapas de pré-processamento.")
+    parser.add_argument('--n-images', type=int, default=32)
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--output', help="Arquivo JSON com os resultados.")
+    parser.add_argument('--compare', nargs=2, metavar=('REFERENCIA', 'NOVA'),
+                        help="Compara dois arquivos de resultados em vez de executar.")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="Aumento relativo de p50/p95 considerado lentidão. Defaults to 0.10.")
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(*args.compare, threshold=args.threshold)
+        print(f"\n{len(regressions)} lentidão(ões) acima de {args.threshold:.0%}")
+        sys.exit(1 if regressions else 0)
+
+    images = load_images(max(args.n_images, max(args.batch_sizes)))
+    processed = FusedPreprocess().transform(images)
+    run = BenchmarkRun(args.repeat, args.warmup)
+    has_model = os.path.exists(args.model)
+
+    if 'preprocess' in args.groups:
+        bench_preprocess(run, images, args.batch_sizes, args.n_jobs)
+    if 'visualization' in args.groups:
+        bench_visualization(run, images, processed)
+    for group in ('model', 'e2e'):
+        if group in args.groups and not has_model:
+            print(f"[{group}] pulado: modelo não encontrado em {args.model}")
+    if 'model' in args.groups and has_model:
+        bench_model(run, args.model, processed, args.batch_sizes)
+    if 'e2e' in args.groups and has_model:
+        bench_e2e(run, args.model, images[0])
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'meta': metadata(args), 'results': run.results}, f, indent=2)
+        print(f"Resultados salvos em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Custo do test-time augmentation (TTA) por número de vistas.
+
+Para cada número de vistas, compara o TTAPredictor (todas as vistas empilhadas em um
+único forward pass) com uma chamada do modelo por vista, e mostra o custo relativo a
+uma predição simples.
+
+Uso (a partir de skin-cancer-detection/):
+    python benchmarks/tta_benchmark.py
+    python benchmarks/tta_benchmark.py --model app/static/model/skin_cancer.keras --views 1 2 4 8 --repeat 50
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from modules.preprocess import FusedPreprocess  # noqa: E402
+from modules.tta import VIEWS, TTAPredictor, tta_views  # noqa: E402
+from preprocess_benchmark import load_images  # noqa: E402
+from run_benchmarks import DEFAULT_MODEL, time_calls  # noqa: E402
+
+
+def benchmark_views(model, image, view_counts=(1, 2, 4, 8), repeat=30, warmup=3):
+    """
+    Latência p50/p95 (ms) do TTA em lote e das vistas chamadas uma a uma.
+
+    Returns:
+        dict: {número de vistas: {'batched': (p50, p95), 'sequential': (p50, p95)}}
+    """
+    model.warmup(batch_sizes=sorted(set(view_counts)))
+    results = {}
+    for n_views in view_counts:
+        predictor = TTAPredictor(model.predict, n_views=n_views)
+        views = tta_views(image, n_views)
+        batched = time_calls(lambda: predictor(image), repeat, warmup)
+        sequential = time_calls(lambda: [model.predict(view[None]) for view in views], repeat, warmup)
+        results[n_views] = {
+            'batched': tuple(np.percentile(batched, [50, 95])),
+            'sequential': tuple(np.percentile(sequential, [50, 95])),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default=DEFAULT_MODEL,
+                        help="Artefato de inferência: .keras, .tflite ou diretório SavedModel.")
+    parser.add_argument('--views', nargs='+', type=int, default=[1, 2, 4, 8], choices=range(1, len(VIEWS) + 1))
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=3)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        sys.exit(f"Modelo não encontrado em {args.model}")
+    from modules.serving import load_serving_model
+
+    model = load_serving_model(args.model)
+    image = FusedPreprocess().transform(load_images(1))[0]
+    results = benchmark_views(model, image, args.views, args.repeat, args.warmup)
+
+    baseline = results[min(results)]['batched'][0] if 1 in results else None
+    print(f"{'vistas':>6} {'lote p50':>10} {'lote p95':>10} {'1 a 1 p50':>10} {'1 a 1 p95':>10} {'vs 1 vista':>11}")
+    for n_views, result in results.items():
+        (batched_p50, batched_p95), (sequential_p50, sequential_p95) = result['batched'], result['sequential']
+        relative = f"{batched_p50 / baseline:10.2f}x" if baseline else ''
+        print(f"{n_views:>6} {batched_p50:8.2f}ms {batched_p95:8.2f}ms {sequential_p50:8.2f}ms "
+              f"{sequential_p95:8.2f}ms {relative:>11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from modules.batching import MicroBatcher  # noqa: E402
+
+
+def predict_fn(batch):
+    return batch.reshape(len(batch), -1)[:, :2]
+
+
+def image(value):
+    return np.full((2, 2, 1), value, np.float32)
+
+
+def test_lone_request_waits_for_deadline_without_concurrency():
+    batcher = MicroBatcher(predict_fn, max_wait_ms=200)
+    start = time.perf_counter()
+    batcher.predict(image(1))
+    assert time.perf_counter() - start >= 0.15
+    batcher.stop()
+
+
+def test_lone_request_is_sent_when_every_submitter_waits():
+    batcher = MicroBatcher(predict_fn, max_wait_ms=10000, concurrency=1)
+    start = time.perf_counter()
+    np.testing.assert_array_equal(batcher.predict(image(3)), [3, 3])
+    assert time.perf_counter() - start < 5.0
+    assert batcher.stats()['waiting'] == 0
+    batcher.stop()
+
+
+def test_concurrent_requests_share_one_batch():
+    n_threads = 4
+    batcher = MicroBatcher(predict_fn, max_wait_ms=10000, concurrency=n_threads)
+    barrier = threading.Barrier(n_threads)
+    results = {}
+
+    def worker(i):
+        barrier.wait()
+        results[i] = batcher.predict(image(i))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.perf_counter() - start < 5.0
+    assert all(results[i][0] == i for i in range(n_threads))
+    stats = batcher.stats()
+    assert stats['total_items'] == n_threads and stats['batch_size']['max'] > 1
+    batcher.stop()
+
+
+def test_predict_many_waits_only_after_last_item():
+    batcher = MicroBatcher(predict_fn, max_wait_ms=10000, concurrency=1)
+    start = time.perf_counter()
+    predictions = batcher.predict_many([image(i) for i in range(5)])
+    assert time.perf_counter() - start < 5.0
+    np.testing.assert_array_equal(predictions[:, 0], np.arange(5))
+    assert batcher.stats()['total_batches'] == 1
+    batcher.stop()
@@ -0,0 +1,64 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+from sklearn.pipeline import Pipeline
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from modules.cache import PreprocessCache  # noqa: E402
+from modules.preprocess import LesionCrop, Normalize, Resize  # noqa: E402
+
+
+def lesion_images():
+    """Pele clara com uma lesão escura de tamanho diferente em cada imagem."""
+    images = []
+    for i, (h, w) in enumerate([(240, 320), (300, 300), (200, 260)]):
+        img = np.full((h, w, 3), 200, np.uint8)
+        cv2.circle(img, (w // 2, h // 2), 20 + 15 * i, (60, 40, 30), -1)
+        images.append(img)
+    return images
+
+
+def test_cropping_prefix_returns_ragged_list(tmp_path):
+    images = lesion_images()
+    pipeline = Pipeline([('crop', LesionCrop())])
+    expected = pipeline.fit_transform(images)
+    assert len({img.shape for img in expected}) > 1
+
+    cache = PreprocessCache(str(tmp_path))
+    for _ in range(2):
+        result = cache.transform(pipeline, images)
+        assert isinstance(result, list)
+        for out, ref in zip(result, expected):
+            np.testing.assert_array_equal(out, ref)
+    report = cache.report()
+    assert report['hits'] == len(images)
+    assert report['hit_rate'] == 0.5
+
+
+def test_crop_then_resize_uses_shard(tmp_path):
+    images = lesion_images()
+    pipeline = Pipeline([('crop', LesionCrop()), ('resize', Resize()), ('normalize', Normalize())])
+    expected = pipeline.fit_transform(images)
+
+    cache = PreprocessCache(str(tmp_path))
+    for _ in range(2):
+        np.testing.assert_allclose(cache.transform(pipeline, images), expected)
+    report = cache.report()
+    assert report['shard_hits'] == len(images)
+    assert report['hit_rate'] == 0.5
+
+
+def test_fit_transform_fits_batch_dependent_tail(tmp_path):
+    images = lesion_images()
+    expected = Pipeline([('resize', Resize()), ('normalize', Normalize('meanstd'))]).fit_transform(images)
+
+    cache = PreprocessCache(str(tmp_path))
+    pipeline = Pipeline([('resize', Resize()), ('normalize', Normalize('meanstd'))])
+    for _ in range(2):
+        np.testing.assert_allclose(cache.fit_transform(pipeline, images), expected, rtol=1e-5, atol=1e-5)
+    # O Normalize do pipeline fica ajustado, e `transform` passa a usá-lo
+    np.testing.assert_allclose(cache.transform(pipeline, images), expected, rtol=1e-5, atol=1e-5)
+    assert cache.report()['shard_hits'] == 2 * len(images)
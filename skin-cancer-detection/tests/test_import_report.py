@@ -0,0 +1,14 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+from import_report import GROUPS, check_group  # noqa: E402
+
+
+def test_serving_group_has_no_violations():
+    report = check_group('serving', repeat=1)
+    assert not report['violations']
+    assert report['ok']
+    # Nem indiretamente: o caminho de serviço não carrega sklearn, SciPy, pandas nem TF
+    assert not set(GROUPS['serving']['forbidden']) & set(report['by_package'])
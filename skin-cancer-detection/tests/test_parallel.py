@@ -0,0 +1,26 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from modules.preprocess import FusedPreprocess, GaussianBlur, LesionCrop, Resize  # noqa: E402
+
+
+@pytest.fixture
+def images():
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (60, 80, 3), dtype=np.uint8) for i in range(5)]
+
+
+@pytest.mark.parametrize('n_jobs', [None, 1, 2])
+@pytest.mark.parametrize('make', [Resize, GaussianBlur, LesionCrop, FusedPreprocess])
+def test_transform_accepts_generators(images, make, n_jobs):
+    transformer = make(n_jobs=n_jobs)
+    expected = transformer.transform(images)
+    result = transformer.transform(img for img in images)
+    assert len(result) == len(expected)
+    for out, ref in zip(result, expected):
+        np.testing.assert_array_equal(out, ref)
@@ -0,0 +1,54 @@
+import os
+import sys
+
+import numpy as np
+from sklearn.pipeline import Pipeline
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from modules.preprocess import (  # noqa: E402
+    CLAHE_Color, FusedPreprocess, GaussianBlur, MorphologicalOperations, Resize, TracingPipeline)
+
+
+def images(n=3):
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (90, 120, 3), dtype=np.uint8) for _ in range(n)]
+
+
+def test_trace_matches_pipeline_with_repeated_operation():
+    pipeline = TracingPipeline([
+        ('resize', Resize((64, 64))),
+        ('blur', GaussianBlur()),
+        ('open_small', MorphologicalOperations(operation='opening', kernel_size=(3, 3))),
+        ('open_large', MorphologicalOperations(operation='opening', kernel_size=(5, 5))),
+        ('clahe', CLAHE_Color()),
+    ])
+    X = images()
+    expected = []
+    pipeline.transform(X, trace=expected)
+
+    trace = []
+    out = FusedPreprocess.from_pipeline(pipeline).transform(X, trace=trace)
+    np.testing.assert_array_equal(out, expected[-1][1])
+    assert [name for name, _ in trace] == [name for name, _ in expected]
+    for (_, images_), (_, ref) in zip(trace, expected):
+        assert len(images_) == len(X)
+        np.testing.assert_array_equal(images_, np.stack(ref))
+
+
+def test_default_step_names_are_unique():
+    fused = FusedPreprocess(morphology=(('opening', (3, 3), 1), ('opening', (5, 5), 1)))
+    trace = []
+    fused.transform(images(2), trace=trace)
+    names = [name for name, _ in trace]
+    assert names == ['resize', 'blur', 'morph_0_opening', 'morph_1_opening', 'clahe']
+    assert all(len(images_) == 2 for _, images_ in trace)
+
+
+def test_from_pipeline_keeps_app_step_names():
+    pipeline = Pipeline([('resize', Resize()), ('blur', GaussianBlur()),
+                         ('morph_opening', MorphologicalOperations(operation='opening')),
+                         ('clahe', CLAHE_Color())])
+    trace = []
+    FusedPreprocess.from_pipeline(pipeline).transform(images(1), trace=trace)
+    assert [name for name, _ in trace] == ['resize', 'blur', 'morph_opening', 'clahe']
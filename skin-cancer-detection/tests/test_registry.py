@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from modules.registry import ModelRegistry  # noqa: E402
+
+
+class StubBundle:
+    def __init__(self, version):
+        self.version = version
+
+    def close(self):
+        pass
+
+
+def make_versions(root, names):
+    for name in names:
+        os.makedirs(root / name)
+        (root / name / 'skin_cancer.keras').write_bytes(b'')
+
+
+def test_startup_fallback_is_not_retried_by_refresh(tmp_path):
+    make_versions(tmp_path, ['v1', 'v2'])
+    attempts = []
+
+    def load_fn(name, path):
+        attempts.append(name)
+        if name == 'v2':
+            raise OSError('arquivo corrompido')
+        return StubBundle(name)
+
+    registry = ModelRegistry(load_fn, root=str(tmp_path), check_fn=lambda bundle: None)
+    assert registry.activate().version == 'v1'
+    assert attempts == ['v2', 'v1']
+    assert registry.stats()['failures'] == 1
+
+    # A versão desejada falhou na inicialização: a recarga não a tenta de novo...
+    assert registry.refresh() is False
+    assert attempts == ['v2', 'v1']
+    assert registry.stats()['failures'] == 1
+
+    # ...até o arquivo mudar
+    path = tmp_path / 'v2' / 'skin_cancer.keras'
+    os.utime(path, (os.path.getmtime(path) + 10,) * 2)
+    with pytest.raises(OSError):
+        registry.refresh()
+    assert attempts == ['v2', 'v1', 'v2']
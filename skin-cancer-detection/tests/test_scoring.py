@@ -0,0 +1,84 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from modules.preprocess import FusedPreprocess  # noqa: E402
+from modules.quantization import compare_variants  # noqa: E402
+import pytest  # noqa: E402
+
+from modules.scoring import (  # noqa: E402
+    CSVResultWriter, ParquetResultWriter, compute_metrics, list_images, read_ground_truth, score)
+from modules.serving import MALIGNANT_COLUMN  # noqa: E402
+
+
+class BrightnessModel:
+    """Modelo de duas saídas cuja coluna maligna cresce com o brilho; a outra é o complemento."""
+    def predict(self, batch):
+        malignant = np.asarray(batch, dtype=np.float64).mean(axis=(1, 2, 3))
+        malignant = (malignant - malignant.min()) / (np.ptp(malignant) + 1e-9)
+        out = np.empty((len(batch), 2))
+        out[:, MALIGNANT_COLUMN] = malignant
+        out[:, 1 - MALIGNANT_COLUMN] = 1.0 - malignant
+        return out
+
+
+def test_scoring_metrics_match_compare_variants(tmp_path):
+    rng = np.random.default_rng(0)
+    labels = np.array([0, 1, 0, 1, 1, 0, 1, 0])
+    # Brilho correlacionado com o rótulo: na coluna maligna, AUC acima de 0,5
+    brightness = 90 + 60 * labels + rng.normal(0, 40, len(labels))
+    ids = []
+    for i, value in enumerate(brightness):
+        ids.append(f'ISIC_{i:07d}')
+        img = np.clip(rng.normal(value, 10, (96, 96, 3)), 0, 255).astype(np.uint8)
+        cv2.imwrite(str(tmp_path / f'{ids[-1]}.jpg'), img)
+    csv_path = tmp_path / 'gt.csv'
+    pd.DataFrame({'isic_id': ids, 'malignant': labels}).to_csv(csv_path, index=False)
+
+    model = BrightnessModel()
+    preprocess = FusedPreprocess()
+    inputs = read_ground_truth(str(csv_path), str(tmp_path))
+    writer = CSVResultWriter(str(tmp_path / 'scores.csv'))
+    score(inputs, model, preprocess, writer, batch_size=len(ids), n_jobs=1)
+    scoring_auc = compute_metrics(writer.read())['roc_auc']
+
+    images = [cv2.cvtColor(cv2.imread(path), cv2.COLOR_BGR2RGB) for path in inputs['path']]
+    variants = compare_variants({'float32': model}, preprocess.transform(images), labels, batch_size=len(ids))
+    assert scoring_auc > 0.5
+    assert np.isclose(scoring_auc, variants['float32']['auc'])
+
+
+@pytest.mark.parametrize('make_writer', [lambda tmp: CSVResultWriter(str(tmp / 'scores.csv')),
+                                         lambda tmp: ParquetResultWriter(str(tmp / 'scores.parquet'))])
+def test_error_rows_are_retried(tmp_path, make_writer):
+    folder = tmp_path / 'images'
+    folder.mkdir()
+    img = np.full((64, 64, 3), 120, np.uint8)
+    for name in ('a', 'b'):
+        cv2.imwrite(str(folder / f'{name}.jpg'), img)
+    (folder / 'c.jpg').write_bytes(b'corrompido')
+    inputs = list_images(str(folder))
+
+    counts = score(inputs, BrightnessModel(), FusedPreprocess(), make_writer(tmp_path), n_jobs=1)
+    assert (counts['scored'], counts['errors']) == (2, 1)
+
+    cv2.imwrite(str(folder / 'c.jpg'), img)
+    writer = make_writer(tmp_path)
+    assert writer.done_ids() == {'a', 'b'}
+    counts = score(inputs, BrightnessModel(), FusedPreprocess(), writer, n_jobs=1)
+    assert (counts['scored'], counts['skipped'], counts['errors']) == (1, 2, 0)
+    results = writer.read()
+    assert sorted(results['image_id']) == ['a', 'b', 'c']
+    assert results['probability'].notna().all()
+
+
+def test_parquet_writer_flushes_on_interval(tmp_path):
+    writer = ParquetResultWriter(str(tmp_path / 'scores.parquet'), rows_per_part=1000, flush_interval_s=0)
+    writer.write(pd.DataFrame({'image_id': ['a'], 'probability': [0.5], 'error': ['']}))
+    # Sem close: a linha já está em disco
+    assert ParquetResultWriter(str(tmp_path / 'scores.parquet')).done_ids() == {'a'}
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from modules.serving import TFLiteModel  # noqa: E402
+
+tf = pytest.importorskip('tensorflow')
+
+
+@pytest.fixture(scope='module')
+def tiny_model(tmp_path_factory):
+    keras = tf.keras
+    model = keras.Sequential([keras.Input((8, 8, 3)), keras.layers.Conv2D(4, 3), keras.layers.Flatten(),
+                              keras.layers.Dense(2, activation='softmax')])
+    path = str(tmp_path_factory.mktemp('model') / 'tiny.tflite')
+    with open(path, 'wb') as f:
+        f.write(tf.lite.TFLiteConverter.from_keras_model(model).convert())
+    return model, path
+
+
+@pytest.mark.parametrize('n', [0, 1, 3, 4, 5, 9])
+def test_split_batches_match_keras(tiny_model, n):
+    model, path = tiny_model
+    tflite = TFLiteModel(path, batch_sizes=(4,))
+    assert tflite.batch_sizes == (1, 4)
+    batch = np.random.default_rng(n).random((n, 8, 8, 3), dtype=np.float32)
+    output = tflite.predict(batch)
+    assert output.shape == (n, 2)
+    if n:
+        np.testing.assert_allclose(output, model.predict(batch, verbose=0), rtol=1e-4, atol=1e-5)
+    # Cada interpretador mantém o tamanho alocado na carga
+    for batch_size, (interpreter, _, _, _) in tflite._interpreters.items():
+        assert interpreter.get_input_details()[0]['shape'][0] == batch_size